@@ -0,0 +1,95 @@
+"""
+Throughput of campaign renames, one PATCH /campaigns/update-name request per campaign
+against PATCH /campaigns/bulk.
+
+Run it against the API serving a benchmark database, the synthetic campaigns are renamed
+and then given their original names back:
+
+    DB_NAME=campaign_bench uvicorn main:app --port 8800
+    python -m benchmarks.bulk_updates --campaigns 100 --output bulk_updates.json
+"""
+import argparse
+import asyncio
+import time
+import httpx
+from benchmarks.results import report_regressions, write_results
+from benchmarks.synthetic_data import CAMPAIGN_ID_BASE
+
+# Largest list accepted by PATCH /campaigns/bulk
+MAX_BULK_UPDATES = 10_000
+
+
+def _throughput(rows: int, seconds: float, requests: int):
+    return {"rows": rows, "requests": requests, "seconds": round(seconds, 3),
+            "rows_per_second": round(rows / seconds if seconds > 0 else 0, 1)}
+
+
+async def rename_one_by_one(client, renames, clients: int):
+    semaphore = asyncio.Semaphore(clients)
+
+    async def rename(campaign_id, name):
+        async with semaphore:
+            response = await client.patch(f"/campaigns/update-name/{campaign_id}", json={"name": name})
+            response.raise_for_status()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(rename(campaign_id, name) for campaign_id, name in renames))
+    return _throughput(len(renames), time.perf_counter() - started_at, len(renames))
+
+
+async def rename_in_bulk(client, renames):
+    started_at = time.perf_counter()
+    requests = 0
+    for start in range(0, len(renames), MAX_BULK_UPDATES):
+        updates = [{"campaign_id": campaign_id, "name": name}
+                   for campaign_id, name in renames[start:start + MAX_BULK_UPDATES]]
+        response = await client.patch("/campaigns/bulk", json={"updates": updates})
+        response.raise_for_status()
+        if response.json()["missing_ids"]:
+            raise RuntimeError(f"Campaigns not found: {response.json()['missing_ids'][:10]}")
+        requests += 1
+    return _throughput(len(renames), time.perf_counter() - started_at, requests)
+
+
+async def run_benchmark(base_url: str, campaigns: int, clients: int):
+    ids = [CAMPAIGN_ID_BASE + i for i in range(campaigns)]
+    original = [(campaign_id, f"Synthetic campaign {i}") for i, campaign_id in enumerate(ids)]
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=300) as client:
+        try:
+            return {
+                "single_requests": await rename_one_by_one(
+                    client, [(campaign_id, f"{name} (single)") for campaign_id, name in original], clients
+                ),
+                "bulk_request": await rename_in_bulk(
+                    client, [(campaign_id, f"{name} (bulk)") for campaign_id, name in original]
+                ),
+            }
+        finally:
+            await rename_in_bulk(client, original)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare one-by-one and bulk campaign renames on a running API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8800", help="Base URL of the running API")
+    parser.add_argument("--campaigns", type=int, default=100, help="Synthetic campaigns to rename")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients for the one-by-one renames")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.url, args.campaigns, args.clients))
+    for name, result in results.items():
+        print(f"{name:>16}: {result['rows']:,} campaigns in {result['requests']:,} requests, {result['seconds']}s "
+              f"({result['rows_per_second']:,.0f} campaigns/s)")
+
+    config = {"url": args.url, "campaigns": args.campaigns, "clients": args.clients}
+    if args.output:
+        write_results(args.output, "bulk_updates", config, results)
+    if args.baseline and report_regressions(results, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Latency and throughput of each endpoint, measured one endpoint at a time.
+
+Start the app against the benchmark database first. Without CACHE_BACKEND=none most
+requests are served from the response cache instead of PostgreSQL:
+
+    DB_NAME=campaign_bench CACHE_BACKEND=none uvicorn main:app --port 8800
+    python -m benchmarks.endpoints --output endpoints.json --baseline previous.json
+
+The dates default to the range written by benchmarks.synthetic_data.
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+import httpx
+from benchmarks.load_test import run_load_test
+from benchmarks.results import report_regressions, write_results
+
+
+def scenarios(start_date: date, end_date: date):
+    """Path of every benchmarked request, by scenario name."""
+    month_start = end_date.replace(day=1)
+    week_start = end_date - timedelta(days=6)
+    range_params = f"start_date={start_date}&end_date={end_date}"
+    return {
+        "campaigns": "/campaigns",
+        "campaigns_page": "/campaigns?limit=50&offset=0",
+        "time_series_day": f"/performance-time-series?aggregate_by=day&{range_params}",
+        "time_series_week": f"/performance-time-series?aggregate_by=week&{range_params}",
+        "time_series_month": f"/performance-time-series?aggregate_by=month&{range_params}",
+        "compare_preceding": f"/compare-performance?start_date={week_start}&end_date={end_date}&compare_mode=preceding",
+        "compare_previous_month": (f"/compare-performance?start_date={month_start}&end_date={end_date}"
+                                   f"&compare_mode=previous_month"),
+    }
+
+
+async def warm_up(base_url: str, path: str, requests: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        for _ in range(requests):
+            await client.get(path)
+
+
+def run_benchmarks(base_url: str, paths: dict, clients: int, requests: int, warmup: int):
+    results = {}
+    for name, path in paths.items():
+        asyncio.run(warm_up(base_url, path, warmup))
+        results[name] = dict(asyncio.run(run_load_test(base_url, clients, requests, [path])), path=path)
+        latency = results[name]["latency_ms"]
+        print(f"{name:>24}: {results[name]['requests_per_second']:8.1f} req/s, p50 {latency['p50']} ms, "
+              f"p95 {latency['p95']} ms, p99 {latency['p99']} ms, {results[name]['errors']} errors")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every endpoint of a running API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8800", help="Base URL of the running API")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent clients per endpoint")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Sequential requests sent before measuring")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--end-date", type=date.fromisoformat, default=date(2024, 12, 31))
+    parser.add_argument("--only", nargs="+", help="Scenario names to run, all by default")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    paths = scenarios(args.start_date, args.end_date)
+    if args.only:
+        unknown = set(args.only) - set(paths)
+        if unknown:
+            parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+        paths = {name: path for name, path in paths.items() if name in args.only}
+
+    results = run_benchmarks(args.url, paths, args.clients, args.requests, args.warmup)
+
+    config = {"url": args.url, "clients": args.clients, "requests": args.requests, "warmup": args.warmup,
+              "start_date": args.start_date.isoformat(), "end_date": args.end_date.isoformat()}
+    if args.output:
+        write_results(args.output, "endpoints", config, results)
+    if args.baseline and report_regressions(results, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Concurrent load test for the API.
+
+Start the app first (e.g. `uvicorn main:app --port 8800`), then run:
+
+    python -m benchmarks.load_test --clients 200 --requests 5000
+
+Each client sends requests back to back, cycling through the endpoints below,
+and the script prints the throughput and latency percentiles.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+DEFAULT_PATHS = [
+    "/campaigns",
+    "/performance-time-series?aggregate_by=week&start_date=2024-01-01&end_date=2024-12-31",
+    "/compare-performance?start_date=2024-05-15&end_date=2024-05-21&compare_mode=preceding",
+    "/compare-performance?start_date=2024-05-01&end_date=2024-05-31&compare_mode=previous_month&device=MOBILE",
+]
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_client(client, paths, counter, latencies, errors):
+    while True:
+        index = counter["next"]
+        if index >= counter["total"]:
+            return
+        counter["next"] += 1
+
+        started_at = time.perf_counter()
+        try:
+            response = await client.get(paths[index % len(paths)])
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - started_at)
+
+
+async def run_load_test(base_url: str, clients: int, total_requests: int, paths=DEFAULT_PATHS):
+    latencies = []
+    errors = []
+    counter = {"next": 0, "total": total_requests}
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started_at = time.perf_counter()
+        await asyncio.gather(*(run_client(client, paths, counter, latencies, errors) for _ in range(clients)))
+        seconds = time.perf_counter() - started_at
+
+    return {
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(seconds, 2),
+        "requests_per_second": round(len(latencies) / seconds, 1),
+        "latency_ms": {
+            "mean": round(statistics.mean(latencies) * 1000, 1),
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Send concurrent requests to the API and report throughput.")
+    parser.add_argument("--url", default="http://127.0.0.1:8800", help="Base URL of the running API")
+    parser.add_argument("--clients", type=int, default=200, help="Number of concurrent clients")
+    parser.add_argument("--requests", type=int, default=5000, help="Total number of requests to send")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run_load_test(args.url, args.clients, args.requests))
+    print(f"{summary['requests']} requests from {summary['clients']} clients in {summary['seconds']}s "
+          f"({summary['requests_per_second']} req/s, {summary['errors']} errors)")
+    latency = summary["latency_ms"]
+    print(f"latency ms: mean {latency['mean']}, p50 {latency['p50']}, p95 {latency['p95']}, p99 {latency['p99']}")
+
+
+if __name__ == "__main__":
+    main()
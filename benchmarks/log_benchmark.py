@@ -0,0 +1,74 @@
+"""
+Per-call cost of Log.INFO compared with the previous implementation, which called
+inspect.stack() and looked up the logger's handlers on every call.
+
+    python -m benchmarks.log_benchmark --calls 20000
+"""
+import argparse
+import inspect
+import logging
+import os
+import tempfile
+import time
+from src.utils.log import Log
+
+
+class LegacyLog:
+    """The previous Log facade, kept here as the baseline."""
+
+    @staticmethod
+    def _get_logger(logs_dir):
+        logger = logging.getLogger("legacy_app_logger")
+        if not logger.hasHandlers():
+            today = time.strftime('%Y-%m-%d')
+            handler = logging.FileHandler(os.path.join(logs_dir, f"{today}.log"))
+            handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S'))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+        return logger
+
+    @staticmethod
+    def INFO(msg, logs_dir):
+        logger = LegacyLog._get_logger(logs_dir)
+        frame = inspect.stack()[1]
+        logger.info(f"{os.path.basename(frame.filename)}: {frame.function}: {msg}")
+
+
+def time_calls(log_call, calls: int):
+    # Called from a few frames deep, like a route handler
+    def handler(depth):
+        if depth:
+            return handler(depth - 1)
+        started_at = time.perf_counter()
+        for i in range(calls):
+            log_call(f"request {i} served")
+        return time.perf_counter() - started_at
+
+    return handler(10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the per-call cost of Log.INFO.")
+    parser.add_argument("--calls", type=int, default=20000, help="Number of log calls per implementation")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as logs_dir:
+        legacy = time_calls(lambda msg: LegacyLog.INFO(msg, logs_dir), args.calls)
+
+        cwd = os.getcwd()
+        os.chdir(logs_dir)
+        try:
+            Log.shutdown()
+            current = time_calls(Log.INFO, args.calls)
+            Log.shutdown()
+        finally:
+            os.chdir(cwd)
+
+    for name, seconds in (("legacy (inspect.stack)", legacy), ("Log (stacklevel + queue)", current)):
+        print(f"{name:>26}: {seconds / args.calls * 1e6:8.1f} us/call")
+    print(f"{'speedup':>26}: {legacy / current:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
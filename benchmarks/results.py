@@ -0,0 +1,94 @@
+"""
+Machine-readable benchmark results.
+
+Every benchmark writes a JSON document with the environment it ran in and one entry per
+scenario. Two documents can be compared to catch regressions between releases:
+
+    python -m benchmarks.endpoints --output current.json --baseline previous.json
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+# Metrics compared against a baseline, and whether a higher value is better
+TRACKED_METRICS = {
+    "requests_per_second": True,
+    "rows_per_second": True,
+    "latency_ms.p50": False,
+    "latency_ms.p95": False,
+    "latency_ms.p99": False,
+    "cpu_us_per_row": False,
+    "peak_bytes_per_row": False,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def write_results(path: str, benchmark: str, config: dict, results: dict):
+    document = {"benchmark": benchmark, "environment": environment(), "config": config, "results": results}
+    with open(path, "w") as file:
+        json.dump(document, file, indent=2)
+    return document
+
+
+def load_results(path: str):
+    with open(path) as file:
+        return json.load(file)
+
+
+def _metric(result: dict, name: str):
+    value = result
+    for part in name.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float = 0.2):
+    """
+    Tracked metrics of the scenarios in both `results` and `baseline` that are more than
+    `tolerance` (a fraction) worse than the baseline.
+    """
+    regressions = []
+    for scenario, result in results.items():
+        if scenario not in baseline:
+            continue
+        for name, higher_is_better in TRACKED_METRICS.items():
+            current, previous = _metric(result, name), _metric(baseline[scenario], name)
+            if not current or not previous:
+                continue
+            change = (current - previous) / previous
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({"scenario": scenario, "metric": name, "baseline": previous,
+                                    "current": current, "change": round(change, 3)})
+    return regressions
+
+
+def report_regressions(results: dict, baseline_path: str, tolerance: float):
+    """Print the regressions against the baseline file and return whether there were any."""
+    regressions = find_regressions(results, load_results(baseline_path)["results"], tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression['scenario']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+    if not regressions:
+        print(f"No regression beyond {tolerance:.0%} against {baseline_path}")
+    return bool(regressions)
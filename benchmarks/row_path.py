@@ -0,0 +1,122 @@
+"""
+Client-side CPU and memory per row of the analytics reads, for the previous row path
+against the Core one.
+
+- orm: the statement runs through AsyncSession.execute, with the measures summed as
+  DECIMAL, and the campaign summary page is loaded as CampaignSummary entities.
+- core: the statements of src.analytics run on the session's connection with
+  src.database.rows, with the measures summed as DOUBLE PRECISION.
+
+CPU is the benchmark process' own time, so PostgreSQL's share of every query is left out.
+Run it against a benchmark database:
+
+    DB_NAME=campaign_bench python -m benchmarks.row_path --output row_path.json
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from sqlalchemy.sql.elements import Cast
+from sqlalchemy.sql.visitors import replacement_traverse
+from benchmarks.results import report_regressions, write_results
+from src.analytics.analytics import build_time_series_query
+from src.analytics.campaign_rollup import build_campaign_rollup_query
+from src.analytics.campaign_summary import MAX_PAGE_SIZE, build_campaign_summary_query
+from src.database.database import AsyncSessionLocal, dispose_engines, get_async_engine
+from src.database.rows import fetch_all
+from src.models.models import CampaignSummary
+
+
+def decimal_statement(statement):
+    """`statement` without the DOUBLE PRECISION casts, as the measures were read before."""
+    return replacement_traverse(statement, {}, lambda element: element.clause if isinstance(element, Cast) else None)
+
+
+async def orm_rows(db, statement):
+    return (await db.execute(statement)).all()
+
+
+async def orm_entities(db, statement):
+    return (await db.execute(statement)).scalars().all()
+
+
+def scenarios():
+    """
+    The Core statement of every scenario, with the statement the previous path ran and how
+    it fetched it. The previous statements are built once, outside the timed runs.
+    """
+    time_series_by_campaign = build_time_series_query("day", group_by="campaign")
+    time_series_by_ad_group = build_time_series_query("month", group_by="ad_group")
+    campaigns = build_campaign_rollup_query()
+    summary_page = build_campaign_summary_query(limit=MAX_PAGE_SIZE)
+    return {
+        "time_series_by_campaign": (time_series_by_campaign, decimal_statement(time_series_by_campaign), orm_rows),
+        "time_series_by_ad_group": (time_series_by_ad_group, decimal_statement(time_series_by_ad_group), orm_rows),
+        "campaigns": (campaigns, decimal_statement(campaigns), orm_rows),
+        # The page was read as whole CampaignSummary entities
+        "campaign_summary_page": (summary_page, summary_page.with_only_columns(CampaignSummary), orm_entities),
+    }
+
+
+async def measure(fetch, statement, repeats: int):
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        # The first run connects and fills the compiled statement cache
+        await fetch(db, statement)
+        db.expunge_all()
+
+        started_at, cpu_started_at = time.perf_counter(), time.process_time()
+        rows = 0
+        for _ in range(repeats):
+            rows += len(await fetch(db, statement))
+            db.expunge_all()
+        cpu_seconds, seconds = time.process_time() - cpu_started_at, time.perf_counter() - started_at
+
+        tracemalloc.start()
+        try:
+            result = await fetch(db, statement)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    per_query = rows / repeats
+    return {
+        "rows": int(per_query),
+        "ms_per_query": round(seconds / repeats * 1000, 2),
+        "cpu_us_per_row": round(cpu_seconds / rows * 1e6, 3) if rows else 0,
+        "peak_bytes_per_row": round(peak_bytes / len(result)) if result else 0,
+    }
+
+
+async def run_benchmark(repeats: int):
+    try:
+        results = {}
+        for name, (statement, previous_statement, previous_fetch) in scenarios().items():
+            results[f"{name}_orm"] = await measure(previous_fetch, previous_statement, repeats)
+            results[f"{name}_core"] = await measure(fetch_all, statement, repeats)
+        return results
+    finally:
+        await dispose_engines()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the ORM and Core row paths of the analytics reads.")
+    parser.add_argument("--repeats", type=int, default=10, help="Timed runs of every statement")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_benchmark(args.repeats))
+    for name, result in results.items():
+        print(f"{name:>32}: {result['rows']:>7,} rows, {result['ms_per_query']:8.2f} ms, "
+              f"{result['cpu_us_per_row']:6.2f} us CPU and {result['peak_bytes_per_row']:,} bytes per row")
+
+    config = {"repeats": args.repeats}
+    if args.output:
+        write_results(args.output, "row_path", config, results)
+    if args.baseline and report_regressions(results, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
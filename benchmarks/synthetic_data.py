@@ -0,0 +1,208 @@
+"""
+Synthetic campaign, ad group and stats data at a configurable scale, loaded with the
+ingestion COPY path so that its throughput is measured too.
+
+Point DB_NAME at a dedicated database, the script refuses to add rows to a database that
+already has stats unless --force is given:
+
+    DB_NAME=campaign_bench python -m benchmarks.synthetic_data --scale medium --output ingestion.json
+
+The `large` scale is 1,000 campaigns and about 100M stats rows.
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2 import sql
+from benchmarks.results import report_regressions, write_results
+from src.cache.response_cache import bump_data_version
+from src.database.db_conn import create_connection
+from src.database.migrations import apply_migrations
+from src.ingestion.loader import load_table
+from src.ingestion.rollups import refresh_campaign_summary, refresh_rollups, refresh_stats_sample
+
+SCALES = {
+    # campaigns, ad groups per campaign, days; every ad group has one row per device and day
+    "small": (10, 5, 365),
+    "medium": (100, 10, 365),
+    "large": (1000, 25, 1334),
+}
+
+DEVICES = ("MOBILE", "DESKTOP", "TABLET")
+DEVICE_TRAFFIC = (0.6, 0.3, 0.1)
+CAMPAIGN_TYPES = ("Search", "Display", "Shopping", "Video")
+
+# Well above the ids of the real campaigns and ad groups
+CAMPAIGN_ID_BASE = 90_000_000_000
+AD_GROUP_ID_BASE = 900_000_000_000
+
+
+def campaign_frame(campaigns: int):
+    ids = np.arange(campaigns)
+    return pd.DataFrame({
+        "campaign_id": CAMPAIGN_ID_BASE + ids,
+        "campaign_name": [f"Synthetic campaign {i}" for i in ids],
+        "campaign_type": [CAMPAIGN_TYPES[i % len(CAMPAIGN_TYPES)] for i in ids],
+    })
+
+
+def ad_group_frame(campaigns: int, ad_groups_per_campaign: int):
+    ids = np.arange(campaigns * ad_groups_per_campaign)
+    return pd.DataFrame({
+        "ad_group_id": AD_GROUP_ID_BASE + ids,
+        "ad_group_name": [f"Synthetic ad group {i}" for i in ids],
+        "campaign_id": CAMPAIGN_ID_BASE + ids // ad_groups_per_campaign,
+    })
+
+
+def iter_stats_chunks(ad_group_ids, start_date: date, days: int, chunk_size: int = 500_000, seed: int = 42):
+    """
+    Yield stats frames covering whole days, about `chunk_size` rows each. The same seed
+    always produces the same rows.
+    """
+    rng = np.random.default_rng(seed)
+    ad_group_ids = np.asarray(ad_group_ids)
+    rows_per_day = len(ad_group_ids) * len(DEVICES)
+    days_per_chunk = max(1, chunk_size // rows_per_day)
+
+    for offset in range(0, days, days_per_chunk):
+        chunk_days = min(days_per_chunk, days - offset)
+        size = chunk_days * rows_per_day
+        day_offsets = np.repeat(np.arange(offset, offset + chunk_days), rows_per_day)
+
+        device_traffic = np.tile(np.repeat(DEVICE_TRAFFIC, len(ad_group_ids)), chunk_days)
+        impressions = (rng.lognormal(5, 1, size) * device_traffic).round()
+        clicks = rng.binomial(impressions.astype(np.int64), rng.beta(2, 60, size))
+        conversions = rng.binomial(clicks, rng.beta(2, 20, size)).astype(float)
+        cost = (clicks * rng.lognormal(0, 0.5, size)).round(2)
+
+        yield pd.DataFrame({
+            "date": pd.to_datetime(start_date) + pd.to_timedelta(day_offsets, unit="D"),
+            "ad_group_id": np.tile(np.tile(ad_group_ids, len(DEVICES)), chunk_days),
+            "device": np.tile(np.repeat(DEVICES, len(ad_group_ids)), chunk_days),
+            "impressions": impressions,
+            "clicks": clicks,
+            "conversions": conversions,
+            "cost": cost,
+        })
+
+
+def ensure_database():
+    """Create the DB_NAME database if it does not exist yet."""
+    connection = psycopg2.connect(dbname="postgres", user=os.getenv("DB_USER"), password=os.getenv("DB_PASSWORD"),
+                                  host=os.getenv("DB_HOST"), port=os.getenv("DB_PORT"))
+    connection.autocommit = True
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (os.getenv("DB_NAME"),))
+        if cursor.fetchone() is None:
+            cursor.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(os.getenv("DB_NAME"))))
+    finally:
+        connection.close()
+
+
+def generate(campaigns: int, ad_groups_per_campaign: int, days: int, start_date: date,
+             chunk_size: int = 500_000, batch_days: int = 31, seed: int = 42, force: bool = False):
+    """
+    Load the synthetic data into DB_NAME and return the ingestion throughput per table.
+
+    Stats are merged and committed every `batch_days` days, so the staging table and the
+    transaction stay bounded at large scales.
+    """
+    ensure_database()
+    connection = create_connection()
+    if connection is None:
+        raise RuntimeError("Could not connect to PostgreSQL")
+
+    try:
+        cursor = connection.cursor()
+        apply_migrations(cursor)
+        cursor.execute("SELECT EXISTS (SELECT 1 FROM ad_group_stats)")
+        if cursor.fetchone()[0] and not force:
+            raise RuntimeError(f"{os.getenv('DB_NAME')} already has stats, use a new database or --force")
+
+        results = {
+            "campaign": load_table(cursor, "campaign", [campaign_frame(campaigns)]),
+            "ad_group": load_table(cursor, "ad_group", [ad_group_frame(campaigns, ad_groups_per_campaign)]),
+        }
+        connection.commit()
+
+        ad_group_ids = ad_group_frame(campaigns, ad_groups_per_campaign)["ad_group_id"].to_numpy()
+        rows, started_at = 0, time.perf_counter()
+        for offset in range(0, days, batch_days):
+            batch_start = start_date + timedelta(days=offset)
+            chunks = iter_stats_chunks(ad_group_ids, batch_start, min(batch_days, days - offset), chunk_size,
+                                       seed + offset)
+            rows += load_table(cursor, "ad_group_stats", chunks)["rows_read"]
+            connection.commit()
+        seconds = time.perf_counter() - started_at
+        results["ad_group_stats"] = {"rows_read": rows, "seconds": round(seconds, 3),
+                                     "rows_per_second": round(rows / seconds if seconds > 0 else 0, 1)}
+
+        started_at = time.perf_counter()
+        refresh_rollups(cursor, start_date, start_date + timedelta(days=days - 1))
+        refresh_stats_sample(cursor, start_date, start_date + timedelta(days=days - 1))
+        refresh_campaign_summary(cursor)
+        bump_data_version(cursor)
+        connection.commit()
+        results["rollups"] = {"seconds": round(time.perf_counter() - started_at, 3)}
+
+        cursor.close()
+        return results
+
+    except Exception:
+        connection.rollback()
+        raise
+
+    finally:
+        connection.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load synthetic campaign data into DB_NAME and measure ingestion.")
+    parser.add_argument("--scale", choices=SCALES, default="small", help="Preset size of the data set")
+    parser.add_argument("--campaigns", type=int, help="Override the number of campaigns")
+    parser.add_argument("--ad-groups-per-campaign", type=int, help="Override the ad groups per campaign")
+    parser.add_argument("--days", type=int, help="Override the number of days of stats")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--chunk-size", type=int, default=500_000, help="Rows per COPY chunk")
+    parser.add_argument("--batch-days", type=int, default=31, help="Days of stats merged per transaction")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Load even if the database already has stats")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    campaigns, ad_groups_per_campaign, days = SCALES[args.scale]
+    config = {
+        "scale": args.scale,
+        "campaigns": args.campaigns or campaigns,
+        "ad_groups_per_campaign": args.ad_groups_per_campaign or ad_groups_per_campaign,
+        "days": args.days or days,
+        "start_date": args.start_date.isoformat(),
+        "chunk_size": args.chunk_size,
+        "batch_days": args.batch_days,
+        "seed": args.seed,
+    }
+    config["stats_rows"] = config["campaigns"] * config["ad_groups_per_campaign"] * config["days"] * len(DEVICES)
+    print(f"Generating {config['stats_rows']:,} stats rows into {os.getenv('DB_NAME')}")
+
+    results = generate(config["campaigns"], config["ad_groups_per_campaign"], config["days"], args.start_date,
+                       args.chunk_size, args.batch_days, args.seed, args.force)
+    for table, result in results.items():
+        if "rows_per_second" in result:
+            print(f"{table:>16}: {result['rows_read']:,} rows in {result['seconds']}s ({result['rows_per_second']:,.0f} rows/s)")
+    print(f"{'rollups':>16}: {results['rollups']['seconds']}s")
+
+    if args.output:
+        write_results(args.output, "ingestion", config, results)
+    if args.baseline and report_regressions(results, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
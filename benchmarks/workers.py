@@ -0,0 +1,89 @@
+"""
+Throughput of the API served by `python -m src.server` with an increasing number of
+worker processes, to check that it scales across cores:
+
+    DB_NAME=campaign_bench CACHE_BACKEND=none python -m benchmarks.workers --workers 1 2 4 --output workers.json
+
+Each run starts its own server, so nothing else should listen on --port. A worker count
+above the number of cores cannot scale further.
+"""
+import argparse
+import asyncio
+import signal
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.load_test import run_load_test
+from benchmarks.results import report_regressions, write_results
+
+DEFAULT_PATH = "/performance-time-series?aggregate_by=week&start_date=2024-01-01&end_date=2024-12-31"
+
+
+def wait_until_ready(base_url: str, process, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/metrics", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+def run_with_workers(workers: int, port: int, path: str, clients: int, requests: int, warmup: int):
+    """Start the server with `workers` workers, load test `path` and stop it gracefully."""
+    base_url = f"http://127.0.0.1:{port}"
+    process = subprocess.Popen([sys.executable, "-m", "src.server", "--host", "127.0.0.1", "--port", str(port),
+                                "--workers", str(workers)])
+    try:
+        wait_until_ready(base_url, process)
+        # One warm-up client per worker, the kernel spreads their connections over the workers
+        asyncio.run(run_load_test(base_url, workers, warmup * workers, [path]))
+        return asyncio.run(run_load_test(base_url, clients, requests, [path]))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure how the API throughput scales with worker processes.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to measure")
+    parser.add_argument("--port", type=int, default=8890, help="Port of the servers started by the benchmark")
+    parser.add_argument("--path", default=DEFAULT_PATH, help="Request sent by every client")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per worker count")
+    parser.add_argument("--warmup", type=int, default=10, help="Sequential requests per worker before measuring")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Results file of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for workers in args.workers:
+        result = run_with_workers(workers, args.port, args.path, args.clients, args.requests, args.warmup)
+        results[f"workers_{workers}"] = dict(result, workers=workers)
+
+    single = results[f"workers_{args.workers[0]}"]
+    for result in results.values():
+        # Throughput relative to the first worker count, per added worker
+        speedup = result["requests_per_second"] / single["requests_per_second"]
+        result["speedup"] = round(speedup, 2)
+        result["scaling_efficiency"] = round(speedup * single["workers"] / result["workers"], 2)
+        latency = result["latency_ms"]
+        print(f"{result['workers']:>3} workers: {result['requests_per_second']:8.1f} req/s (x{result['speedup']}), "
+              f"p50 {latency['p50']} ms, p99 {latency['p99']} ms, {result['errors']} errors")
+
+    config = {"workers": args.workers, "path": args.path, "clients": args.clients, "requests": args.requests,
+              "warmup": args.warmup}
+    if args.output:
+        write_results(args.output, "workers", config, results)
+    if args.baseline and report_regressions(results, args.baseline, args.tolerance):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,51 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.database.database import Base, engine
-from src.routers import campaigns, performance
+from src.cache.warmup import warmup_scheduler
+from src.database.database import dispose_engines, get_engine, get_async_engine
+from src.monitoring.instrumentation import TimingMiddleware, instrument_engine
+from src.routers import campaigns, performance, batch, internal, monitoring
 from src.utils.log import Log
 
-# Initialize the Logger
-Log.INFO("Starting the FastAPI app...")
+# Importing this module has no side effects on the database. The schema is managed by
+# `python -m src.database.migrations`, DB_MIGRATE_ON_STARTUP=true applies it at startup instead.
+MIGRATE_ON_STARTUP = os.getenv("DB_MIGRATE_ON_STARTUP", "false").lower() in ("1", "true", "yes")
 
-# Create tables if they do not exist yet
-Base.metadata.create_all(bind=engine)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    Log.INFO("Starting the FastAPI app...")
+    if MIGRATE_ON_STARTUP:
+        from src.database.migrations import run_migrations
+
+        # Concurrent workers are serialized by the migrations' advisory lock
+        await asyncio.to_thread(run_migrations)
+
+    # Per-route SQL statement metrics, exposed on /metrics
+    instrument_engine(get_engine())
+    instrument_engine(get_async_engine())
+
+    # Precomputes the hot dashboard queries in the background after every load
+    warmup_scheduler.start()
+    yield
+
+    await warmup_scheduler.stop()
+    await dispose_engines()
+    Log.INFO("FastAPI app stopped.")
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Per-route latency metrics and Server-Timing headers
+app.add_middleware(TimingMiddleware)
 
 # Include routers
 app.include_router(campaigns.router)
 app.include_router(performance.router)
+app.include_router(batch.router)
+app.include_router(internal.router)
+app.include_router(monitoring.router)
 
 if __name__ == "__main__":
     import uvicorn
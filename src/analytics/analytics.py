@@ -1,46 +1,357 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import datetime
-from src.models.models import AdGroupStats
+import calendar
+import math
+from collections import defaultdict
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, desc
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, List, Tuple
+from src.analytics.columnar import columnar_engine
+from src.analytics.export import columns_to_records, time_series_columns
+from src.analytics.metrics import derive_metrics
+from src.analytics.periods import fetch_session_time_zone, period_date, period_start
+from src.analytics.sources import stats_source
+from src.database.rows import as_float, fetch_all, fetch_one
+from src.models.models import AdGroup, Campaign
 from src.utils.log import Log  # Import the Log class for logging
 
 
-def get_performance_data(db: Session, start_date: datetime, end_date: datetime):
-    try:
-        query = db.query(
-            func.sum(AdGroupStats.cost).label("total_cost"),
-            func.sum(AdGroupStats.clicks).label("total_clicks"),
-            func.sum(AdGroupStats.conversions).label("total_conversions"),
-            func.sum(AdGroupStats.impressions).label("total_impressions")
-        ).filter(
-            AdGroupStats.date >= start_date,
-            AdGroupStats.date <= end_date
+def build_performance_query(start_date: datetime, end_date: datetime, device: Optional[str] = None):
+    # Device-level filters need the raw rows, everything else reads the daily rollups
+    source = stats_source("device") if device else stats_source()
+    query = select(
+        as_float(func.sum(source.cost)).label("total_cost"),
+        func.sum(source.clicks).label("total_clicks"),
+        as_float(func.sum(source.conversions)).label("total_conversions"),
+        as_float(func.sum(source.impressions)).label("total_impressions")
+    ).where(
+        source.date >= start_date,
+        source.date <= end_date
+    )
+    if device:
+        query = query.where(source.device == device)
+    return query
+
+
+# Output columns of each group_by dimension and their Arrow types, they follow `period` in every row
+GROUP_BY_FIELDS = {
+    "campaign": [("campaign_id", "int64"), ("campaign_name", "string")],
+    "ad_group": [("ad_group_id", "int64"), ("ad_group_name", "string")],
+    "device": [("device", "string")],
+    "campaign_type": [("campaign_type", "string")],
+}
+
+# Totals the top-N series can be ranked by
+TOP_BY_TOTALS = ("cost", "clicks", "conversions", "impressions")
+
+
+def time_series_columns_needed(campaigns: Optional[List[int]] = None, device: Optional[str] = None,
+                               group_by: Optional[str] = None, ad_groups: Optional[List[int]] = None):
+    """Dimension columns besides `date` that a time series query filters or groups on."""
+    columns = set()
+    if campaigns or group_by in ("campaign", "campaign_type"):
+        columns.add("campaign_id")
+    if ad_groups or group_by == "ad_group":
+        columns.add("ad_group_id")
+    if device or group_by == "device":
+        columns.add("device")
+    return columns
+
+
+def time_series_clauses(source, campaigns: Optional[List[int]] = None, start_date: Optional[datetime] = None,
+                        end_date: Optional[datetime] = None, device: Optional[str] = None,
+                        group_by: Optional[str] = None, ad_groups: Optional[List[int]] = None):
+    """
+    FROM clause, labelled dimension columns and filters of a time series query over `source`,
+    a stats table with `date` and the measures, and with the columns the query needs.
+    """
+    # Tables without campaign_id only know their ad group, campaigns are reached through AdGroup
+    from_clause = source.__table__
+    needs_campaign = bool(campaigns) or group_by in ("campaign", "campaign_type")
+    if group_by == "ad_group" or (needs_campaign and not hasattr(source, "campaign_id")):
+        from_clause = from_clause.join(AdGroup.__table__, AdGroup.ad_group_id == source.ad_group_id)
+    campaign_id = source.campaign_id if hasattr(source, "campaign_id") else AdGroup.campaign_id
+    if group_by in ("campaign", "campaign_type"):
+        from_clause = from_clause.join(Campaign.__table__, Campaign.campaign_id == campaign_id)
+
+    dimension_columns = []
+    if group_by == "campaign":
+        dimension_columns = [campaign_id.label("campaign_id"), Campaign.campaign_name.label("campaign_name")]
+    elif group_by == "ad_group":
+        dimension_columns = [source.ad_group_id.label("ad_group_id"), AdGroup.ad_group_name.label("ad_group_name")]
+    elif group_by == "device":
+        dimension_columns = [source.device.label("device")]
+    elif group_by == "campaign_type":
+        dimension_columns = [Campaign.campaign_type.label("campaign_type")]
+
+    filters = []
+    if campaigns:
+        filters.append(campaign_id.in_(campaigns))
+    if ad_groups:
+        filters.append(source.ad_group_id.in_(ad_groups))
+    if device:
+        filters.append(source.device == device)
+    if start_date:
+        filters.append(source.date >= start_date)
+    if end_date:
+        filters.append(source.date <= end_date)
+    return from_clause, dimension_columns, filters
+
+
+def build_time_series_query(aggregate_by: str, campaigns: Optional[List[int]] = None,
+                            start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                            device: Optional[str] = None, group_by: Optional[str] = None,
+                            ad_groups: Optional[List[int]] = None, top: Optional[int] = None,
+                            top_by: str = "cost"):
+    """
+    Totals per period, optionally broken down by a `group_by` dimension (see GROUP_BY_FIELDS).
+
+    `campaigns` filters on campaign ids and `ad_groups` on ad group ids. With `top`, only the
+    `top` dimension values with the highest `top_by` total over the whole range are returned,
+    ranked in the same statement.
+    """
+    # Read the smallest daily rollup that has every column the query filters or groups on,
+    # device-level queries fall back to the raw ad_group_stats rows
+    source = stats_source(*time_series_columns_needed(campaigns, device, group_by, ad_groups))
+    from_clause, dimension_columns, filters = time_series_clauses(source, campaigns, start_date, end_date, device,
+                                                                  group_by, ad_groups)
+
+    if top and dimension_columns:
+        # Rank the dimension values over the same rows and keep the first `top` of them
+        key = dimension_columns[0].element
+        ranked = (
+            select(key)
+            .select_from(from_clause)
+            .where(*filters)
+            .group_by(key)
+            .order_by(desc(func.sum(getattr(source, top_by))), key)
+            .limit(top)
         )
-        result = query.one()
+        filters.append(key.in_(ranked.scalar_subquery()))
+
+    period = func.date_trunc(aggregate_by, source.date)
+    query = select(
+        period.label('period'),
+        *dimension_columns,
+        as_float(func.sum(source.cost)).label('total_cost'),
+        func.sum(source.clicks).label('total_clicks'),
+        as_float(func.sum(source.conversions)).label('total_conversions'),
+        as_float(func.sum(source.impressions)).label('total_impressions')
+    ).select_from(from_clause).where(*filters)
+
+    # period is grouped by its label so asyncpg binds date_trunc's argument once,
+    # the dimensions by their columns because their names can be ambiguous across the joins
+    dimensions = [column.element for column in dimension_columns]
+    return query.group_by('period', *dimensions).order_by(desc('period'), *dimensions)
+
+
+async def fetch_time_series_rows(db: AsyncSession, aggregate_by: str, campaigns: Optional[List[int]] = None,
+                                 start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                 device: Optional[str] = None, group_by: Optional[str] = None,
+                                 ad_groups: Optional[List[int]] = None, top: Optional[int] = None,
+                                 top_by: str = "cost"):
+    """
+    Rows of build_time_series_query, from the in-memory engine when it is enabled and has no
+    group_by. That engine labels the periods in the session's time zone, so it is only used
+    when Python knows the zone.
+    """
+    if columnar_engine.enabled and group_by is None:
+        zone = await fetch_session_time_zone(db)
+        if zone is not None:
+            snapshot = await columnar_engine.get_snapshot(db)
+            return snapshot.time_series_rows(aggregate_by, campaigns, start_date, end_date, device, ad_groups, zone)
+
+    query = build_time_series_query(aggregate_by, campaigns, start_date, end_date, device,
+                                    group_by=group_by, ad_groups=ad_groups, top=top, top_by=top_by)
+    return await fetch_all(db, query)
+
+
+async def get_time_series_data(db: AsyncSession, aggregate_by: str, campaigns: Optional[List[int]] = None,
+                               start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                               device: Optional[str] = None, group_by: Optional[str] = None,
+                               ad_groups: Optional[List[int]] = None, top: Optional[int] = None,
+                               top_by: str = "cost"):
+    rows = await fetch_time_series_rows(db, aggregate_by, campaigns, start_date, end_date, device,
+                                        group_by=group_by, ad_groups=ad_groups, top=top, top_by=top_by)
+    dimensions = [name for name, _ in GROUP_BY_FIELDS.get(group_by, [])]
+    # KPIs are derived for the whole column at once instead of row by row
+    return columns_to_records(time_series_columns(rows, dimensions))
+
+
+def truncate_period(day: date, aggregate_by: str) -> date:
+    """First day of the date_trunc period of `day`: weeks start on Monday, months on the 1st."""
+    if aggregate_by == "week":
+        return day - timedelta(days=day.weekday())
+    if aggregate_by == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _sum_totals(values):
+    # Like SUM, NULL totals are skipped. Float totals are summed exactly with fsum, so the
+    # result does not depend on the order of the daily rows
+    values = [value for value in values if value is not None]
+    if not values:
+        return None
+    if all(isinstance(value, int) for value in values):
+        return sum(values)
+    return math.fsum(values)
+
+
+def rollup_time_series(rows, aggregate_by: str, dimension_count: int = 0, zone=timezone.utc):
+    """
+    Re-aggregate the rows of a daily time series query to `aggregate_by` periods, so one
+    scan can serve several granularities. Rows are ordered like build_time_series_query.
 
-        total_clicks = result.total_clicks or 0
-        total_conversions = result.total_conversions or 0
-        total_impressions = result.total_impressions or 0
-        total_cost = result.total_cost or 0
+    date_trunc labels the periods with their midnight in the session's time zone, so the
+    days are bucketed and labelled again in `zone`, see fetch_session_time_zone. Float
+    totals can differ from a direct query in the last digit.
+    """
+    if aggregate_by == "day":
+        return list(rows)
 
-        avg_cost_per_click = round(total_cost / total_clicks if total_clicks else 0, 2)
-        avg_cost_per_conversion = round(total_cost / total_conversions if total_conversions else 0, 2)
-        avg_ctr = round((total_clicks / total_impressions if total_impressions else 0) * 100, 2)
-        avg_conversion_rate = round(total_conversions / total_clicks if total_clicks else 0, 2)
-        cost_per_mille = round((total_cost / total_impressions * 1000) if total_impressions else 0, 2)
+    totals = defaultdict(list)
+    for period, *values in rows:
+        day = truncate_period(period_date(period, zone), aggregate_by)
+        totals[(day, *values[:dimension_count])].append(values[dimension_count:])
 
-        return {
+    # Dimensions ascending with NULLs last, then periods descending
+    keys = sorted(totals, key=lambda key: [(value is None, value) for value in key[1:]])
+    keys.sort(key=lambda key: key[0], reverse=True)
+    return [(period_start(key[0], zone), *key[1:], *map(_sum_totals, zip(*totals[key]))) for key in keys]
+
+
+def build_period_comparison_query(periods: List[Tuple[datetime, datetime]], device: Optional[str] = None):
+    """
+    Aggregate several date ranges in one statement. Each period gets its own
+    `p<i>_total_*` columns computed with SUM(...) FILTER (WHERE date BETWEEN ...),
+    and the table is only scanned once over the span covering all of them.
+    """
+    source = stats_source("device") if device else stats_source()
+    columns = []
+    for index, (start_date, end_date) in enumerate(periods):
+        in_period = source.date.between(start_date, end_date)
+        columns += [
+            as_float(func.sum(source.cost).filter(in_period)).label(f"p{index}_total_cost"),
+            func.sum(source.clicks).filter(in_period).label(f"p{index}_total_clicks"),
+            as_float(func.sum(source.conversions).filter(in_period)).label(f"p{index}_total_conversions"),
+            as_float(func.sum(source.impressions).filter(in_period)).label(f"p{index}_total_impressions"),
+        ]
+
+    query = select(*columns).where(
+        source.date >= min(start_date for start_date, _ in periods),
+        source.date <= max(end_date for _, end_date in periods)
+    )
+    if device:
+        query = query.where(source.device == device)
+    return query
+
+
+def shift_months(day: datetime, months: int) -> datetime:
+    """Move `day` by a number of months, clamping the day to the length of the target month."""
+    month_index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def comparison_period(start_date: datetime, end_date: datetime, compare_mode: str, steps: int = 1):
+    """
+    Date range `steps` periods before (start_date, end_date).
+
+    `preceding` moves back by the length of the range. `previous_month` moves both
+    dates back by whole months, and a range ending on the last day of a month keeps
+    ending on the last day of the shifted month.
+    """
+    if compare_mode == 'preceding':
+        period_days = (end_date - start_date).days + 1
+        return start_date - timedelta(days=period_days * steps), end_date - timedelta(days=period_days * steps)
+
+    shifted_end = shift_months(end_date, -steps)
+    if end_date.day == calendar.monthrange(end_date.year, end_date.month)[1]:
+        shifted_end = shifted_end.replace(day=calendar.monthrange(shifted_end.year, shifted_end.month)[1])
+    return shift_months(start_date, -steps), shifted_end
+
+
+def comparison_windows(start_date: datetime, end_date: datetime, compare_mode: str, periods: int = 1):
+    """The given range followed by `periods` earlier ranges."""
+    return [(start_date, end_date)] + [
+        comparison_period(start_date, end_date, compare_mode, steps) for steps in range(1, periods + 1)
+    ]
+
+
+def compare_consecutive(period_data):
+    """Compare every period's metrics with the period that follows it in `period_data`."""
+    return [
+        {
+            "current_period": current_data,
+            "before_period": before_data,
+            "comparison": calculate_percentage_change(current_data, before_data)
+        }
+        for current_data, before_data in zip(period_data, period_data[1:])
+    ]
+
+
+def period_metrics(periods: List[Tuple[datetime, datetime]], total_cost, total_clicks,
+                   total_conversions, total_impressions):
+    """Metrics dict of every period, from sequences of per-period totals."""
+    total_cost, total_clicks, total_conversions = (
+        [value or 0 for value in totals] for totals in (total_cost, total_clicks, total_conversions)
+    )
+    metrics = derive_metrics(total_cost, total_clicks, total_conversions, total_impressions)
+    columns = zip(
+        periods, total_cost, total_clicks, total_conversions,
+        metrics["cost_per_click"].tolist(), metrics["cost_per_conversion"].tolist(),
+        metrics["cost_per_mille_impression"].tolist(), metrics["click_through_rate"].tolist(),
+        metrics["conversion_rate"].tolist(),
+    )
+
+    return [
+        {
             "start_date": start_date.strftime("%Y-%m-%d"),
             "end_date": end_date.strftime("%Y-%m-%d"),
-            "cost_per_click": avg_cost_per_click,
-            "cost_per_conversion": avg_cost_per_conversion,
+            "cost_per_click": cost_per_click,
+            "cost_per_conversion": cost_per_conversion,
             "cost_per_mille_impression": cost_per_mille,
-            "conversion_rate": avg_conversion_rate * 100,
-            "click_through_rate": avg_ctr,
-            "total_conversions": total_conversions,
-            "total_cost": total_cost,
-            "total_clicks": total_clicks
+            "conversion_rate": conversion_rate,
+            "click_through_rate": click_through_rate,
+            "total_conversions": conversions,
+            "total_cost": cost,
+            "total_clicks": clicks
         }
+        for (start_date, end_date), cost, clicks, conversions,
+            cost_per_click, cost_per_conversion, cost_per_mille, click_through_rate, conversion_rate in columns
+    ]
+
+
+def performance_metrics(start_date: datetime, end_date: datetime, total_cost, total_clicks,
+                        total_conversions, total_impressions):
+    return period_metrics([(start_date, end_date)], [total_cost], [total_clicks],
+                          [total_conversions], [total_impressions])[0]
+
+
+async def get_periods_performance_data(db: AsyncSession, periods: List[Tuple[datetime, datetime]],
+                                       device: Optional[str] = None):
+    """Performance metrics of every (start_date, end_date) period, fetched in a single query."""
+    if columnar_engine.enabled:
+        snapshot = await columnar_engine.get_snapshot(db)
+        return period_metrics(periods, *snapshot.period_totals(periods, device))
+
+    result = (await fetch_one(db, build_period_comparison_query(periods, device)))._mapping
+    return period_metrics(
+        periods,
+        *([result[f"p{index}_{total}"] for index in range(len(periods))]
+          for total in ("total_cost", "total_clicks", "total_conversions", "total_impressions"))
+    )
+
+
+async def get_performance_data(db: AsyncSession, start_date: datetime, end_date: datetime, device: Optional[str] = None):
+    try:
+        if columnar_engine.enabled:
+            return (await get_periods_performance_data(db, [(start_date, end_date)], device))[0]
+
+        result = await fetch_one(db, build_performance_query(start_date, end_date, device))
+        return performance_metrics(start_date, end_date, result.total_cost, result.total_clicks,
+                                   result.total_conversions, result.total_impressions)
 
     except Exception as e:
         Log.ERROR(f"Error in get_performance_data: {str(e)}")
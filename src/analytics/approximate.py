@@ -0,0 +1,171 @@
+from datetime import datetime
+from typing import List, Optional
+import numpy as np
+from sqlalchemy import Float, and_, cast, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.analytics import (
+    GROUP_BY_FIELDS, get_time_series_data, time_series_clauses, time_series_columns_needed
+)
+from src.analytics.metrics import derive_metrics, safe_divide
+from src.analytics.sources import stats_source
+from src.database.rows import fetch_all
+from src.models.models import AdGroupStats, AdGroupStatsSample, AdGroupStatsStratum
+from src.utils.log import Log  # Import the Log class for logging
+
+# precision=approx responses give 95% confidence intervals, from the normal approximation
+CONFIDENCE_LEVEL = 0.95
+Z_SCORE = 1.96
+
+MEASURES = ("cost", "clicks", "conversions", "impressions")
+
+# Each KPI is scale * numerator / denominator, its variance needs their covariance
+RATIO_KPIS = {
+    "avg_cost_per_click": ("cost", "clicks", 1),
+    "avg_cost_per_conversion": ("cost", "conversions", 1),
+    "avg_click_through_rate": ("clicks", "impressions", 100),
+    "avg_conversion_rate": ("conversions", "clicks", 100),
+}
+
+# Sums of products read per stratum: the squares of the measures and the KPI pairs
+PRODUCTS = [(measure, measure) for measure in MEASURES] + [(num, den) for num, den, _ in RATIO_KPIS.values()]
+
+
+def build_sampled_time_series_query(aggregate_by: str, campaigns: Optional[List[int]] = None,
+                                    start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                    device: Optional[str] = None, group_by: Optional[str] = None,
+                                    ad_groups: Optional[List[int]] = None):
+    """
+    Sums and sums of products of the sampled measures per period, dimension value and
+    (date, device) stratum, with the population and sample sizes of the stratum.
+    Rows are ordered like build_time_series_query, so the rows of a period and
+    dimension value are contiguous.
+    """
+    sample, stratum = AdGroupStatsSample, AdGroupStatsStratum
+    from_clause, dimension_columns, filters = time_series_clauses(sample, campaigns, start_date, end_date, device,
+                                                                  group_by, ad_groups)
+    from_clause = from_clause.join(stratum.__table__,
+                                   and_(stratum.date == sample.date, stratum.device == sample.device))
+
+    values = {measure: cast(getattr(sample, measure), Float) for measure in MEASURES}
+    period = func.date_trunc(aggregate_by, sample.date)
+    query = select(
+        period.label("period"),
+        *dimension_columns,
+        stratum.population_rows,
+        stratum.sample_rows,
+        *(func.sum(values[measure]).label(f"sum_{measure}") for measure in MEASURES),
+        *(func.sum(values[a] * values[b]).label(f"sum_{a}_{b}") for a, b in PRODUCTS),
+    ).select_from(from_clause).where(*filters)
+
+    dimensions = [column.element for column in dimension_columns]
+    return (
+        query.group_by("period", *dimensions, sample.date, sample.device, stratum.population_rows,
+                       stratum.sample_rows)
+        .order_by(desc("period"), *dimensions)
+    )
+
+
+def _interval(estimate, variance):
+    half_width = Z_SCORE * np.sqrt(np.maximum(variance, 0))
+    return np.round(np.maximum(estimate - half_width, 0), 2), np.round(estimate + half_width, 2)
+
+
+def estimate_time_series(rows, dimensions=()):
+    """
+    Estimate the totals and KPIs of each period and dimension value from the rows of
+    build_sampled_time_series_query, with their confidence intervals.
+
+    Totals use the stratified expansion estimator: the sampled sum of each stratum is
+    scaled by population_rows / sample_rows. Its variance is the sum over the strata of
+    N² (1 - n/N) s² / n. KPIs are ratios of two estimated totals, their variance is
+    linearized (delta method) with the covariance of the two totals.
+    """
+    if not rows:
+        return []
+    rows = list(rows)
+    keys = [tuple(row[:1 + len(dimensions)]) for row in rows]
+    starts = [0] + [i for i in range(1, len(keys)) if keys[i] != keys[i - 1]]
+
+    columns = np.array([row[1 + len(dimensions):] for row in rows], dtype=float)
+    population, sampled = columns[:, 0], columns[:, 1]
+    sums = dict(zip(MEASURES, columns[:, 2:2 + len(MEASURES)].T))
+    products = dict(zip(PRODUCTS, columns[:, 2 + len(MEASURES):].T))
+
+    # Per stratum: the expansion weight N/n and the variance factor N² (1 - n/N) / (n (n - 1)),
+    # 0 for strata kept whole
+    weight = population / sampled
+    factor = safe_divide(population ** 2 * (1 - sampled / population), sampled * (sampled - 1))
+
+    def group_sum(values):
+        return np.add.reduceat(values, starts)
+
+    totals = {measure: group_sum(weight * sums[measure]) for measure in MEASURES}
+
+    def covariance(a, b):
+        product = products[(a, b)] if (a, b) in products else products[(b, a)]
+        return group_sum(factor * (product - sums[a] * sums[b] / sampled))
+
+    intervals = {f"total_{measure}": _interval(totals[measure], covariance(measure, measure)) for measure in MEASURES}
+    for kpi, (numerator, denominator, scale) in RATIO_KPIS.items():
+        ratio = safe_divide(totals[numerator], totals[denominator])
+        variance = safe_divide(
+            covariance(numerator, numerator) + ratio ** 2 * covariance(denominator, denominator)
+            - 2 * ratio * covariance(numerator, denominator),
+            totals[denominator] ** 2,
+        )
+        intervals[kpi] = _interval(scale * ratio, scale ** 2 * variance)
+
+    metrics = derive_metrics(totals["cost"], totals["clicks"], totals["conversions"], totals["impressions"])
+    estimates = {
+        "total_cost": np.round(totals["cost"], 2),
+        "total_clicks": np.round(totals["clicks"], 2),
+        "total_conversions": np.round(totals["conversions"], 2),
+        "avg_cost_per_click": metrics["cost_per_click"],
+        "avg_cost_per_conversion": metrics["cost_per_conversion"],
+        "avg_click_through_rate": metrics["click_through_rate"],
+        "avg_conversion_rate": metrics["conversion_rate"],
+    }
+
+    records = []
+    for position, start in enumerate(starts):
+        record = {"period": keys[start][0], **dict(zip(dimensions, keys[start][1:]))}
+        record.update((name, values[position].item()) for name, values in estimates.items())
+        record["confidence_intervals"] = {
+            name: [intervals[name][0][position].item(), intervals[name][1][position].item()] for name in estimates
+        }
+        records.append(record)
+    return records
+
+
+def exact_intervals(records):
+    """Zero-width intervals for records computed from every row."""
+    names = ("total_cost", "total_clicks", "total_conversions", *RATIO_KPIS)
+    for record in records:
+        record["confidence_intervals"] = {name: [record[name], record[name]] for name in names}
+    return records
+
+
+async def get_approximate_time_series_data(db: AsyncSession, aggregate_by: str, campaigns: Optional[List[int]] = None,
+                                           start_date: Optional[datetime] = None,
+                                           end_date: Optional[datetime] = None, device: Optional[str] = None,
+                                           group_by: Optional[str] = None, ad_groups: Optional[List[int]] = None):
+    """
+    Time series for precision=approx. Queries that a daily rollup answers are already
+    cheap, they are computed exactly. The others, which would scan ad_group_stats, are
+    estimated from the stratified sample.
+    """
+    try:
+        if stats_source(*time_series_columns_needed(campaigns, device, group_by, ad_groups)) is not AdGroupStats:
+            data = await get_time_series_data(db, aggregate_by, campaigns, start_date, end_date, device,
+                                              group_by=group_by, ad_groups=ad_groups)
+            return {"precision": "exact", "confidence_level": CONFIDENCE_LEVEL, "data": exact_intervals(data)}
+
+        query = build_sampled_time_series_query(aggregate_by, campaigns, start_date, end_date, device,
+                                                group_by, ad_groups)
+        rows = await fetch_all(db, query)
+        data = estimate_time_series(rows, [name for name, _ in GROUP_BY_FIELDS.get(group_by, [])])
+        return {"precision": "approx", "confidence_level": CONFIDENCE_LEVEL, "data": data}
+
+    except Exception as e:
+        Log.ERROR(f"Error in get_approximate_time_series_data: {str(e)}")
+        raise
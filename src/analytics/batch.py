@@ -0,0 +1,135 @@
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.analytics import (
+    GROUP_BY_FIELDS, compare_consecutive, comparison_windows, fetch_time_series_rows, get_periods_performance_data,
+    rollup_time_series
+)
+from src.analytics.export import columns_to_records, time_series_columns
+from src.analytics.periods import fetch_session_time_zone
+from src.cache.response_cache import normalize_params, response_cache
+from src.utils.log import Log  # Import the Log class for logging
+
+
+def _parse_date(value: Optional[str]):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def spec_cache_key(spec):
+    """
+    Cache namespace and parameters of a query spec. They are the ones of the matching GET
+    endpoint, so batch and single requests share their cached responses.
+    """
+    if spec.type == "time_series":
+        return "performance-time-series", {
+            "aggregate_by": spec.aggregate_by, "campaigns": spec.campaigns,
+            "start_date": _parse_date(spec.start_date), "end_date": _parse_date(spec.end_date),
+            "device": spec.device, "group_by": spec.group_by, "ad_groups": spec.ad_groups,
+            "top": spec.top, "top_by": spec.top_by,
+        }
+
+    params = {"start_date": _parse_date(spec.start_date), "end_date": _parse_date(spec.end_date),
+              "compare_mode": spec.compare_mode, "device": spec.device}
+    if spec.type == "compare":
+        return "compare-performance", params
+    return "compare-performance-periods", dict(params, periods=spec.periods)
+
+
+async def _run_comparisons(db: AsyncSession, pending):
+    """
+    Comparison specs with the same device filter share one FILTER query over the union of
+    their date ranges, see build_period_comparison_query.
+    """
+    by_device = defaultdict(list)
+    for spec, params in pending:
+        periods = params.get("periods", 1)
+        windows = comparison_windows(params["start_date"], params["end_date"], params["compare_mode"], periods)
+        by_device[params["device"]].append((spec, windows))
+
+    results = {}
+    for device, specs in by_device.items():
+        # Each distinct date range is aggregated once
+        windows = list(dict.fromkeys(window for _, spec_windows in specs for window in spec_windows))
+        period_data = dict(zip(windows, await get_periods_performance_data(db, windows, device=device)))
+
+        for spec, spec_windows in specs:
+            comparisons = compare_consecutive([period_data[window] for window in spec_windows])
+            results[spec.id] = comparisons[0] if spec.type == "compare" else {"periods": comparisons}
+    return results
+
+
+async def _run_time_series(db: AsyncSession, pending):
+    """
+    Time series specs that only differ in `aggregate_by` share one daily query, which is
+    re-aggregated in Python to each requested granularity.
+    """
+    groups = defaultdict(list)
+    for spec, params in pending:
+        filters = {name: value for name, value in params.items() if name != "aggregate_by"}
+        groups[json.dumps(normalize_params(filters), sort_keys=True, default=str)].append((spec, params))
+
+    # The days are bucketed in the session's time zone, like date_trunc does. When Python does
+    # not know that zone, every granularity gets its own query instead
+    merged = any(len({spec.aggregate_by for spec, _ in specs}) > 1 for specs in groups.values())
+    zone = await fetch_session_time_zone(db) if merged else None
+
+    results = {}
+    for specs in groups.values():
+        params = specs[0][1]
+        aggregates = list(dict.fromkeys(spec.aggregate_by for spec, _ in specs))
+        dimensions = [name for name, _ in GROUP_BY_FIELDS.get(params["group_by"], [])]
+
+        async def fetch(aggregate_by):
+            return await fetch_time_series_rows(db, aggregate_by, params["campaigns"], params["start_date"],
+                                                params["end_date"], params["device"], group_by=params["group_by"],
+                                                ad_groups=params["ad_groups"], top=params["top"],
+                                                top_by=params["top_by"])
+
+        if len(aggregates) > 1 and zone is not None:
+            daily = await fetch("day")
+            rows = {aggregate: rollup_time_series(daily, aggregate, len(dimensions), zone) for aggregate in aggregates}
+        else:
+            rows = {aggregate: await fetch(aggregate) for aggregate in aggregates}
+
+        series = {aggregate: columns_to_records(time_series_columns(rows[aggregate], dimensions)) for aggregate in rows}
+        for spec, _ in specs:
+            results[spec.id] = series[spec.aggregate_by]
+    return results
+
+
+async def run_batch(db: AsyncSession, specs):
+    """
+    Run the query specs of a batch on one session and return their results keyed by spec id.
+
+    Cached results are reused, and the remaining specs are merged into as few scans as
+    possible before their results are cached in turn. Every statement runs on the batch's
+    single connection, so a page of widgets costs one pool checkout.
+    """
+    results = {}
+    pending = {"time_series": [], "comparison": []}
+    keys = {}
+    for spec in specs:
+        namespace, params = spec_cache_key(spec)
+        key, cached = await response_cache.lookup(namespace, params, db)
+        if cached is not None:
+            results[spec.id] = cached
+        else:
+            # Results are stored under the key of the lookup, see ResponseCache.lookup
+            keys[spec.id] = key
+            pending["time_series" if spec.type == "time_series" else "comparison"].append((spec, params))
+
+    computed = {
+        **(await _run_comparisons(db, pending["comparison"])),
+        **(await _run_time_series(db, pending["time_series"])),
+    }
+    for spec_id, result in computed.items():
+        results[spec_id] = await response_cache.store(keys[spec_id], result)
+
+    Log.INFO(f"Batch of {len(specs)} queries served, {len(specs) - len(computed)} from the cache.")
+    # Each result has the body the matching GET endpoint would return
+    return {
+        spec.id: {"data": results[spec.id]} if spec.type == "time_series" else results[spec.id]
+        for spec in specs
+    }
@@ -0,0 +1,100 @@
+from typing import List, Optional
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.rows import as_float, fetch_all
+from src.models.models import Campaign, AdGroup, AdGroupStats
+from src.utils.log import Log  # Import the Log class for logging
+
+
+def build_campaign_rollup_query(campaign_ids: Optional[List[int]] = None, limit: Optional[int] = None, offset: int = 0):
+    """
+    Build the single grouped statement behind GET /campaigns.
+
+    The requested slice of campaigns is selected first, then joined to its ad groups
+    and their stats so that only the page being served is aggregated.
+    """
+    page = select(Campaign.campaign_id, Campaign.campaign_name)
+    if campaign_ids:
+        page = page.where(Campaign.campaign_id.in_(campaign_ids))
+    page = page.order_by(Campaign.campaign_id).offset(offset)
+    if limit is not None:
+        page = page.limit(limit)
+    page = page.subquery("page")
+
+    return (
+        select(
+            page.c.campaign_id,
+            page.c.campaign_name,
+            AdGroup.ad_group_id,
+            AdGroup.ad_group_name,
+            as_float(func.avg(AdGroupStats.cost)).label("avg_cost"),
+            as_float(func.avg(AdGroupStats.conversions)).label("avg_conversions"),
+        )
+        .select_from(page)
+        .outerjoin(AdGroup, AdGroup.campaign_id == page.c.campaign_id)
+        .outerjoin(AdGroupStats, AdGroupStats.ad_group_id == AdGroup.ad_group_id)
+        .group_by(page.c.campaign_id, page.c.campaign_name, AdGroup.ad_group_id, AdGroup.ad_group_name)
+        .order_by(page.c.campaign_id, AdGroup.ad_group_id)
+    )
+
+
+def build_campaign_tree(rows):
+    """
+    Fold the flat (campaign, ad group) rows into the nested /campaigns response.
+    Rows must be ordered by campaign_id.
+    """
+    result = []
+    current_id = None
+    current = None
+    total_cost = 0
+    total_conversions = 0
+
+    def finish(campaign, cost, conversions):
+        ad_group_count = campaign["number_of_ad_groups"]
+        campaign["average_monthly_cost"] = round(cost / ad_group_count if ad_group_count else 0, 2)
+        campaign["average_cost_per_conversion"] = round(cost / conversions if conversions > 0 else 0, 2)
+
+    for row in rows:
+        if row.campaign_id != current_id:
+            if current is not None:
+                finish(current, total_cost, total_conversions)
+            current_id = row.campaign_id
+            current = {
+                "campaign_name": row.campaign_name,
+                "number_of_ad_groups": 0,
+                "ad_groups": [],
+            }
+            result.append(current)
+            total_cost = 0
+            total_conversions = 0
+
+        # Campaigns without ad groups come back as a single row with NULL ad group columns
+        if row.ad_group_id is None:
+            continue
+
+        avg_cost = row.avg_cost or 0
+        avg_conversions = row.avg_conversions or 0
+        total_cost += avg_cost
+        total_conversions += avg_conversions
+
+        current["number_of_ad_groups"] += 1
+        current["ad_groups"].append({
+            "ad_group_name": row.ad_group_name,
+            "average_cost": round(avg_cost, 2),
+            "average_conversions": round(avg_conversions, 2)
+        })
+
+    if current is not None:
+        finish(current, total_cost, total_conversions)
+
+    return result
+
+
+async def get_campaign_rollup(db: AsyncSession, campaign_ids: Optional[List[int]] = None, limit: Optional[int] = None, offset: int = 0):
+    try:
+        rows = await fetch_all(db, build_campaign_rollup_query(campaign_ids, limit, offset))
+        return build_campaign_tree(rows)
+
+    except Exception as e:
+        Log.ERROR(f"Error in get_campaign_rollup: {str(e)}")
+        raise
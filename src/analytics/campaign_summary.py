@@ -0,0 +1,123 @@
+import base64
+from typing import Optional
+import orjson
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database.rows import fetch_all
+from src.models.models import CampaignSummary
+from src.utils.log import Log  # Import the Log class for logging
+
+# Sort keys of GET /campaigns/summary and their columns, each one has an index ending in campaign_id
+SORT_COLUMNS = {
+    "campaign_id": CampaignSummary.campaign_id,
+    "cost": CampaignSummary.average_monthly_cost,
+    "cost_per_conversion": CampaignSummary.average_cost_per_conversion,
+}
+
+# Columns of a page, read as plain rows rather than CampaignSummary entities
+SUMMARY_COLUMNS = [
+    CampaignSummary.campaign_id,
+    CampaignSummary.campaign_name,
+    CampaignSummary.campaign_type,
+    CampaignSummary.number_of_ad_groups,
+    CampaignSummary.average_monthly_cost,
+    CampaignSummary.average_conversions,
+    CampaignSummary.average_cost_per_conversion,
+]
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that is malformed or was issued for another sort order."""
+
+
+def encode_cursor(sort: str, order: str, value, campaign_id: int) -> str:
+    """Opaque cursor pointing after the row with this sort value and campaign_id."""
+    payload = orjson.dumps({"sort": sort, "order": order, "value": value, "id": campaign_id})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str):
+    """(sort value, campaign_id) of the last row of the previous page."""
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        value, campaign_id = payload["value"], int(payload["id"])
+        matches = payload["sort"] == sort and payload["order"] == order
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("Malformed cursor") from e
+    if not matches:
+        raise InvalidCursorError("The cursor was issued for another sort order")
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise InvalidCursorError("Malformed cursor")
+    return value, campaign_id
+
+
+def build_campaign_summary_query(sort: str = "campaign_id", order: str = "asc", campaign_type: Optional[str] = None,
+                                 name_prefix: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE, after=None):
+    """
+    Build the statement for one page of campaign_summary rows.
+
+    Pages are keyset-paginated on (sort column, campaign_id): `after` is the key of the
+    last row of the previous page and the next rows are read from the matching index.
+    One row more than `limit` is selected to tell whether another page follows.
+    """
+    key = SORT_COLUMNS[sort]
+    descending = order == "desc"
+
+    query = select(*SUMMARY_COLUMNS)
+    if campaign_type:
+        query = query.where(CampaignSummary.campaign_type == campaign_type)
+    if name_prefix:
+        query = query.where(CampaignSummary.campaign_name.startswith(name_prefix, autoescape=True))
+
+    if after is not None:
+        value, campaign_id = after
+        if sort == "campaign_id":
+            current, boundary = CampaignSummary.campaign_id, campaign_id
+        else:
+            current, boundary = tuple_(key, CampaignSummary.campaign_id), tuple_(value, campaign_id)
+        query = query.where(current < boundary if descending else current > boundary)
+
+    columns = [key] if sort == "campaign_id" else [key, CampaignSummary.campaign_id]
+    return query.order_by(*(column.desc() if descending else column.asc() for column in columns)).limit(limit + 1)
+
+
+def summary_record(row):
+    return {
+        "campaign_id": row.campaign_id,
+        "campaign_name": row.campaign_name,
+        "campaign_type": row.campaign_type,
+        "number_of_ad_groups": row.number_of_ad_groups,
+        "average_monthly_cost": round(row.average_monthly_cost, 2),
+        "average_conversions": round(row.average_conversions, 2),
+        "average_cost_per_conversion": round(row.average_cost_per_conversion, 2),
+    }
+
+
+def build_summary_page(rows, sort: str, order: str, limit: int):
+    """The page of records and the cursor of the next page, None on the last page."""
+    rows = list(rows)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        # The unrounded value, so that the next page starts exactly after this row
+        next_cursor = encode_cursor(sort, order, getattr(last, SORT_COLUMNS[sort].key), last.campaign_id)
+    return {"items": [summary_record(row) for row in rows], "next_cursor": next_cursor}
+
+
+async def get_campaign_summary_page(db: AsyncSession, sort: str = "campaign_id", order: str = "asc",
+                                    campaign_type: Optional[str] = None, name_prefix: Optional[str] = None,
+                                    limit: int = DEFAULT_PAGE_SIZE, after=None):
+    try:
+        query = build_campaign_summary_query(sort, order, campaign_type, name_prefix, limit, after)
+        rows = await fetch_all(db, query)
+        return build_summary_page(rows, sort, order, limit)
+
+    except Exception as e:
+        Log.ERROR(f"Error in get_campaign_summary_page: {str(e)}")
+        raise
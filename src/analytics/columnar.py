@@ -0,0 +1,266 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+from src.analytics.periods import period_start
+from src.cache.response_cache import fetch_data_version
+from src.database.database import get_engine
+from src.database.rows import as_float
+from src.models.models import AdGroup, AdGroupStats
+from src.utils.log import Log  # Import the Log class for logging
+
+load_dotenv()
+
+# ANALYTICS_ENGINE=memory answers the performance queries from an in-memory snapshot of
+# ad_group_stats, "sql" (the default) sends every query to PostgreSQL
+ANALYTICS_ENGINES = ("sql", "memory")
+
+MEASURES = ("cost", "clicks", "conversions", "impressions")
+
+LOAD_BATCH_SIZE = 100_000
+
+
+class _Columns:
+    """Date-sorted rows with their measures and prefix sums, for O(log n) range totals."""
+
+    def __init__(self, dates, ad_group_ids, campaign_ids, measures):
+        self.dates = dates
+        self.ad_group_ids = ad_group_ids
+        self.campaign_ids = campaign_ids
+        self.measures = measures
+        # prefix[m][i] is the sum of the first i rows. Float sums are accumulated in extended
+        # precision so that the difference of two large prefixes keeps the cents exact
+        self.prefix = {
+            name: np.concatenate(([0], np.cumsum(values, dtype=np.longdouble if values.dtype.kind == "f" else None)))
+            for name, values in measures.items()
+        }
+
+    def take(self, indices):
+        return _Columns(self.dates[indices], self.ad_group_ids[indices], self.campaign_ids[indices],
+                        {name: values[indices] for name, values in self.measures.items()})
+
+    def bounds(self, start_date, end_date):
+        """Row slice of the dates between start_date and end_date, both included."""
+        lo = 0 if start_date is None else np.searchsorted(self.dates, np.datetime64(start_date, "D"), "left")
+        hi = len(self.dates) if end_date is None else np.searchsorted(self.dates, np.datetime64(end_date, "D"), "right")
+        return lo, max(lo, hi)
+
+    def range_totals(self, start_date, end_date):
+        lo, hi = self.bounds(start_date, end_date)
+        return {
+            name: self.measures[name].dtype.type(prefix[hi] - prefix[lo]).item()
+            for name, prefix in self.prefix.items()
+        }
+
+
+def _period_keys(dates, aggregate_by: str):
+    # Same periods as date_trunc: weeks start on Monday, 1970-01-01 was a Thursday
+    if aggregate_by == "week":
+        return dates - (dates.astype(np.int64) + 3) % 7
+    if aggregate_by == "month":
+        return dates.astype("datetime64[M]").astype("datetime64[D]")
+    return dates
+
+
+class ColumnarSnapshot:
+    """
+    ad_group_stats, with the campaign of every ad group, held as NumPy columns sorted by date.
+
+    Range totals come from prefix sums and time series from np.add.reduceat over the
+    date buckets. Each device also gets its own columns, so device filters stay O(log n).
+    NULL measures are loaded as 0.
+    """
+
+    def __init__(self, dates, ad_group_ids, campaign_ids, devices, measures, version: int = 0):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = len(dates)
+        self.all = _Columns(dates, ad_group_ids, campaign_ids, measures)
+        self.by_device = {device: self.all.take(np.flatnonzero(devices == device)) for device in np.unique(devices)}
+
+    def _columns(self, device: Optional[str]):
+        if device is None:
+            return self.all
+        return self.by_device.get(device) or self.all.take(np.array([], dtype=np.int64))
+
+    def nbytes(self):
+        columns = [self.all, *self.by_device.values()]
+        return sum(
+            array.nbytes
+            for part in columns
+            for array in (part.dates, part.ad_group_ids, part.campaign_ids, *part.measures.values(),
+                          *part.prefix.values())
+        )
+
+    def period_totals(self, periods: List[Tuple[datetime, datetime]], device: Optional[str] = None):
+        """Sequences of total cost, clicks, conversions and impressions, one value per period."""
+        columns = self._columns(device)
+        totals = [columns.range_totals(start_date, end_date) for start_date, end_date in periods]
+        return [[period[name] for period in totals] for name in MEASURES]
+
+    def time_series_rows(self, aggregate_by: str, campaigns: Optional[List[int]] = None,
+                         start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                         device: Optional[str] = None, ad_groups: Optional[List[int]] = None, zone=timezone.utc):
+        """
+        (period, total_cost, total_clicks, total_conversions, total_impressions) rows, latest
+        period first. Periods are labelled like date_trunc in a session whose time zone is `zone`.
+        """
+        columns = self._columns(device)
+        lo, hi = columns.bounds(start_date, end_date)
+        dates = columns.dates[lo:hi]
+        measures = {name: values[lo:hi] for name, values in columns.measures.items()}
+
+        mask = None
+        if campaigns:
+            mask = np.isin(columns.campaign_ids[lo:hi], campaigns)
+        if ad_groups:
+            in_ad_groups = np.isin(columns.ad_group_ids[lo:hi], ad_groups)
+            mask = in_ad_groups if mask is None else mask & in_ad_groups
+        if mask is not None:
+            dates = dates[mask]
+            measures = {name: values[mask] for name, values in measures.items()}
+        if not len(dates):
+            return []
+
+        # Rows are sorted by date, so every period is a contiguous run of rows
+        keys = _period_keys(dates, aggregate_by)
+        starts = np.flatnonzero(np.concatenate(([True], keys[1:] != keys[:-1])))
+        totals = [np.add.reduceat(measures[name], starts).tolist() for name in MEASURES]
+        periods = [period_start(day, zone) for day in keys[starts].astype(object)]
+        return list(zip(periods, *totals))[::-1]
+
+
+def _stats_query():
+    return (
+        select(AdGroupStats.date, AdGroupStats.ad_group_id, AdGroup.campaign_id, AdGroupStats.device,
+               as_float(AdGroupStats.cost), AdGroupStats.clicks, as_float(AdGroupStats.conversions),
+               as_float(AdGroupStats.impressions))
+        .outerjoin(AdGroup, AdGroup.ad_group_id == AdGroupStats.ad_group_id)
+        .order_by(AdGroupStats.date)
+    )
+
+
+def _as_float(values):
+    return np.nan_to_num(np.array(values, dtype=np.float64))
+
+
+def load_snapshot(connection, version: int = 0, batch_size: int = LOAD_BATCH_SIZE):
+    """Read ad_group_stats through a sync SQLAlchemy connection, `batch_size` rows at a time."""
+    chunks = []
+    result = connection.execute(_stats_query().execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        dates, ad_group_ids, campaign_ids, devices, cost, clicks, conversions, impressions = zip(*rows)
+        chunks.append({
+            "date": np.array(dates, dtype="datetime64[D]"),
+            "ad_group_id": np.array(ad_group_ids, dtype=np.int64),
+            "campaign_id": np.array([-1 if value is None else value for value in campaign_ids], dtype=np.int64),
+            "device": np.array([value or "" for value in devices], dtype=object),
+            "cost": _as_float(cost),
+            "clicks": _as_float(clicks).astype(np.int64),
+            "conversions": _as_float(conversions),
+            "impressions": _as_float(impressions),
+        })
+
+    empty = {"date": np.array([], dtype="datetime64[D]"), "ad_group_id": np.array([], dtype=np.int64),
+             "campaign_id": np.array([], dtype=np.int64), "device": np.array([], dtype=object),
+             "clicks": np.array([], dtype=np.int64),
+             **{name: np.array([], dtype=np.float64) for name in ("cost", "conversions", "impressions")}}
+    columns = {name: np.concatenate([chunk[name] for chunk in chunks]) if chunks else array
+               for name, array in empty.items()}
+
+    # The device strings are only used to split the rows into per-device columns
+    devices = columns.pop("device").astype(str)
+    return ColumnarSnapshot(columns.pop("date"), columns.pop("ad_group_id"), columns.pop("campaign_id"),
+                            devices, columns, version=version)
+
+
+class ColumnarEngine:
+    """
+    Keeps the current ColumnarSnapshot and replaces it in the background once the data
+    version changes or the snapshot is older than `max_age` seconds.
+
+    Requests keep reading the previous snapshot during a refresh, the new one is swapped
+    in with a single assignment once it is fully built. Only the first request waits for a load.
+    """
+
+    def __init__(self, enabled: bool = False, max_age: float = 3600, version_check_seconds: float = 5):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.version_check_seconds = version_check_seconds
+        self.snapshot = None
+        self.refreshes = 0
+        self._refresh_task = None
+        self._data_version = None
+        self._version_checked_at = 0.0
+
+    async def _current_version(self, db) -> int:
+        now = time.monotonic()
+        if self._data_version is None or now - self._version_checked_at >= self.version_check_seconds:
+            self._data_version = await fetch_data_version(db)
+            self._version_checked_at = now
+        return self._data_version
+
+    def _load(self, version: int):
+        started_at = time.perf_counter()
+        with get_engine().connect() as connection:
+            snapshot = load_snapshot(connection, version)
+        Log.INFO(f"Columnar snapshot of {snapshot.rows} rows ({snapshot.nbytes() / 1e6:.1f} MB) loaded "
+                 f"in {time.perf_counter() - started_at:.2f}s for data version {version}.")
+        return snapshot
+
+    async def _refresh(self, version: int):
+        try:
+            self.snapshot = await asyncio.to_thread(self._load, version)
+            self.refreshes += 1
+        except Exception as e:
+            # The previous snapshot, if any, keeps being served
+            Log.ERROR(f"Error refreshing the columnar snapshot: {str(e)}")
+
+    def _start_refresh(self, version: int):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh(version))
+        return self._refresh_task
+
+    async def get_snapshot(self, db) -> ColumnarSnapshot:
+        version = await self._current_version(db)
+        if self.snapshot is None:
+            await self._start_refresh(version)
+            if self.snapshot is None:
+                raise RuntimeError("The columnar snapshot could not be loaded")
+        elif self.snapshot.version != version or time.monotonic() - self.snapshot.loaded_at >= self.max_age:
+            self._start_refresh(version)
+        return self.snapshot
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "engine": "memory" if self.enabled else "sql",
+            "rows": snapshot.rows if snapshot else None,
+            "bytes": snapshot.nbytes() if snapshot else None,
+            "data_version": snapshot.version if snapshot else None,
+            "age_seconds": round(time.monotonic() - snapshot.loaded_at, 1) if snapshot else None,
+            "refreshes": self.refreshes,
+        }
+
+
+def create_columnar_engine():
+    """
+    Build the engine configured by ANALYTICS_ENGINE (sql or memory), ANALYTICS_SNAPSHOT_MAX_AGE
+    and ANALYTICS_SNAPSHOT_VERSION_CHECK_SECONDS.
+    """
+    engine_name = os.getenv("ANALYTICS_ENGINE", "sql").lower()
+    if engine_name not in ANALYTICS_ENGINES:
+        raise ValueError(f"ANALYTICS_ENGINE must be one of {', '.join(ANALYTICS_ENGINES)}, got {engine_name!r}")
+
+    return ColumnarEngine(
+        enabled=engine_name == "memory",
+        max_age=float(os.getenv("ANALYTICS_SNAPSHOT_MAX_AGE", "3600")),
+        version_check_seconds=float(os.getenv("ANALYTICS_SNAPSHOT_VERSION_CHECK_SECONDS", "5")),
+    )
+
+
+columnar_engine = create_columnar_engine()
@@ -0,0 +1,201 @@
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.metrics import derive_metrics
+
+# Media type of every supported response format, JSON is the default
+EXPORT_FORMATS = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+DEFAULT_BATCH_SIZE = 10_000
+
+# Time series columns and their Arrow types, in output order
+TIME_SERIES_FIELDS = [
+    ("period", "timestamp"),
+    ("total_cost", "float64"),
+    ("total_clicks", "int64"),
+    ("total_conversions", "float64"),
+    ("avg_cost_per_click", "float64"),
+    ("avg_cost_per_conversion", "float64"),
+    ("avg_click_through_rate", "float64"),
+    ("avg_conversion_rate", "float64"),
+]
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+def negotiate_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    """
+    Pick the response format from the `format` query parameter, or else from the Accept
+    header. Anything unrecognised in the Accept header falls back to JSON.
+    """
+    if format_param:
+        if format_param not in EXPORT_FORMATS:
+            raise UnsupportedFormatError(f"Unsupported format {format_param!r}, use one of {', '.join(EXPORT_FORMATS)}")
+        return format_param
+
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        for name, known in EXPORT_FORMATS.items():
+            if media_type == known:
+                return name
+    return "json"
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> bytes:
+    """Serialize to JSON with orjson, which also handles datetimes and Decimal totals."""
+    return orjson.dumps(value, default=_json_default)
+
+
+def time_series_columns(rows, dimensions=()):
+    """
+    Turn a batch of (period, *dimensions, total_cost, total_clicks, total_conversions,
+    total_impressions) rows into output columns, with the KPIs derived for the whole batch.
+    """
+    if not rows:
+        return {}
+    period, *dimension_values, total_cost, total_clicks, total_conversions, total_impressions = zip(*rows)
+
+    metrics = derive_metrics(total_cost, total_clicks, total_conversions, total_impressions)
+    return {
+        "period": period,
+        **dict(zip(dimensions, dimension_values)),
+        "total_cost": total_cost,
+        "total_clicks": total_clicks,
+        "total_conversions": total_conversions,
+        "avg_cost_per_click": metrics["cost_per_click"].tolist(),
+        "avg_cost_per_conversion": metrics["cost_per_conversion"].tolist(),
+        "avg_click_through_rate": metrics["click_through_rate"].tolist(),
+        "avg_conversion_rate": metrics["conversion_rate"].tolist(),
+    }
+
+
+def columns_to_records(columns):
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+def time_series_fields(dimension_fields=()):
+    """(name, type) of every output column, the dimension columns follow `period`."""
+    return TIME_SERIES_FIELDS[:1] + list(dimension_fields) + TIME_SERIES_FIELDS[1:]
+
+
+def _arrow_schema(fields):
+    import pyarrow as pa
+
+    types = {"timestamp": pa.timestamp("us", tz="UTC"), "float64": pa.float64(), "int64": pa.int64(),
+             "string": pa.string()}
+    return pa.schema([pa.field(name, types[kind]) for name, kind in fields])
+
+
+def _record_batch(columns, schema):
+    import pyarrow as pa
+
+    arrays = []
+    for field in schema:
+        values = columns[field.name]
+        if pa.types.is_floating(field.type):
+            values = [float(value) if value is not None else None for value in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file collecting the bytes produced since the last `drain()`."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+async def stream_rows(db: AsyncSession, query, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Yield the query's rows in batches from a server-side cursor."""
+    result = await db.stream(query.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        yield partition
+
+
+async def stream_time_series(db: AsyncSession, query, export_format: str, dimension_fields=(),
+                             batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Encode the time series produced by `query` in `export_format`, batch by batch.
+    `dimension_fields` are the (name, type) of the group_by columns the query returns.
+
+    Only one batch of rows is held in memory at a time: NDJSON and CSV are written row by
+    row, Arrow IPC emits one record batch and Parquet one row group per batch.
+    """
+    batches = stream_rows(db, query, batch_size)
+    fields = time_series_fields(dimension_fields)
+    names = [name for name, _ in fields]
+    dimensions = [name for name, _ in dimension_fields]
+
+    if export_format == "ndjson":
+        async for rows in batches:
+            columns = time_series_columns(rows, dimensions)
+            yield b"".join(dumps(record) + b"\n" for record in columns_to_records(columns))
+
+    elif export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(names)
+        async for rows in batches:
+            columns = time_series_columns(rows, dimensions)
+            writer.writerows(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+                for row in zip(*(columns[name] for name in names))
+            )
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+
+    elif export_format in ("arrow", "parquet"):
+        import pyarrow.ipc as ipc
+        import pyarrow.parquet as pq
+
+        schema = _arrow_schema(fields)
+        sink = _Sink()
+        writer = ipc.new_stream(sink, schema) if export_format == "arrow" else pq.ParquetWriter(sink, schema)
+
+        async for rows in batches:
+            writer.write_batch(_record_batch(time_series_columns(rows, dimensions), schema))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+
+    else:
+        raise UnsupportedFormatError(f"{export_format} cannot be streamed")
@@ -0,0 +1,34 @@
+import numpy as np
+
+# Every endpoint derives its KPIs from the summed totals with these formulas. Rates are
+# percentages and every derived value is rounded to 2 decimals.
+
+
+def as_array(values):
+    """Float array of `values`, with NULL totals (None) counted as 0."""
+    return np.nan_to_num(np.asarray(values, dtype=float))
+
+
+def safe_divide(numerator, denominator):
+    """Element-wise numerator / denominator, 0 where the denominator is 0."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    return np.divide(numerator, denominator, out=np.zeros(np.broadcast(numerator, denominator).shape),
+                     where=denominator != 0)
+
+
+def derive_metrics(cost, clicks, conversions, impressions):
+    """
+    Derive the KPIs column-wise from arrays of summed totals.
+
+    Returns arrays of cost per click, cost per conversion, cost per mille impressions,
+    click-through rate (%) and conversion rate (%).
+    """
+    cost, clicks, conversions, impressions = map(as_array, (cost, clicks, conversions, impressions))
+    return {
+        "cost_per_click": np.round(safe_divide(cost, clicks), 2),
+        "cost_per_conversion": np.round(safe_divide(cost, conversions), 2),
+        "cost_per_mille_impression": np.round(safe_divide(cost * 1000, impressions), 2),
+        "click_through_rate": np.round(safe_divide(clicks * 100, impressions), 2),
+        "conversion_rate": np.round(safe_divide(conversions * 100, clicks), 2),
+    }
@@ -0,0 +1,26 @@
+from datetime import date, datetime, time, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from sqlalchemy import func, select
+from src.database.rows import fetch_scalar
+
+
+async def fetch_session_time_zone(db):
+    """
+    The TimeZone setting of the session, in which date_trunc turns the dates into period
+    timestamps, or None when Python does not know a zone of that name.
+    """
+    name = await fetch_scalar(db, select(func.current_setting("TimeZone")))
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+
+def period_start(day: date, zone) -> datetime:
+    """The period date_trunc returns for a period starting on `day`: its midnight in `zone`, read back in UTC."""
+    return datetime.combine(day, time.min, tzinfo=zone).astimezone(timezone.utc)
+
+
+def period_date(period: datetime, zone) -> date:
+    """The day of a date_trunc period in `zone`."""
+    return period.astimezone(zone).date()
@@ -0,0 +1,26 @@
+import os
+from dotenv import load_dotenv
+from src.models.models import AdGroupStats, AdGroupDailyStats, CampaignDailyStats
+
+load_dotenv()
+
+# Set ANALYTICS_USE_ROLLUPS=false to always aggregate the raw ad_group_stats rows
+USE_ROLLUPS = os.getenv("ANALYTICS_USE_ROLLUPS", "true").lower() in ("1", "true", "yes")
+
+# Smallest table first, ad_group_stats is the raw fallback
+ROLLUP_MODELS = [CampaignDailyStats, AdGroupDailyStats]
+
+
+def stats_source(*columns: str):
+    """
+    Pick the table a performance query should read from.
+
+    `columns` are the dimension columns the query filters or groups on besides `date`.
+    The smallest daily rollup that has all of them is returned, and the raw
+    ad_group_stats rows are used when one of them is only available there (e.g. `device`).
+    """
+    if USE_ROLLUPS:
+        for model in ROLLUP_MODELS:
+            if all(hasattr(model, column) for column in columns):
+                return model
+    return AdGroupStats
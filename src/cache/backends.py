@@ -0,0 +1,108 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class MemoryBackend:
+    """
+    In-process LRU cache with a per-entry TTL.
+
+    Once `max_entries` is reached the least recently used entry is evicted. Counters
+    are kept apart from the entries so they are never evicted or expired.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._counters = {}
+
+    async def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def clear(self):
+        self._entries.clear()
+        self._counters.clear()
+
+    def stats(self):
+        return {"backend": "memory", "entries": len(self._entries), "max_entries": self.max_entries,
+                "evictions": self.evictions}
+
+
+class RedisBackend:
+    """
+    Cache shared by every API worker, stored in Redis as JSON. Requires `pip install redis`.
+    """
+
+    def __init__(self, url: str, prefix: str = "campaign-analytics:"):
+        import redis.asyncio as redis
+
+        self.prefix = prefix
+        self._client = redis.from_url(url)
+
+    async def get(self, key: str):
+        value = await self._client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    async def set(self, key: str, value, ttl: Optional[float] = None):
+        await self._client.set(self.prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    async def get_counter(self, key: str) -> int:
+        value = await self._client.get(self.prefix + "counter:" + key)
+        return int(value) if value is not None else 0
+
+    async def incr(self, key: str) -> int:
+        return await self._client.incr(self.prefix + "counter:" + key)
+
+    async def clear(self):
+        async for key in self._client.scan_iter(match=self.prefix + "*"):
+            await self._client.delete(key)
+
+    def stats(self):
+        return {"backend": "redis"}
+
+
+class NullBackend:
+    """Backend used when caching is disabled, every lookup misses."""
+
+    async def get(self, key: str):
+        return None
+
+    async def set(self, key: str, value, ttl: Optional[float] = None):
+        pass
+
+    async def get_counter(self, key: str) -> int:
+        return 0
+
+    async def incr(self, key: str) -> int:
+        return 0
+
+    async def clear(self):
+        pass
+
+    def stats(self):
+        return {"backend": "none"}
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import date
+from dotenv import load_dotenv
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from src.analytics.export import dumps
+from src.cache.backends import MemoryBackend, RedisBackend, NullBackend
+from src.database.rows import fetch_all, fetch_scalar
+from src.models.models import CacheGeneration, DataVersion
+from src.utils.log import Log  # Import the Log class for logging
+
+load_dotenv()
+
+CACHE_BACKENDS = ("memory", "redis", "none")
+
+
+def bump_data_version(cursor):
+    """Increment the data version on the cursor's transaction, so cached responses are recomputed once it commits."""
+    cursor.execute('''
+        INSERT INTO data_version (id, version, updated_at) VALUES (1, 1, now())
+        ON CONFLICT (id) DO UPDATE SET version = data_version.version + 1, updated_at = now()
+    ''')
+
+
+async def fetch_data_version(db) -> int:
+    version = await fetch_scalar(db, select(DataVersion.version).where(DataVersion.id == 1))
+    return version or 0
+
+
+async def bump_cache_generations(db, namespaces):
+    """
+    Increment the stored generation of these namespaces on the session's transaction. Once it
+    commits, every worker recomputes their cached responses at its next data version check.
+    """
+    statement = insert(CacheGeneration).values(
+        [{"namespace": namespace, "generation": 1, "updated_at": func.now()} for namespace in namespaces]
+    )
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[CacheGeneration.namespace],
+        set_={"generation": CacheGeneration.generation + 1, "updated_at": func.now()},
+    ))
+
+
+async def fetch_cache_generations(db):
+    rows = await fetch_all(db, select(CacheGeneration.namespace, CacheGeneration.generation))
+    return {row.namespace: row.generation for row in rows}
+
+
+def normalize_params(params: dict):
+    """
+    Make equivalent requests produce the same key: lists are de-duplicated and sorted,
+    dates are written as ISO strings and unset parameters are dropped.
+    """
+    normalized = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            value = sorted(set(value))
+        elif isinstance(value, date):
+            value = value.isoformat()
+        normalized[name] = value
+    return normalized
+
+
+class ResponseCache:
+    """
+    Caches endpoint results per namespace, keyed on the normalized request parameters.
+
+    Keys also contain the data version, which every ingestion run bumps, and per-namespace
+    generations, so stale entries are never read again and simply age out of the backend.
+    Writes bump the stored generation of a namespace with bump_cache_generations() in their
+    transaction and then call `invalidate()`, which increments the backend's own counter so
+    the worker that made the change sees it immediately. The data version and the stored
+    generations are read from the database at most once every `version_check_seconds`, which
+    bounds how long other workers of a memory cache keep serving the previous results.
+    """
+
+    def __init__(self, backend, ttl: float = 300, version_check_seconds: float = 5):
+        self.backend = backend
+        self.ttl = ttl
+        self.version_check_seconds = version_check_seconds
+        self.counters = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self._data_version = None
+        self._generations = {}
+        self._version_checked_at = 0.0
+
+    async def data_version(self, db) -> int:
+        if self._data_version is None or time.monotonic() - self._version_checked_at >= self.version_check_seconds:
+            await self.refresh_data_version(db)
+        return self._data_version
+
+    async def refresh_data_version(self, db) -> int:
+        """Re-read the data version and the stored generations now, regardless of when they were last checked."""
+        self._data_version = await fetch_data_version(db)
+        self._generations = await fetch_cache_generations(db)
+        self._version_checked_at = time.monotonic()
+        return self._data_version
+
+    async def _key(self, namespace: str, params: dict, db):
+        version = await self.data_version(db)
+        generation = await self.backend.get_counter(f"generation:{namespace}")
+        payload = json.dumps(normalize_params(params), sort_keys=True, default=str)
+        digest = hashlib.sha1(payload.encode()).hexdigest()
+        return f"{namespace}:{version}:{self._generations.get(namespace, 0)}.{generation}:{digest}"
+
+    async def lookup(self, namespace: str, params: dict, db):
+        """
+        Return the key of these parameters with their cached result, or None on a miss. A
+        result computed after a miss is stored under that key with `store()`: a version or
+        generation bumped meanwhile then leaves it unreachable instead of caching old data
+        under the new key.
+        """
+        key = await self._key(namespace, params, db)
+        cached = await self.backend.get(key)
+        self.counters[namespace]["hits" if cached is not None else "misses"] += 1
+        return key, cached
+
+    async def store(self, key: str, result):
+        """Cache `result` under a key returned by `lookup()` and return it in its cached form."""
+        # Cached values are stored in their JSON form so hits and misses return the same response
+        result = orjson.loads(dumps(result))
+        await self.backend.set(key, result, self.ttl)
+        return result
+
+    async def get_or_compute(self, namespace: str, params: dict, db, compute):
+        """Return the cached result for these parameters, or await `compute()` and cache its result."""
+        key, cached = await self.lookup(namespace, params, db)
+        if cached is not None:
+            return cached
+        return await self.store(key, await compute())
+
+    async def invalidate(self, namespace: str):
+        await self.backend.incr(f"generation:{namespace}")
+        Log.INFO(f"Cache namespace {namespace} invalidated.")
+
+    async def clear(self):
+        await self.backend.clear()
+        self.counters.clear()
+        self._data_version = None
+        self._generations = {}
+
+    def stats(self):
+        namespaces = {}
+        for namespace, counts in self.counters.items():
+            lookups = counts["hits"] + counts["misses"]
+            namespaces[namespace] = dict(counts, hit_ratio=round(counts["hits"] / lookups, 3) if lookups else 0)
+        return {
+            **self.backend.stats(),
+            "ttl_seconds": self.ttl,
+            "data_version": self._data_version,
+            "generations": self._generations,
+            "namespaces": namespaces,
+        }
+
+
+def create_response_cache():
+    """
+    Build the cache configured by CACHE_BACKEND (memory, redis or none), CACHE_TTL_SECONDS,
+    CACHE_MAX_ENTRIES, CACHE_REDIS_URL and CACHE_VERSION_CHECK_SECONDS.
+    """
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    if backend_name not in CACHE_BACKENDS:
+        raise ValueError(f"CACHE_BACKEND must be one of {', '.join(CACHE_BACKENDS)}, got {backend_name!r}")
+
+    if backend_name == "redis":
+        backend = RedisBackend(os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+    elif backend_name == "none":
+        backend = NullBackend()
+    else:
+        backend = MemoryBackend(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")))
+
+    return ResponseCache(
+        backend,
+        ttl=float(os.getenv("CACHE_TTL_SECONDS", "300")),
+        version_check_seconds=float(os.getenv("CACHE_VERSION_CHECK_SECONDS", "5")),
+    )
+
+
+response_cache = create_response_cache()
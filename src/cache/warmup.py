@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import List, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import func, select
+from src.analytics.batch import run_batch
+from src.cache.backends import NullBackend
+from src.cache.response_cache import response_cache
+from src.database.database import AsyncSessionLocal, get_async_engine
+from src.database.rows import fetch_scalar
+from src.models.models import AdGroupStats
+from src.schemas.schemas import QuerySpec
+from src.utils.log import Log  # Import the Log class for logging
+
+# Queries warmed after every load. They take the fields of the POST /analytics/batch specs,
+# `days` replaces the dates with the last `days` days up to the latest loaded date.
+DEFAULT_WARMUP_SPECS = [
+    {"type": "compare", "days": 7, "compare_mode": "preceding"},
+    {"type": "compare", "days": 30, "compare_mode": "preceding"},
+    {"type": "time_series", "aggregate_by": "day"},
+    {"type": "time_series", "aggregate_by": "week"},
+    {"type": "time_series", "aggregate_by": "month"},
+]
+
+_query_spec = TypeAdapter(QuerySpec)
+
+
+def load_warmup_specs(path: Optional[str] = None):
+    """The specs of the WARMUP_SPECS_FILE JSON file, or DEFAULT_WARMUP_SPECS."""
+    path = path or os.getenv("WARMUP_SPECS_FILE")
+    if not path:
+        return DEFAULT_WARMUP_SPECS
+    with open(path) as specs_file:
+        return json.load(specs_file)
+
+
+def resolve_specs(specs, latest_date):
+    """
+    Batch query specs for the given warm-up specs, with their `days` turned into dates
+    ending on `latest_date`. Specs with `days` are skipped while there is no data.
+    """
+    resolved = []
+    for position, spec in enumerate(specs):
+        spec = dict(spec)
+        days = spec.pop("days", None)
+        if days is not None:
+            if latest_date is None:
+                continue
+            spec["start_date"] = (latest_date - timedelta(days=days - 1)).isoformat()
+            spec["end_date"] = latest_date.isoformat()
+        resolved.append(_query_spec.validate_python({"id": f"warmup-{position}", **spec}))
+    return resolved
+
+
+async def fetch_latest_date(db):
+    return await fetch_scalar(db, select(func.max(AdGroupStats.date)))
+
+
+class WarmupScheduler:
+    """
+    Precomputes the warm-up specs into the response cache whenever the data version changes,
+    so the first dashboard requests after a load are cache hits.
+
+    The version is checked every `check_seconds`. Specs are run through run_batch, grouped
+    the way it merges them, and at most `concurrency` groups run at a time, each on its own
+    pooled connection, so live requests keep the rest of the pool.
+    """
+
+    def __init__(self, specs, enabled: bool = True, concurrency: int = 2, check_seconds: float = 30,
+                 session_factory=None):
+        self.specs = specs
+        self.enabled = enabled
+        self.concurrency = concurrency
+        self.check_seconds = check_seconds
+        self.status = "idle"
+        self.data_version = None
+        self.queries = 0
+        self.failed = 0
+        self.started_at = None
+        self.finished_at = None
+        self.duration_seconds = None
+        self.runs = 0
+        self._task = None
+        self._session_factory = session_factory or (lambda: AsyncSessionLocal(bind=get_async_engine()))
+
+    async def _run_group(self, semaphore, specs):
+        async with semaphore:
+            try:
+                async with self._session_factory() as db:
+                    await run_batch(db, specs)
+                return 0
+            except Exception as e:
+                Log.ERROR(f"Error warming {', '.join(spec.id for spec in specs)}: {str(e)}")
+                return len(specs)
+
+    async def warm(self, version: int, latest_date=None):
+        """Run every warm-up spec for this data version and record how it went."""
+        self.status = "running"
+        self.data_version = version
+        self.started_at = time.time()
+        self.finished_at = self.duration_seconds = None
+        started_at = time.perf_counter()
+
+        specs = resolve_specs(self.specs, latest_date)
+        groups = defaultdict(list)
+        for spec in specs:
+            # run_batch merges time series with the same filters and comparisons with the same device
+            groups[(spec.type == "time_series", spec.device)].append(spec)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failures = await asyncio.gather(*(self._run_group(semaphore, group) for group in groups.values()))
+
+        self.queries = len(specs)
+        self.failed = sum(failures)
+        self.duration_seconds = round(time.perf_counter() - started_at, 3)
+        self.finished_at = time.time()
+        self.runs += 1
+        self.status = "failed" if self.failed else "done"
+        Log.INFO(f"Warm-up of {len(specs)} queries for data version {version} finished in "
+                 f"{self.duration_seconds}s, {self.failed} failed.")
+
+    async def check(self):
+        """Warm the cache if the data version changed since the last warm-up, or if that one failed."""
+        async with self._session_factory() as db:
+            # Warmed entries are keyed on the new version, not the one the cache last saw
+            version = await response_cache.refresh_data_version(db)
+            if version == self.data_version and self.status != "failed":
+                return
+            latest_date = await fetch_latest_date(db)
+        await self.warm(version, latest_date)
+
+    async def run(self):
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                self.status = "failed"
+                Log.ERROR(f"Error during cache warm-up: {str(e)}")
+            await asyncio.sleep(self.check_seconds)
+
+    def start(self):
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "status": self.status,
+            "data_version": self.data_version,
+            "queries": self.queries,
+            "failed": self.failed,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration_seconds,
+            "runs": self.runs,
+        }
+
+
+def create_warmup_scheduler(specs: Optional[List[dict]] = None):
+    """
+    Build the scheduler configured by WARMUP_ENABLED, WARMUP_SPECS_FILE, WARMUP_CONCURRENCY
+    and WARMUP_CHECK_SECONDS. It is disabled when responses are not cached.
+    """
+    enabled = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    return WarmupScheduler(
+        specs if specs is not None else load_warmup_specs(),
+        enabled=enabled and not isinstance(response_cache.backend, NullBackend),
+        concurrency=int(os.getenv("WARMUP_CONCURRENCY", "2")),
+        check_seconds=float(os.getenv("WARMUP_CHECK_SECONDS", "30")),
+    )
+
+
+warmup_scheduler = create_warmup_scheduler()
@@ -0,0 +1,47 @@
+from typing import List, Tuple
+from sqlalchemy import BigInteger, String, column, func, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.models import Campaign, CampaignSummary
+from src.utils.log import Log  # Import the Log class for logging
+
+# Rows per UPDATE statement, 2 bind parameters each, well below the 32,767 asyncpg allows
+BULK_UPDATE_BATCH_SIZE = 1000
+
+
+def build_rename_statement(model, renames: List[Tuple[int, str]]):
+    """
+    UPDATE <model> SET campaign_name = updates.campaign_name FROM (VALUES ...) AS updates
+    WHERE <model>.campaign_id = updates.campaign_id
+    """
+    updates = values(column("campaign_id", BigInteger), column("campaign_name", String), name="updates").data(renames)
+    statement = (
+        update(model)
+        .where(model.campaign_id == updates.c.campaign_id)
+        .values(campaign_name=updates.c.campaign_name)
+        # No ORM objects are loaded for these rows, there is nothing to synchronize
+        .execution_options(synchronize_session=False)
+    )
+    if model is CampaignSummary:
+        statement = statement.values(updated_at=func.now())
+    return statement
+
+
+async def rename_campaigns(db: AsyncSession, renames: List[Tuple[int, str]], batch_size: int = BULK_UPDATE_BATCH_SIZE):
+    """
+    Rename campaigns with one UPDATE per batch of `batch_size` (campaign_id, name) pairs,
+    keeping their campaign_summary rows in sync. Nothing is committed, the caller commits
+    every batch at once. Returns the ids that do not exist.
+    """
+    try:
+        found = set()
+        for start in range(0, len(renames), batch_size):
+            batch = renames[start:start + batch_size]
+            renamed = await db.execute(build_rename_statement(Campaign, batch).returning(Campaign.campaign_id))
+            found.update(renamed.scalars())
+            await db.execute(build_rename_statement(CampaignSummary, batch))
+
+        return [campaign_id for campaign_id, _ in renames if campaign_id not in found]
+
+    except Exception as e:
+        Log.ERROR(f"Error in rename_campaigns: {str(e)}")
+        raise
@@ -1,37 +1,88 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
 import os
+import threading
 from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base, sessionmaker
 from urllib.parse import quote_plus
+from src.database.pool import pool_options
 from src.utils.log import Log
 
 load_dotenv()
 
-try:
-    DB_NAME = os.getenv("DB_NAME")
-    DB_USER = os.getenv("DB_USER")
-    DB_PASSWORD = quote_plus(os.getenv("DB_PASSWORD"))
-    DB_HOST = os.getenv("DB_HOST")
-    DB_PORT = os.getenv("DB_PORT")
+Base = declarative_base()
+
+# Sessions are bound to the engines when they are opened, see get_db and get_async_db
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def database_url(driver: str = "postgresql") -> str:
+    """Connection URL from the DB_* settings, e.g. with driver="postgresql+asyncpg"."""
+    missing = [name for name in ("DB_NAME", "DB_USER", "DB_PASSWORD", "DB_HOST", "DB_PORT") if not os.getenv(name)]
+    if missing:
+        raise RuntimeError(f"Database settings missing: {', '.join(missing)}")
+    password = quote_plus(os.getenv("DB_PASSWORD"))
+    return (f"{driver}://{os.getenv('DB_USER')}:{password}@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/"
+            f"{os.getenv('DB_NAME')}")
 
-    DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-    # Try to create the engine and session
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    Base = declarative_base()
+def _get_or_create(name: str, create):
+    engine = _engines.get(name)
+    if engine is None:
+        with _engines_lock:
+            engine = _engines.get(name)
+            if engine is None:
+                engine = _engines[name] = create()
+                Log.INFO(f"Database engine {name} created.")
+    return engine
 
-    Log.INFO("Database engine and session created successfully.")
 
-except Exception as e:
-    Log.ERROR(f"Error creating the database engine: {str(e)}")
+def get_engine():
+    """
+    The sync engine used by scripts and tests, created on first use. Creating an engine
+    does not connect yet, and the DB driver is only imported at that point.
+    """
+    # Pool sizing, timeouts, recycling and pre-ping come from the DB_POOL_* settings
+    return _get_or_create("sync", lambda: create_engine(database_url(), **pool_options()))
+
+
+def get_async_engine():
+    """The asyncpg engine serving the API handlers, created on first use."""
+    return _get_or_create("async", lambda: create_async_engine(
+        database_url("postgresql+asyncpg"), **pool_options(is_async=True)
+    ))
+
+
+async def dispose_engines():
+    """Close the pooled connections of the engines created so far."""
+    with _engines_lock:
+        engines = dict(_engines)
+        _engines.clear()
+    for name, engine in engines.items():
+        if name == "async":
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+def __getattr__(name):
+    # `engine` and `async_engine` are still importable, they are created on first access
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # Dependency to get DB session
 def get_db():
     db = None
     try:
-        db = SessionLocal()
+        db = SessionLocal(bind=get_engine())
         yield db
     except Exception as e:
         Log.ERROR(f"Error during DB session: {str(e)}")
@@ -39,3 +90,13 @@ def get_db():
     finally:
         if db:
             db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        try:
+            yield db
+        except Exception as e:
+            Log.ERROR(f"Error during async DB session: {str(e)}")
+            raise  # Re-raise the exception after logging
@@ -0,0 +1,408 @@
+import argparse
+from datetime import date
+from dotenv import load_dotenv
+from psycopg2 import sql
+from src.database.db_conn import create_connection
+from src.utils.log import Log  # Import the Log class for logging
+
+# Arbitrary key for the advisory lock that serializes concurrent migration runs
+MIGRATION_LOCK_ID = 4_810_223
+
+NATURAL_KEY_INDEX = "ad_group_stats_natural_key"
+
+CREATE_MIGRATIONS_TABLE_SQL = '''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(255) PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+'''
+
+BASE_TABLES_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS campaign (
+        campaign_id BIGINT PRIMARY KEY,
+        campaign_name VARCHAR(255) NOT NULL,
+        campaign_type VARCHAR(50) NOT NULL
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS ad_group (
+        ad_group_id BIGINT PRIMARY KEY,
+        ad_group_name VARCHAR(255) NOT NULL,
+        campaign_id BIGINT NOT NULL,
+        FOREIGN KEY (campaign_id) REFERENCES campaign(campaign_id) ON DELETE CASCADE
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS ad_group_stats (
+        stats_id SERIAL PRIMARY KEY,
+        date DATE NOT NULL,
+        ad_group_id BIGINT NOT NULL,
+        device VARCHAR(50) NOT NULL,
+        impressions DECIMAL(10, 2) NOT NULL,
+        clicks INT NOT NULL,
+        conversions DECIMAL(10, 2) NOT NULL,
+        cost DECIMAL(10, 2) NOT NULL,
+        FOREIGN KEY (ad_group_id) REFERENCES ad_group(ad_group_id) ON DELETE CASCADE
+    );
+    ''',
+]
+
+WATERMARK_TABLE_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS ingestion_watermark (
+        table_name VARCHAR(63) PRIMARY KEY,
+        max_date DATE NOT NULL,
+        updated_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+    ''',
+]
+
+ROLLUP_TABLES_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS ad_group_daily_stats (
+        date DATE NOT NULL,
+        ad_group_id BIGINT NOT NULL,
+        campaign_id BIGINT NOT NULL,
+        impressions DECIMAL(14, 2) NOT NULL,
+        clicks INT NOT NULL,
+        conversions DECIMAL(14, 2) NOT NULL,
+        cost DECIMAL(14, 2) NOT NULL,
+        PRIMARY KEY (date, ad_group_id)
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS campaign_daily_stats (
+        date DATE NOT NULL,
+        campaign_id BIGINT NOT NULL,
+        impressions DECIMAL(14, 2) NOT NULL,
+        clicks INT NOT NULL,
+        conversions DECIMAL(14, 2) NOT NULL,
+        cost DECIMAL(14, 2) NOT NULL,
+        PRIMARY KEY (date, campaign_id)
+    );
+    ''',
+]
+
+# Single-row counter bumped by every load, API response caches are keyed on it
+DATA_VERSION_TABLE_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS data_version (
+        id INT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+    ''',
+    "INSERT INTO data_version (id, version) VALUES (1, 0) ON CONFLICT (id) DO NOTHING",
+]
+
+# Per-namespace counters bumped by the API writes (campaign renames), read by every worker
+# alongside the data version so their cached responses of that namespace are recomputed
+CACHE_GENERATION_TABLE_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS cache_generation (
+        namespace TEXT PRIMARY KEY,
+        generation BIGINT NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT now()
+    );
+    ''',
+]
+
+# One row per campaign with the figures listed by GET /campaigns/summary, refreshed on
+# ingestion. The indexes serve its keyset pages and name prefix filter.
+CAMPAIGN_SUMMARY_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS campaign_summary (
+        campaign_id BIGINT PRIMARY KEY,
+        campaign_name VARCHAR(255) NOT NULL,
+        campaign_type VARCHAR(50) NOT NULL,
+        number_of_ad_groups INT NOT NULL,
+        average_monthly_cost DOUBLE PRECISION NOT NULL,
+        average_conversions DOUBLE PRECISION NOT NULL,
+        average_cost_per_conversion DOUBLE PRECISION NOT NULL,
+        updated_at TIMESTAMP NOT NULL DEFAULT now(),
+        FOREIGN KEY (campaign_id) REFERENCES campaign(campaign_id) ON DELETE CASCADE
+    );
+    ''',
+    "CREATE INDEX IF NOT EXISTS ix_campaign_summary_cost ON campaign_summary (average_monthly_cost, campaign_id)",
+    '''
+    CREATE INDEX IF NOT EXISTS ix_campaign_summary_cost_per_conversion
+    ON campaign_summary (average_cost_per_conversion, campaign_id)
+    ''',
+    # text_pattern_ops lets LIKE 'prefix%' use the index whatever the database collation
+    '''
+    CREATE INDEX IF NOT EXISTS ix_campaign_summary_name_prefix
+    ON campaign_summary (campaign_name text_pattern_ops)
+    ''',
+]
+
+# Stratified sample of ad_group_stats for precision=approx queries: every (date, device)
+# stratum keeps a simple random sample of its rows, and its population and sample sizes
+STATS_SAMPLE_SQL = [
+    '''
+    CREATE TABLE IF NOT EXISTS ad_group_stats_sample (
+        date DATE NOT NULL,
+        device VARCHAR(50) NOT NULL,
+        ad_group_id BIGINT NOT NULL,
+        campaign_id BIGINT NOT NULL,
+        impressions DECIMAL(10, 2) NOT NULL,
+        clicks INT NOT NULL,
+        conversions DECIMAL(10, 2) NOT NULL,
+        cost DECIMAL(10, 2) NOT NULL,
+        PRIMARY KEY (date, device, ad_group_id)
+    );
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS ad_group_stats_strata (
+        date DATE NOT NULL,
+        device VARCHAR(50) NOT NULL,
+        population_rows INT NOT NULL,
+        sample_rows INT NOT NULL,
+        PRIMARY KEY (date, device)
+    );
+    ''',
+]
+
+# Every performance query filters on a date range and optionally on ad groups or campaigns
+DATE_INDEXES_SQL = [
+    "CREATE INDEX IF NOT EXISTS ix_ad_group_stats_date_ad_group_id ON ad_group_stats (date, ad_group_id)",
+    "CREATE INDEX IF NOT EXISTS ix_ad_group_stats_ad_group_id_date ON ad_group_stats (ad_group_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_ad_group_daily_stats_ad_group_id_date ON ad_group_daily_stats (ad_group_id, date)",
+    "CREATE INDEX IF NOT EXISTS ix_campaign_daily_stats_campaign_id_date ON campaign_daily_stats (campaign_id, date)",
+]
+
+
+def ensure_natural_key(cursor):
+    """
+    Create the unique (date, ad_group_id, device) index on ad_group_stats.
+
+    Tables created before the key existed may hold duplicated rows from repeated loads,
+    these are collapsed to the oldest row first so the index can be built.
+    """
+    cursor.execute("SELECT to_regclass(%s)", (NATURAL_KEY_INDEX,))
+    if cursor.fetchone()[0] is not None:
+        return
+
+    cursor.execute('''
+        DELETE FROM ad_group_stats duplicate
+        USING ad_group_stats original
+        WHERE duplicate.date = original.date
+          AND duplicate.ad_group_id = original.ad_group_id
+          AND duplicate.device = original.device
+          AND duplicate.stats_id > original.stats_id;
+    ''')
+    cursor.execute(sql.SQL(
+        "CREATE UNIQUE INDEX IF NOT EXISTS {index} ON ad_group_stats (date, ad_group_id, device)"
+    ).format(index=sql.Identifier(NATURAL_KEY_INDEX)))
+
+
+def _run_statements(statements):
+    def migrate(cursor):
+        for statement in statements:
+            cursor.execute(statement)
+    return migrate
+
+
+def create_daily_rollups(cursor):
+    """Create the daily rollup tables and fill them from the stats already loaded."""
+    # Imported here because src.ingestion.rollups applies the migrations itself
+    from src.ingestion.rollups import refresh_rollups
+    _run_statements(ROLLUP_TABLES_SQL)(cursor)
+    refresh_rollups(cursor)
+
+
+def create_campaign_summary(cursor):
+    """Create the campaign_summary table and compute the row of every existing campaign."""
+    from src.ingestion.rollups import refresh_campaign_summary
+    _run_statements(CAMPAIGN_SUMMARY_SQL)(cursor)
+    refresh_campaign_summary(cursor)
+
+
+def create_stats_sample(cursor):
+    """Create the stats sample tables and draw the sample of the stats already loaded."""
+    from src.ingestion.rollups import refresh_stats_sample
+    _run_statements(STATS_SAMPLE_SQL)(cursor)
+    refresh_stats_sample(cursor)
+
+
+# Ordered list of (version, migration). Applied versions are recorded in schema_migrations,
+# new migrations are only ever appended. Every step is idempotent so that databases created
+# by older versions of the loader or by Base.metadata.create_all() can be brought up to date.
+MIGRATIONS = [
+    ("0001_base_tables", _run_statements(BASE_TABLES_SQL)),
+    ("0002_ingestion_watermark", _run_statements(WATERMARK_TABLE_SQL)),
+    ("0003_ad_group_stats_natural_key", ensure_natural_key),
+    ("0004_daily_rollups", create_daily_rollups),
+    ("0005_date_range_indexes", _run_statements(DATE_INDEXES_SQL)),
+    ("0006_data_version", _run_statements(DATA_VERSION_TABLE_SQL)),
+    ("0007_campaign_summary", create_campaign_summary),
+    ("0008_stats_sample", create_stats_sample),
+    ("0009_cache_generations", _run_statements(CACHE_GENERATION_TABLE_SQL)),
+]
+
+
+def applied_migrations(cursor):
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(cursor):
+    """Apply every pending migration on the cursor's transaction and return their versions."""
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+    cursor.execute(CREATE_MIGRATIONS_TABLE_SQL)
+    done = applied_migrations(cursor)
+
+    applied = []
+    for version, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        migrate(cursor)
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+        applied.append(version)
+    return applied
+
+
+def is_partitioned(cursor, table: str = "ad_group_stats"):
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))", (table,))
+    return cursor.fetchone()[0]
+
+
+def _month_start(day: date):
+    return day.replace(day=1)
+
+
+def _next_month(day: date):
+    return date(day.year + 1, 1, 1) if day.month == 12 else date(day.year, day.month + 1, 1)
+
+
+def _partition_name(month: date):
+    return f"ad_group_stats_y{month.year}m{month.month:02d}"
+
+
+def ensure_monthly_partitions(cursor, start_date: date, end_date: date):
+    """
+    Make sure a monthly partition of ad_group_stats exists for every month in the range.
+
+    Rows of a month that were routed to the default partition are moved into the new
+    partition before it is attached. Does nothing when the table is not partitioned.
+    """
+    if not is_partitioned(cursor):
+        return []
+
+    created = []
+    month = _month_start(start_date)
+    while month <= end_date:
+        name = _partition_name(month)
+        cursor.execute("SELECT to_regclass(%s)", (name,))
+        if cursor.fetchone()[0] is None:
+            bounds = (month, _next_month(month))
+            cursor.execute(sql.SQL(
+                "CREATE TABLE {name} (LIKE ad_group_stats INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            ).format(name=sql.Identifier(name)))
+            cursor.execute(sql.SQL(
+                "WITH moved AS (DELETE FROM ad_group_stats_default WHERE date >= %s AND date < %s RETURNING *) "
+                "INSERT INTO {name} SELECT * FROM moved"
+            ).format(name=sql.Identifier(name)), bounds)
+            cursor.execute(sql.SQL(
+                "ALTER TABLE ad_group_stats ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)"
+            ).format(name=sql.Identifier(name)), bounds)
+            created.append(name)
+        month = _next_month(month)
+    return created
+
+
+def partition_ad_group_stats_monthly(cursor):
+    """
+    Convert ad_group_stats into a table range-partitioned by month on `date`.
+
+    The rows are copied into one partition per month plus a default partition, the
+    stats_id sequence is kept, and the primary key becomes (stats_id, date) because
+    PostgreSQL requires the partition key in every unique constraint.
+    """
+    if is_partitioned(cursor):
+        return False
+
+    cursor.execute("SELECT pg_get_serial_sequence('ad_group_stats', 'stats_id')")
+    sequence = cursor.fetchone()[0]
+    cursor.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY NONE").format(sql.SQL(sequence)))
+    cursor.execute("ALTER TABLE ad_group_stats RENAME TO ad_group_stats_unpartitioned")
+
+    cursor.execute(sql.SQL('''
+        CREATE TABLE ad_group_stats (
+            stats_id INTEGER NOT NULL DEFAULT nextval({sequence}::regclass),
+            date DATE NOT NULL,
+            ad_group_id BIGINT NOT NULL,
+            device VARCHAR(50) NOT NULL,
+            impressions DECIMAL(10, 2) NOT NULL,
+            clicks INT NOT NULL,
+            conversions DECIMAL(10, 2) NOT NULL,
+            cost DECIMAL(10, 2) NOT NULL
+        ) PARTITION BY RANGE (date)
+    ''').format(sequence=sql.Literal(sequence)))
+    cursor.execute("CREATE TABLE ad_group_stats_default PARTITION OF ad_group_stats DEFAULT")
+
+    cursor.execute("SELECT MIN(date), MAX(date) FROM ad_group_stats_unpartitioned")
+    start_date, end_date = cursor.fetchone()
+    if start_date is not None:
+        month = _month_start(start_date)
+        while month <= end_date:
+            cursor.execute(sql.SQL("CREATE TABLE {name} PARTITION OF ad_group_stats FOR VALUES FROM (%s) TO (%s)").format(
+                name=sql.Identifier(_partition_name(month))
+            ), (month, _next_month(month)))
+            month = _next_month(month)
+
+    cursor.execute('''
+        INSERT INTO ad_group_stats (stats_id, date, ad_group_id, device, impressions, clicks, conversions, cost)
+        SELECT stats_id, date, ad_group_id, device, impressions, clicks, conversions, cost
+        FROM ad_group_stats_unpartitioned
+    ''')
+    cursor.execute("DROP TABLE ad_group_stats_unpartitioned")
+
+    # Indexes and constraints are created on the parent once the old table and its index names are gone
+    cursor.execute("ALTER TABLE ad_group_stats ADD PRIMARY KEY (stats_id, date)")
+    cursor.execute('''
+        ALTER TABLE ad_group_stats ADD FOREIGN KEY (ad_group_id)
+        REFERENCES ad_group(ad_group_id) ON DELETE CASCADE
+    ''')
+    ensure_natural_key(cursor)
+    for statement in DATE_INDEXES_SQL:
+        cursor.execute(statement)
+    cursor.execute(sql.SQL("ALTER SEQUENCE {} OWNED BY ad_group_stats.stats_id").format(sql.SQL(sequence)))
+    return True
+
+
+def run_migrations(partition_monthly: bool = False):
+    connection = create_connection()
+    if connection is None:
+        raise RuntimeError("Could not connect to PostgreSQL")
+
+    try:
+        cursor = connection.cursor()
+        applied = apply_migrations(cursor)
+        partitioned = partition_ad_group_stats_monthly(cursor) if partition_monthly else False
+        connection.commit()
+        cursor.close()
+
+        Log.INFO(f"Applied migrations: {applied or 'none'}, partitioned ad_group_stats: {partitioned}.")
+        return applied, partitioned
+
+    except Exception as e:
+        connection.rollback()
+        Log.ERROR(f"Error applying migrations: {str(e)}")
+        raise
+
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument("--partition-monthly", action="store_true",
+                        help="Convert ad_group_stats to monthly range partitions on date.")
+    args = parser.parse_args()
+
+    applied, partitioned = run_migrations(partition_monthly=args.partition_monthly)
+    print(f"Applied migrations: {', '.join(applied) if applied else 'none'}")
+    if partitioned:
+        print("ad_group_stats converted to monthly partitions.")
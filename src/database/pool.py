@@ -0,0 +1,141 @@
+import os
+import threading
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool, NullPool
+
+# Upper bounds of the checkout wait time histogram buckets, in milliseconds
+WAIT_BUCKETS_MS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+POOL_MODES = ("queue", "null")
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
+class PoolMetrics:
+    """Checkout counters and wait time histogram shared by a pool and the pools it is recreated as."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_checkout(self, seconds: float):
+        milliseconds = seconds * 1000
+        bucket = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if milliseconds <= bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self.wait_buckets[bucket] += 1
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "wait_histogram": dict(zip(labels, self.wait_buckets)),
+            }
+
+
+class _TimedPoolMixin:
+    """Records how long every checkout waited, including connecting and the pre-ping."""
+
+    def __init__(self, *args, metrics: PoolMetrics = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics or PoolMetrics()
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started_at)
+        return connection
+
+    def recreate(self):
+        # dispose() replaces the pool, the counters carry over to the new one
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class TimedNullPool(_TimedPoolMixin, NullPool):
+    pass
+
+
+def pool_options(is_async: bool = False):
+    """
+    Keyword arguments for create_engine / create_async_engine, read from the environment.
+
+    DB_POOL_MODE=queue (default) keeps a pool of DB_POOL_SIZE connections plus up to
+    DB_MAX_OVERFLOW extra ones, DB_SYNC_POOL_SIZE and DB_SYNC_MAX_OVERFLOW size the sync
+    engine's pool separately when set. DB_POOL_MODE=null opens a connection per checkout and
+    leaves pooling to PgBouncer. DB_PGBOUNCER_TRANSACTION_MODE=true turns off the asyncpg
+    prepared statement caches, which do not survive PgBouncer's transaction pooling.
+    """
+    mode = os.getenv("DB_POOL_MODE", "queue").lower()
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {', '.join(POOL_MODES)}, got {mode!r}")
+
+    options = {}
+    if mode == "null":
+        options["poolclass"] = TimedNullPool
+    else:
+        pool_size = os.getenv("DB_POOL_SIZE", "5")
+        max_overflow = os.getenv("DB_MAX_OVERFLOW", "10")
+        if not is_async:
+            pool_size = os.getenv("DB_SYNC_POOL_SIZE") or pool_size
+            max_overflow = os.getenv("DB_SYNC_MAX_OVERFLOW") or max_overflow
+        options.update(
+            poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+            pool_size=int(pool_size),
+            max_overflow=int(max_overflow),
+            pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+        )
+
+    if is_async and _env_bool("DB_PGBOUNCER_TRANSACTION_MODE", False):
+        options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+
+    return options
+
+
+def pool_status(engine):
+    """Live state of an engine's pool together with its checkout metrics."""
+    pool = engine.pool
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        status.update(metrics.snapshot())
+    return status
@@ -0,0 +1,34 @@
+from sqlalchemy import Float, cast
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def as_float(expression):
+    """
+    `expression` as DOUBLE PRECISION. The measures are DECIMAL columns: asyncpg decodes each
+    of their values into a Decimal, which SQLAlchemy then converts to float one at a time,
+    while float8 values are decoded straight into floats.
+    """
+    return cast(expression, Float)
+
+
+async def _execute(db: AsyncSession, statement):
+    # Core execution on the session's connection and transaction, without the ORM layer:
+    # no ORM compile state, no entities loaded and nothing added to the identity map.
+    # The compiled SQL is cached per engine and reused by every statement of the same shape.
+    connection = await db.connection()
+    return await connection.execute(statement)
+
+
+async def fetch_all(db: AsyncSession, statement):
+    """Rows of a read-only statement, as named tuples."""
+    return (await _execute(db, statement)).all()
+
+
+async def fetch_one(db: AsyncSession, statement):
+    """The single row of a read-only statement, e.g. an aggregate without GROUP BY."""
+    return (await _execute(db, statement)).one()
+
+
+async def fetch_scalar(db: AsyncSession, statement):
+    """First column of the first row, or None."""
+    return (await _execute(db, statement)).scalar()
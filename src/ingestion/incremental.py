@@ -0,0 +1,31 @@
+from datetime import date, timedelta
+from typing import Optional
+from psycopg2 import sql
+
+
+def get_watermark(cursor, table: str) -> Optional[date]:
+    """Latest date loaded into `table`, or None if it was never loaded incrementally."""
+    cursor.execute("SELECT max_date FROM ingestion_watermark WHERE table_name = %s", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def update_watermark(cursor, table: str, staging: str):
+    """Advance the watermark of `table` to the latest date present in its staging table."""
+    cursor.execute(sql.SQL('''
+        INSERT INTO ingestion_watermark (table_name, max_date, updated_at)
+        SELECT %s, MAX(date), now() FROM {staging} HAVING MAX(date) IS NOT NULL
+        ON CONFLICT (table_name) DO UPDATE
+        SET max_date = GREATEST(ingestion_watermark.max_date, EXCLUDED.max_date),
+            updated_at = EXCLUDED.updated_at
+    ''').format(staging=sql.Identifier(staging)), (table,))
+
+
+def incremental_start_date(watermark: Optional[date], lookback_days: int = 0) -> Optional[date]:
+    """
+    First date an incremental run has to load. Rows from the last `lookback_days` before
+    the watermark are reloaded too so late corrections are picked up.
+    """
+    if watermark is None:
+        return None
+    return watermark - timedelta(days=lookback_days) + timedelta(days=1)
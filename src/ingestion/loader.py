@@ -0,0 +1,263 @@
+import io
+import time
+from datetime import date
+from typing import Optional
+import pandas as pd
+from psycopg2 import sql
+from src.cache.response_cache import bump_data_version
+from src.database.db_conn import create_connection
+from src.database.migrations import apply_migrations, ensure_monthly_partitions
+from src.ingestion.incremental import get_watermark, update_watermark, incremental_start_date
+from src.ingestion.rollups import refresh_campaign_summary, refresh_rollups, refresh_stats_sample
+from src.ingestion.readers import resolve_sources, iter_source_chunks, peak_rss_mb
+from src.utils.log import Log  # Import the Log class for logging
+
+DEFAULT_FILE_PATH = './data/Kaya_Hometask_Data_Nike.xlsx'
+DEFAULT_CHUNK_SIZE = 50_000
+
+# Tables are loaded parent-first so that foreign keys resolve
+LOAD_ORDER = ["campaign", "ad_group", "ad_group_stats"]
+
+TABLE_COLUMNS = {
+    "campaign": ["campaign_id", "campaign_name", "campaign_type"],
+    "ad_group": ["ad_group_id", "ad_group_name", "campaign_id"],
+    "ad_group_stats": ["date", "ad_group_id", "device", "impressions", "clicks", "conversions", "cost"],
+}
+
+# Spreadsheet cells often come back as floats, these are cast back before COPY
+INTEGER_COLUMNS = {"campaign_id", "ad_group_id", "clicks"}
+
+# Key each table is merged on
+NATURAL_KEYS = {
+    "campaign": ["campaign_id"],
+    "ad_group": ["ad_group_id"],
+    "ad_group_stats": ["date", "ad_group_id", "device"],
+}
+
+# Tables whose existing rows are updated from the source, the others keep ON CONFLICT DO NOTHING.
+# Metric columns of rows sharing a key within one load are summed.
+UPSERT_TABLES = {"ad_group_stats"}
+
+def iter_frame_chunks(df: pd.DataFrame, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Split an in-memory DataFrame into fixed-size chunks."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def _column_list(columns):
+    return sql.SQL(", ").join(map(sql.Identifier, columns))
+
+
+class TableLoader:
+    """
+    Streams DataFrame chunks into one table through a temporary staging table.
+
+    Each chunk is sent with COPY FROM STDIN into the staging table, and `finish()` merges
+    the staged rows into the target with a single INSERT ... SELECT. Tables in
+    UPSERT_TABLES are upserted on their natural key and only rows whose values changed
+    are rewritten, the others keep ON CONFLICT DO NOTHING.
+
+    When `min_date` is set, rows dated before it are dropped before they are sent.
+    """
+
+    def __init__(self, cursor, table: str, min_date: Optional[date] = None):
+        self.cursor = cursor
+        self.table = table
+        self.columns = TABLE_COLUMNS[table]
+        self.key = NATURAL_KEYS[table]
+        self.min_date = min_date if "date" in self.columns else None
+        self.staging = f"staging_{table}"
+        self.rows_read = 0
+        self.rows_skipped = 0
+        self.rows_written = 0
+        self.date_range = None
+        self.started_at = time.perf_counter()
+        self._create_staging_table()
+
+    def _create_staging_table(self):
+        self.cursor.execute(sql.SQL(
+            "CREATE TEMP TABLE IF NOT EXISTS {staging} ON COMMIT DROP AS SELECT {columns} FROM {table} WITH NO DATA"
+        ).format(
+            staging=sql.Identifier(self.staging),
+            columns=_column_list(self.columns),
+            table=sql.Identifier(self.table),
+        ))
+        self.cursor.execute(sql.SQL("TRUNCATE {staging}").format(staging=sql.Identifier(self.staging)))
+
+    def _merge_statement(self):
+        table = sql.Identifier(self.table)
+        staging = sql.Identifier(self.staging)
+        key = _column_list(self.key)
+
+        if self.table not in UPSERT_TABLES:
+            return sql.SQL(
+                "INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} ON CONFLICT ({key}) DO NOTHING"
+            ).format(table=table, columns=_column_list(self.columns), staging=staging, key=key)
+
+        values = [sql.Identifier(column) for column in self.columns if column not in self.key]
+        return sql.SQL(
+            "INSERT INTO {table} ({key}, {values}) "
+            "SELECT {key}, {sums} FROM {staging} GROUP BY {key} "
+            "ON CONFLICT ({key}) DO UPDATE SET {assignments} "
+            "WHERE ({current}) IS DISTINCT FROM ({excluded})"
+        ).format(
+            table=table,
+            key=key,
+            values=sql.SQL(", ").join(values),
+            sums=sql.SQL(", ").join(sql.SQL("SUM({})").format(value) for value in values),
+            staging=staging,
+            assignments=sql.SQL(", ").join(sql.SQL("{0} = EXCLUDED.{0}").format(value) for value in values),
+            current=sql.SQL(", ").join(sql.SQL("{}.{}").format(table, value) for value in values),
+            excluded=sql.SQL(", ").join(sql.SQL("EXCLUDED.{}").format(value) for value in values),
+        )
+
+    def load_chunk(self, chunk: pd.DataFrame):
+        """COPY one chunk into the staging table and return the number of rows sent."""
+        if chunk.empty:
+            return 0
+
+        self.rows_read += len(chunk)
+        chunk = chunk[self.columns].copy()
+        for column in INTEGER_COLUMNS.intersection(self.columns):
+            chunk[column] = pd.to_numeric(chunk[column]).round().astype("Int64")
+
+        if self.min_date is not None:
+            keep = pd.to_datetime(chunk["date"]).dt.date >= self.min_date
+            self.rows_skipped += int((~keep).sum())
+            chunk = chunk[keep]
+            if chunk.empty:
+                return 0
+
+        buffer = io.StringIO()
+        chunk.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        self.cursor.copy_expert(sql.SQL("COPY {staging} ({columns}) FROM STDIN WITH (FORMAT csv)").format(
+            staging=sql.Identifier(self.staging),
+            columns=_column_list(self.columns),
+        ), buffer)
+        return len(chunk)
+
+    def finish(self):
+        """Merge the staged rows into the target table and advance its watermark."""
+        if "date" in self.columns:
+            self.cursor.execute(sql.SQL("SELECT MIN(date), MAX(date) FROM {staging}").format(
+                staging=sql.Identifier(self.staging)
+            ))
+            start, end = self.cursor.fetchone()
+            self.date_range = (start, end) if start is not None else None
+
+        # New months need their partition before rows are routed to it
+        if self.table == "ad_group_stats" and self.date_range:
+            ensure_monthly_partitions(self.cursor, *self.date_range)
+
+        self.cursor.execute(self._merge_statement())
+        self.rows_written = self.cursor.rowcount
+
+        if "date" in self.columns:
+            update_watermark(self.cursor, self.table, self.staging)
+
+        self.cursor.execute(sql.SQL("TRUNCATE {staging}").format(staging=sql.Identifier(self.staging)))
+        return self.rows_written
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.elapsed if self.elapsed > 0 else 0
+
+    def summary(self):
+        return {
+            "rows_read": self.rows_read,
+            "rows_skipped": self.rows_skipped,
+            "rows_written": self.rows_written,
+            "date_range": [day.isoformat() for day in self.date_range] if self.date_range else None,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+
+def load_table(cursor, table: str, chunks, min_date: Optional[date] = None, on_progress=None):
+    """
+    Load every chunk into `table` and return the loader's summary. After each chunk,
+    `on_progress(table, rows_read, rows_per_second)` is called when it is given.
+    """
+    loader = TableLoader(cursor, table, min_date=min_date)
+    for chunk in chunks:
+        loader.load_chunk(chunk)
+        if on_progress is not None:
+            on_progress(table, loader.rows_read, loader.rows_per_second)
+    loader.finish()
+    return loader.summary()
+
+
+def run_ingestion(source_path: str = DEFAULT_FILE_PATH, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  incremental: bool = False, lookback_days: int = 0, on_progress=None):
+    """
+    Stream campaign, ad group and stats data into PostgreSQL in a single transaction.
+
+    `source_path` is an XLSX workbook or a directory of per-table CSV/Parquet files.
+    Stats rows are upserted on (date, ad_group_id, device), so re-running a load does not
+    duplicate them. With `incremental`, only stats dated after the stored watermark
+    (minus `lookback_days`) are sent to the database. `on_progress` is passed to load_table.
+
+    The daily rollups and the stats sample are refreshed for the dates present in the load.
+
+    Returns a per-table summary with row counts, throughput and the peak RSS of the run.
+    """
+    sources = resolve_sources(source_path, LOAD_ORDER)
+
+    connection = create_connection()
+    if connection is None:
+        raise RuntimeError("Could not connect to PostgreSQL")
+
+    started_at = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        apply_migrations(cursor)
+
+        summary = {"tables": {}, "incremental": incremental}
+        for table in LOAD_ORDER:
+            min_date = None
+            if incremental and "date" in TABLE_COLUMNS[table]:
+                min_date = incremental_start_date(get_watermark(cursor, table), lookback_days)
+            source_format, path = sources[table]
+            chunks = iter_source_chunks(source_format, path, table, chunk_size)
+            summary["tables"][table] = load_table(cursor, table, chunks, min_date=min_date,
+                                                   on_progress=on_progress)
+
+        # Only the days touched by this load need their rollups recomputed
+        stats_range = summary["tables"]["ad_group_stats"]["date_range"]
+        if stats_range:
+            refresh_rollups(cursor, *stats_range)
+            refresh_stats_sample(cursor, *stats_range)
+            summary["campaigns_refreshed"] = refresh_campaign_summary(cursor, *stats_range)
+        else:
+            summary["campaigns_refreshed"] = refresh_campaign_summary(cursor, stats_changed=False)
+        summary["rollup_range"] = stats_range
+
+        # Cached API responses are recomputed once this load commits
+        bump_data_version(cursor)
+
+        connection.commit()
+        cursor.close()
+
+        total_rows = sum(table["rows_read"] for table in summary["tables"].values())
+        seconds = time.perf_counter() - started_at
+        summary["rows_read"] = total_rows
+        summary["seconds"] = round(seconds, 3)
+        summary["rows_per_second"] = round(total_rows / seconds if seconds > 0 else 0, 1)
+        summary["peak_rss_mb"] = peak_rss_mb()
+
+        Log.INFO(f"Ingestion of {source_path} finished: {total_rows} rows in {seconds:.2f}s.")
+        return summary
+
+    except Exception as e:
+        connection.rollback()
+        Log.ERROR(f"Error during ingestion of {source_path}: {str(e)}")
+        raise
+
+    finally:
+        connection.close()
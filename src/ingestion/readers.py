@@ -0,0 +1,119 @@
+import os
+import sys
+import pandas as pd
+
+SUPPORTED_FORMATS = {
+    ".xlsx": "xlsx",
+    ".csv": "csv",
+    ".parquet": "parquet",
+}
+
+
+class SourceError(ValueError):
+    """Raised when an ingestion source cannot be resolved or read."""
+
+
+def iter_xlsx_chunks(path: str, sheet: str, chunk_size: int):
+    """
+    Stream one worksheet in read-only mode so that only `chunk_size` rows are held in memory.
+    The first row of the sheet is used as the header.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        if sheet not in workbook.sheetnames:
+            raise SourceError(f"Sheet '{sheet}' not found in {path}")
+
+        rows = workbook[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+
+        # The sheet dimension can be wider than the data, drop the unnamed trailing columns
+        width = max((i + 1 for i, name in enumerate(header) if name is not None), default=0)
+        header = header[:width]
+
+        buffer = []
+        for row in rows:
+            row = row[:width]
+            # Read-only worksheets report formatted but empty trailing rows as all None
+            if all(value is None for value in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_size:
+                yield pd.DataFrame.from_records(buffer, columns=header)
+                buffer = []
+
+        if buffer:
+            yield pd.DataFrame.from_records(buffer, columns=header)
+
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path: str, chunk_size: int):
+    yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def iter_parquet_chunks(path: str, chunk_size: int):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise SourceError("Reading Parquet sources requires the 'pyarrow' package") from e
+
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+def resolve_sources(source_path: str, tables):
+    """
+    Map every table to the file it is read from.
+
+    `source_path` is either an XLSX workbook with one sheet per table, or a directory
+    holding one `<table>.csv` or `<table>.parquet` file per table.
+    """
+    if os.path.isdir(source_path):
+        sources = {}
+        for table in tables:
+            for extension, source_format in SUPPORTED_FORMATS.items():
+                candidate = os.path.join(source_path, f"{table}{extension}")
+                if source_format != "xlsx" and os.path.exists(candidate):
+                    sources[table] = (source_format, candidate)
+                    break
+            else:
+                raise SourceError(f"No CSV or Parquet file found for table '{table}' in {source_path}")
+        return sources
+
+    extension = os.path.splitext(source_path)[1].lower()
+    if SUPPORTED_FORMATS.get(extension) != "xlsx":
+        raise SourceError(
+            f"Unsupported source {source_path}: expected an .xlsx workbook or a directory of CSV/Parquet files"
+        )
+    if not os.path.exists(source_path):
+        raise SourceError(f"Source file {source_path} does not exist")
+    return {table: ("xlsx", source_path) for table in tables}
+
+
+def iter_source_chunks(source_format: str, path: str, table: str, chunk_size: int):
+    if source_format == "xlsx":
+        return iter_xlsx_chunks(path, table, chunk_size)
+    if source_format == "csv":
+        return iter_csv_chunks(path, chunk_size)
+    if source_format == "parquet":
+        return iter_parquet_chunks(path, chunk_size)
+    raise SourceError(f"Unsupported source format '{source_format}'")
+
+
+def peak_rss_mb():
+    """Peak resident set size of the current process in MB, or None where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
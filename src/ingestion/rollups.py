@@ -0,0 +1,194 @@
+import os
+from datetime import date
+from typing import Optional
+from dotenv import load_dotenv
+from src.cache.response_cache import bump_data_version
+from src.database.db_conn import create_connection
+from src.database.migrations import apply_migrations
+from src.utils.log import Log  # Import the Log class for logging
+
+# Both statements take the same (start, end) date bounds, NULL bounds mean unbounded
+_DATE_FILTER = "(%(start)s::date IS NULL OR {column} >= %(start)s) AND (%(end)s::date IS NULL OR {column} <= %(end)s)"
+
+REFRESH_AD_GROUP_ROLLUP_SQL = [
+    "DELETE FROM ad_group_daily_stats WHERE " + _DATE_FILTER.format(column="date"),
+    '''
+    INSERT INTO ad_group_daily_stats (date, ad_group_id, campaign_id, impressions, clicks, conversions, cost)
+    SELECT s.date, s.ad_group_id, g.campaign_id,
+           SUM(s.impressions), SUM(s.clicks), SUM(s.conversions), SUM(s.cost)
+    FROM ad_group_stats s
+    JOIN ad_group g ON g.ad_group_id = s.ad_group_id
+    WHERE ''' + _DATE_FILTER.format(column="s.date") + '''
+    GROUP BY s.date, s.ad_group_id, g.campaign_id
+    ''',
+]
+
+REFRESH_CAMPAIGN_ROLLUP_SQL = [
+    "DELETE FROM campaign_daily_stats WHERE " + _DATE_FILTER.format(column="date"),
+    '''
+    INSERT INTO campaign_daily_stats (date, campaign_id, impressions, clicks, conversions, cost)
+    SELECT date, campaign_id, SUM(impressions), SUM(clicks), SUM(conversions), SUM(cost)
+    FROM ad_group_daily_stats
+    WHERE ''' + _DATE_FILTER.format(column="date") + '''
+    GROUP BY date, campaign_id
+    ''',
+]
+
+
+# Campaigns to refresh: those with stats on the given dates, when stats were loaded, and
+# those whose name, type or ad group count no longer match their summary row. The figures
+# are the ones GET /campaigns computes: per-ad-group averages over all of its stats rows,
+# averaged over the campaign's ad groups, and their cost per conversion.
+REFRESH_CAMPAIGN_SUMMARY_SQL = '''
+    WITH ad_group_counts AS (
+        SELECT campaign_id, COUNT(*) AS number_of_ad_groups FROM ad_group GROUP BY campaign_id
+    ),
+    stale AS (
+        SELECT c.campaign_id
+        FROM campaign c
+        LEFT JOIN ad_group_counts g ON g.campaign_id = c.campaign_id
+        LEFT JOIN campaign_summary s ON s.campaign_id = c.campaign_id
+        WHERE s.campaign_id IS NULL
+           OR s.campaign_name <> c.campaign_name
+           OR s.campaign_type <> c.campaign_type
+           OR s.number_of_ad_groups <> COALESCE(g.number_of_ad_groups, 0)
+        UNION
+        SELECT DISTINCT campaign_id FROM ad_group_daily_stats
+        WHERE %(stats_changed)s AND ''' + _DATE_FILTER.format(column="date") + '''
+    ),
+    ad_group_averages AS (
+        SELECT g.campaign_id, g.ad_group_id,
+               COALESCE(AVG(s.cost), 0) AS average_cost,
+               COALESCE(AVG(s.conversions), 0) AS average_conversions
+        FROM ad_group g
+        LEFT JOIN ad_group_stats s ON s.ad_group_id = g.ad_group_id
+        WHERE g.campaign_id IN (SELECT campaign_id FROM stale)
+        GROUP BY g.campaign_id, g.ad_group_id
+    )
+    INSERT INTO campaign_summary (campaign_id, campaign_name, campaign_type, number_of_ad_groups,
+                                  average_monthly_cost, average_conversions, average_cost_per_conversion, updated_at)
+    SELECT c.campaign_id, c.campaign_name, c.campaign_type, COUNT(a.ad_group_id),
+           COALESCE(SUM(a.average_cost) / NULLIF(COUNT(a.ad_group_id), 0), 0)::float8,
+           COALESCE(SUM(a.average_conversions) / NULLIF(COUNT(a.ad_group_id), 0), 0)::float8,
+           CASE WHEN SUM(a.average_conversions) > 0 THEN SUM(a.average_cost) / SUM(a.average_conversions)
+                ELSE 0 END::float8,
+           now()
+    FROM campaign c
+    LEFT JOIN ad_group_averages a ON a.campaign_id = c.campaign_id
+    WHERE c.campaign_id IN (SELECT campaign_id FROM stale)
+    GROUP BY c.campaign_id, c.campaign_name, c.campaign_type
+    ON CONFLICT (campaign_id) DO UPDATE SET
+        campaign_name = EXCLUDED.campaign_name,
+        campaign_type = EXCLUDED.campaign_type,
+        number_of_ad_groups = EXCLUDED.number_of_ad_groups,
+        average_monthly_cost = EXCLUDED.average_monthly_cost,
+        average_conversions = EXCLUDED.average_conversions,
+        average_cost_per_conversion = EXCLUDED.average_cost_per_conversion,
+        updated_at = EXCLUDED.updated_at
+'''
+
+
+# Fraction of the rows of every (date, device) stratum kept in ad_group_stats_sample, and
+# the minimum kept per stratum. Smaller strata are kept whole, and their estimates are exact.
+SAMPLE_RATE = float(os.getenv("ANALYTICS_SAMPLE_RATE", "0.01"))
+SAMPLE_MIN_ROWS = int(os.getenv("ANALYTICS_SAMPLE_MIN_ROWS", "30"))
+
+_SAMPLE_SIZE = "LEAST({population}, GREATEST(%(min_rows)s, CEIL(%(rate)s * {population})))"
+
+# The rows of a stratum are ranked by a hash of their date and ad group, which is a random
+# order that does not change between refreshes of the same data
+REFRESH_STATS_SAMPLE_SQL = [
+    "DELETE FROM ad_group_stats_sample WHERE " + _DATE_FILTER.format(column="date"),
+    "DELETE FROM ad_group_stats_strata WHERE " + _DATE_FILTER.format(column="date"),
+    '''
+    INSERT INTO ad_group_stats_sample (date, device, ad_group_id, campaign_id, impressions, clicks, conversions, cost)
+    SELECT date, device, ad_group_id, campaign_id, impressions, clicks, conversions, cost
+    FROM (
+        SELECT s.date, s.device, s.ad_group_id, g.campaign_id, s.impressions, s.clicks, s.conversions, s.cost,
+               ROW_NUMBER() OVER (PARTITION BY s.date, s.device
+                                  ORDER BY md5(s.date::text || ':' || s.device || ':' || s.ad_group_id::text)) AS position,
+               COUNT(*) OVER (PARTITION BY s.date, s.device) AS population_rows
+        FROM ad_group_stats s
+        JOIN ad_group g ON g.ad_group_id = s.ad_group_id
+        WHERE ''' + _DATE_FILTER.format(column="s.date") + '''
+    ) ranked
+    WHERE position <= ''' + _SAMPLE_SIZE.format(population="population_rows") + '''
+    ''',
+    '''
+    INSERT INTO ad_group_stats_strata (date, device, population_rows, sample_rows)
+    SELECT date, device, COUNT(*), ''' + _SAMPLE_SIZE.format(population="COUNT(*)") + '''
+    FROM ad_group_stats
+    WHERE ''' + _DATE_FILTER.format(column="date") + '''
+    GROUP BY date, device
+    ''',
+]
+
+
+def refresh_rollups(cursor, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """
+    Recompute the daily ad group and campaign rollups for the given dates.
+    Without bounds every day is rebuilt.
+    """
+    params = {"start": start_date, "end": end_date}
+    for statement in REFRESH_AD_GROUP_ROLLUP_SQL + REFRESH_CAMPAIGN_ROLLUP_SQL:
+        cursor.execute(statement, params)
+
+
+def refresh_stats_sample(cursor, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         rate: float = None, min_rows: int = None):
+    """
+    Re-draw the stratified sample of ad_group_stats for the given dates, keeping `rate`
+    (default ANALYTICS_SAMPLE_RATE) of every (date, device) stratum and at least `min_rows`
+    (default ANALYTICS_SAMPLE_MIN_ROWS) of its rows. Without bounds every day is re-drawn.
+    """
+    params = {"start": start_date, "end": end_date, "rate": SAMPLE_RATE if rate is None else rate,
+              "min_rows": SAMPLE_MIN_ROWS if min_rows is None else min_rows}
+    for statement in REFRESH_STATS_SAMPLE_SQL:
+        cursor.execute(statement, params)
+
+
+def refresh_campaign_summary(cursor, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                             stats_changed: bool = True):
+    """
+    Recompute the campaign_summary rows of the campaigns with stats on the given dates,
+    and of the campaigns added or changed since their row was computed. Run it after
+    refresh_rollups, with stats_changed=False when the load had no stats rows. Returns the
+    number of refreshed campaigns.
+    """
+    cursor.execute(REFRESH_CAMPAIGN_SUMMARY_SQL, {"start": start_date, "end": end_date, "stats_changed": stats_changed})
+    return cursor.rowcount
+
+
+def rebuild_rollups():
+    """
+    Rebuild both rollup tables, the stats sample and the campaign summary from
+    ad_group_stats, for example after upgrading an existing database.
+    """
+    connection = create_connection()
+    if connection is None:
+        raise RuntimeError("Could not connect to PostgreSQL")
+
+    try:
+        cursor = connection.cursor()
+        apply_migrations(cursor)
+        refresh_rollups(cursor)
+        refresh_stats_sample(cursor)
+        refresh_campaign_summary(cursor)
+        bump_data_version(cursor)
+        connection.commit()
+        cursor.close()
+        Log.INFO("Daily rollups, stats sample and campaign summary rebuilt successfully.")
+
+    except Exception as e:
+        connection.rollback()
+        Log.ERROR(f"Error rebuilding daily rollups: {str(e)}")
+        raise
+
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    rebuild_rollups()
+    print("Daily rollups, stats sample and campaign summary rebuilt successfully!")
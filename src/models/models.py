@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Date, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from src.database.database import Base
 from src.utils.log import Log  # Import the Log class for logging
@@ -6,22 +6,22 @@ from src.utils.log import Log  # Import the Log class for logging
 try:
     class Campaign(Base):
         __tablename__ = 'campaign'
-        campaign_id = Column(Integer, primary_key=True, index=True)
+        campaign_id = Column(BigInteger, primary_key=True, index=True)
         campaign_name = Column(String, index=True)
         campaign_type = Column(String)
 
     class AdGroup(Base):
         __tablename__ = 'ad_group'
-        ad_group_id = Column(Integer, primary_key=True, index=True)
+        ad_group_id = Column(BigInteger, primary_key=True, index=True)
         ad_group_name = Column(String)
-        campaign_id = Column(Integer, ForeignKey('campaign.campaign_id'))
+        campaign_id = Column(BigInteger, ForeignKey('campaign.campaign_id'))
         campaign = relationship('Campaign', back_populates='ad_groups')
 
     class AdGroupStats(Base):
         __tablename__ = 'ad_group_stats'
         stats_id = Column(Integer, primary_key=True, index=True)
         date = Column(Date)
-        ad_group_id = Column(Integer, ForeignKey('ad_group.ad_group_id'))
+        ad_group_id = Column(BigInteger, ForeignKey('ad_group.ad_group_id'))
         device = Column(String)
         impressions = Column(Float)
         clicks = Column(Integer)
@@ -29,11 +29,100 @@ try:
         cost = Column(Float)
         ad_group = relationship('AdGroup', back_populates='stats')
 
+        # Kept in sync with src/database/migrations.py
+        __table_args__ = (
+            # Natural key used by the ingestion upsert
+            Index('ad_group_stats_natural_key', 'date', 'ad_group_id', 'device', unique=True),
+            Index('ix_ad_group_stats_date_ad_group_id', 'date', 'ad_group_id'),
+            Index('ix_ad_group_stats_ad_group_id_date', 'ad_group_id', 'date'),
+        )
+
+    class AdGroupDailyStats(Base):
+        """Daily per-ad-group rollup of ad_group_stats, refreshed on ingestion."""
+        __tablename__ = 'ad_group_daily_stats'
+        date = Column(Date, primary_key=True)
+        ad_group_id = Column(BigInteger, primary_key=True)
+        campaign_id = Column(BigInteger)
+        impressions = Column(Float)
+        clicks = Column(Integer)
+        conversions = Column(Float)
+        cost = Column(Float)
+
+        __table_args__ = (
+            Index('ix_ad_group_daily_stats_ad_group_id_date', 'ad_group_id', 'date'),
+        )
+
+    class CampaignDailyStats(Base):
+        """Daily per-campaign rollup of ad_group_stats, refreshed on ingestion."""
+        __tablename__ = 'campaign_daily_stats'
+        date = Column(Date, primary_key=True)
+        campaign_id = Column(BigInteger, primary_key=True)
+        impressions = Column(Float)
+        clicks = Column(Integer)
+        conversions = Column(Float)
+        cost = Column(Float)
+
+        __table_args__ = (
+            Index('ix_campaign_daily_stats_campaign_id_date', 'campaign_id', 'date'),
+        )
+
+    class CampaignSummary(Base):
+        """Per-campaign figures served by GET /campaigns/summary, refreshed on ingestion."""
+        __tablename__ = 'campaign_summary'
+        campaign_id = Column(BigInteger, ForeignKey('campaign.campaign_id', ondelete='CASCADE'), primary_key=True)
+        campaign_name = Column(String, nullable=False)
+        campaign_type = Column(String, nullable=False)
+        number_of_ad_groups = Column(Integer, nullable=False)
+        average_monthly_cost = Column(Float, nullable=False)
+        average_conversions = Column(Float, nullable=False)
+        average_cost_per_conversion = Column(Float, nullable=False)
+        updated_at = Column(DateTime)
+
+        # Kept in sync with src/database/migrations.py
+        __table_args__ = (
+            Index('ix_campaign_summary_cost', 'average_monthly_cost', 'campaign_id'),
+            Index('ix_campaign_summary_cost_per_conversion', 'average_cost_per_conversion', 'campaign_id'),
+            Index('ix_campaign_summary_name_prefix', 'campaign_name',
+                  postgresql_ops={'campaign_name': 'text_pattern_ops'}),
+        )
+
+    class AdGroupStatsSample(Base):
+        """Stratified sample of ad_group_stats read by precision=approx queries, refreshed on ingestion."""
+        __tablename__ = 'ad_group_stats_sample'
+        date = Column(Date, primary_key=True)
+        device = Column(String, primary_key=True)
+        ad_group_id = Column(BigInteger, primary_key=True)
+        campaign_id = Column(BigInteger)
+        impressions = Column(Float)
+        clicks = Column(Integer)
+        conversions = Column(Float)
+        cost = Column(Float)
+
+    class AdGroupStatsStratum(Base):
+        """Population and sample row counts of each (date, device) stratum of the sample."""
+        __tablename__ = 'ad_group_stats_strata'
+        date = Column(Date, primary_key=True)
+        device = Column(String, primary_key=True)
+        population_rows = Column(Integer, nullable=False)
+        sample_rows = Column(Integer, nullable=False)
+
+    class DataVersion(Base):
+        """Single-row counter bumped by every ingestion run, used to invalidate cached responses."""
+        __tablename__ = 'data_version'
+        id = Column(Integer, primary_key=True, default=1)
+        version = Column(BigInteger, nullable=False, default=0)
+        updated_at = Column(DateTime)
+
+    class CacheGeneration(Base):
+        """Per-namespace counter bumped by API writes, used to invalidate cached responses on every worker."""
+        __tablename__ = 'cache_generation'
+        namespace = Column(String, primary_key=True)
+        generation = Column(BigInteger, nullable=False, default=0)
+        updated_at = Column(DateTime)
+
     # Set up relationships
     Campaign.ad_groups = relationship('AdGroup', back_populates='campaign')
     AdGroup.stats = relationship('AdGroupStats', back_populates='ad_group')
 
-    Log.INFO("Models Campaign, AdGroup, and AdGroupStats were successfully defined.")
-
 except Exception as e:
     Log.ERROR(f"Error defining SQLAlchemy models: {str(e)}")
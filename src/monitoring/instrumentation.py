@@ -0,0 +1,158 @@
+import os
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dotenv import load_dotenv
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from src.monitoring.metrics import REPEATED_STATEMENTS, REQUEST_DURATION, REQUEST_SQL_DURATION, REQUEST_SQL_STATEMENTS
+from src.utils.log import Log  # Import the Log class for logging
+
+load_dotenv()
+
+# A statement executed this many times in one request is reported as a likely N+1 pattern
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+
+# Requests with an X-Profile header are profiled with pyinstrument when this is enabled
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
+PROFILE_HEADER = b"x-profile"
+
+
+class RequestStats:
+    """SQL statements run while serving one request."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.sql_count += 1
+        self.sql_seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int = N_PLUS_ONE_THRESHOLD):
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= threshold]
+
+    def server_timing(self) -> str:
+        elapsed_ms = (time.perf_counter() - self.started_at) * 1000
+        return (f'app;dur={elapsed_ms:.1f}, '
+                f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_count} queries"')
+
+
+_current_request = ContextVar("current_request_stats", default=None)
+
+
+def current_request_stats():
+    return _current_request.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info["statement_started_at"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    started_at = conn.info.pop("statement_started_at", None)
+    if stats is not None and started_at is not None:
+        stats.record(statement, time.perf_counter() - started_at)
+
+
+def instrument_engine(engine):
+    """Count and time the statements of `engine`, sync or async, in the current request's stats."""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_path(scope) -> str:
+    # The route template keeps the label set bounded, unmatched paths share one label
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware recording the latency and SQL statements of every request.
+
+    Each response gets a Server-Timing header with the time spent until the response
+    started and the part of it spent in SQL. Per-route histograms are exposed on /metrics.
+    Requests that repeat a statement N_PLUS_ONE_THRESHOLD times are logged as likely N+1
+    queries.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if PROFILING_ENABLED and any(name == PROFILE_HEADER for name, _ in scope["headers"]):
+            await self._profile(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        response = {"status": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_request.reset(token)
+            self._record(scope, response["status"], stats)
+
+    @staticmethod
+    def _record(scope, status: int, stats: RequestStats):
+        method, route = scope["method"], _route_path(scope)
+        REQUEST_DURATION.observe(time.perf_counter() - stats.started_at, method=method, route=route, status=status)
+        REQUEST_SQL_STATEMENTS.observe(stats.sql_count, method=method, route=route)
+        REQUEST_SQL_DURATION.observe(stats.sql_seconds, method=method, route=route)
+
+        repeated = stats.repeated_statements()
+        if repeated:
+            REPEATED_STATEMENTS.inc(method=method, route=route)
+            statement, count = repeated[0]
+            Log.WARNING(f"Likely N+1 queries on {method} {route}: {count} executions of "
+                        f"{' '.join(statement.split())[:200]}")
+
+    async def _profile(self, scope, receive, send):
+        """Run the request under pyinstrument and respond with the profile instead of the response."""
+        try:
+            from pyinstrument import Profiler
+            from pyinstrument.renderers import SpeedscopeRenderer
+        except ImportError:
+            Log.WARNING("X-Profile header ignored, pyinstrument is not installed.")
+            await self.app(scope, receive, send)
+            return
+
+        async def discard(message):
+            pass
+
+        profiler = Profiler(async_mode="enabled")
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        # X-Profile: speedscope returns a flame graph for speedscope.app, anything else the HTML report
+        header = dict(scope["headers"]).get(PROFILE_HEADER, b"").decode().lower()
+        if header == "speedscope":
+            body, media_type = profiler.output(renderer=SpeedscopeRenderer()).encode(), b"application/json"
+        else:
+            body, media_type = profiler.output_html().encode(), b"text/html; charset=utf-8"
+
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", media_type), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
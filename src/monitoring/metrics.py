@@ -0,0 +1,104 @@
+import threading
+from bisect import bisect_left
+
+# Upper bounds of the request latency buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Upper bounds of the SQL statements per request buckets
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, description: str, labels=()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(labels)
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, buckets, labels=()):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        self.label_names = tuple(labels)
+        # label values -> [count per bucket (+Inf last), sum, count]
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels[name] for name in self.label_names)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, [('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "Time spent serving HTTP requests.", LATENCY_BUCKETS,
+    ["method", "route", "status"],
+))
+REQUEST_SQL_STATEMENTS = registry.register(Histogram(
+    "http_request_sql_statements", "SQL statements executed per HTTP request.", STATEMENT_BUCKETS,
+    ["method", "route"],
+))
+REQUEST_SQL_DURATION = registry.register(Histogram(
+    "http_request_sql_duration_seconds", "Time spent in SQL statements per HTTP request.", LATENCY_BUCKETS,
+    ["method", "route"],
+))
+REPEATED_STATEMENTS = registry.register(Counter(
+    "http_request_repeated_statements_total",
+    "Requests that ran one SQL statement N_PLUS_ONE_THRESHOLD times or more (likely N+1 queries).",
+    ["method", "route"],
+))
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.batch import run_batch
+from src.analytics.export import dumps
+from src.database.database import get_async_db
+from src.schemas.schemas import BatchRequest
+from src.utils.log import Log  # Import the Log class for logging
+
+router = APIRouter(prefix="/analytics")
+
+@router.post("/batch")
+async def analytics_batch(request: BatchRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        # Every query of the batch runs on this one session
+        results = await run_batch(db, request.queries)
+
+        Log.INFO("Analytics batch retrieved successfully.")
+        return Response(content=dumps({"results": results}), media_type="application/json")
+
+    except Exception as e:
+        Log.ERROR(f"Error running analytics batch: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
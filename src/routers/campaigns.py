@@ -1,48 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from src.models.models import Campaign, AdGroup, AdGroupStats
-from src.schemas.schemas import UpdateCampaignRequest
-from src.database.database import get_db
-from sqlalchemy import func
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
+from src.analytics.campaign_rollup import get_campaign_rollup
+from src.analytics.campaign_summary import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, get_campaign_summary_page
+)
+from src.cache.response_cache import bump_cache_generations, response_cache
+from src.models.models import Campaign, CampaignSummary
+from src.schemas.schemas import BulkUpdateCampaignsRequest, UpdateCampaignRequest
+from src.database.bulk_updates import rename_campaigns
+from src.database.database import get_async_db
 from src.utils.log import Log  # Import the Log class for logging
 
 router = APIRouter()
 
+# Any cached page of /campaigns or /campaigns/summary may contain a renamed campaign. Renames
+# bump their stored generations in the same transaction, so every worker drops those pages.
+CAMPAIGN_CACHE_NAMESPACES = ("campaigns", "campaigns-summary")
+
 @router.get("/campaigns")
-def get_campaigns(db: Session = Depends(get_db)):
+async def get_campaigns(
+    campaign_ids: Optional[List[int]] = Query(None),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db)
+):
     try:
-        campaigns = db.query(Campaign).all()
-
-        result = []
-        for campaign in campaigns:
-            ad_groups = db.query(AdGroup).filter(AdGroup.campaign_id == campaign.campaign_id).all()
-            total_cost = 0
-            total_conversions = 0
-
-            ad_group_data = []
-            for ad_group in ad_groups:
-                ad_group_stats = db.query(func.avg(AdGroupStats.cost), func.avg(AdGroupStats.conversions)).filter(
-                    AdGroupStats.ad_group_id == ad_group.ad_group_id
-                ).all()
-
-                avg_cost = ad_group_stats[0][0] or 0
-                avg_conversions = ad_group_stats[0][1] or 0
-                total_cost += avg_cost
-                total_conversions += avg_conversions
-
-                ad_group_data.append({
-                    "ad_group_name": ad_group.ad_group_name,
-                    "average_cost": round(avg_cost, 2),
-                    "average_conversions": round(avg_conversions, 2)
-                })
-
-            result.append({
-                "campaign_name": campaign.campaign_name,
-                "number_of_ad_groups": len(ad_groups),
-                "ad_groups": ad_group_data,
-                "average_monthly_cost": round(total_cost / len(ad_groups) if ad_groups else 0, 2),
-                "average_cost_per_conversion": round(total_cost / total_conversions if total_conversions > 0 else 0, 2)
-            })
+        params = {"campaign_ids": campaign_ids, "limit": limit, "offset": offset}
+        result = await response_cache.get_or_compute(
+            "campaigns", params, db,
+            lambda: get_campaign_rollup(db, campaign_ids=campaign_ids, limit=limit, offset=offset)
+        )
 
         Log.INFO("Campaigns retrieved successfully.")
         return result
@@ -52,17 +41,77 @@ def get_campaigns(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.get("/campaigns/summary")
+async def get_campaign_summary(
+    sort: str = Query("campaign_id", pattern="^(campaign_id|cost|cost_per_conversion)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    campaign_type: Optional[str] = None,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        after = decode_cursor(cursor, sort, order) if cursor else None
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        params = {"sort": sort, "order": order, "campaign_type": campaign_type, "name_prefix": name_prefix,
+                  "limit": limit, "cursor": cursor}
+        result = await response_cache.get_or_compute(
+            "campaigns-summary", params, db,
+            lambda: get_campaign_summary_page(db, sort, order, campaign_type, name_prefix, limit, after)
+        )
+
+        Log.INFO("Campaign summary page retrieved successfully.")
+        return result
+
+    except Exception as e:
+        Log.ERROR(f"Error retrieving campaign summary: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.patch("/campaigns/bulk")
+async def bulk_update_campaigns(request: BulkUpdateCampaignsRequest, db: AsyncSession = Depends(get_async_db)):
+    try:
+        renames = [(update.campaign_id, update.name) for update in request.updates]
+        # One UPDATE ... FROM (VALUES ...) per batch, all committed in a single transaction
+        missing_ids = await rename_campaigns(db, renames)
+        await bump_cache_generations(db, CAMPAIGN_CACHE_NAMESPACES)
+        await db.commit()
+
+        for namespace in CAMPAIGN_CACHE_NAMESPACES:
+            await response_cache.invalidate(namespace)
+
+        Log.INFO(f"Bulk campaign update: {len(renames) - len(missing_ids)} renamed, {len(missing_ids)} missing.")
+        return {"updated": len(renames) - len(missing_ids), "missing_ids": missing_ids}
+
+    except Exception as e:
+        Log.ERROR(f"Error in bulk campaign update: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 @router.patch("/campaigns/update-name/{campaign_id}")
-def update_campaign(campaign_id: int, request: UpdateCampaignRequest, db: Session = Depends(get_db)):
+async def update_campaign(campaign_id: int, request: UpdateCampaignRequest, db: AsyncSession = Depends(get_async_db)):
     try:
-        campaign = db.query(Campaign).filter(Campaign.campaign_id == campaign_id).first()
+        campaign = (await db.execute(select(Campaign).where(Campaign.campaign_id == campaign_id))).scalars().first()
 
         if not campaign:
             Log.ERROR(f"Campaign with ID {campaign_id} not found.")
             raise HTTPException(status_code=404, detail="Campaign not found")
 
         campaign.campaign_name = request.name
-        db.commit()
+        # The summary row is renamed in the same transaction, its figures do not change
+        await db.execute(
+            update(CampaignSummary).where(CampaignSummary.campaign_id == campaign_id)
+            .values(campaign_name=request.name, updated_at=func.now())
+        )
+        await bump_cache_generations(db, CAMPAIGN_CACHE_NAMESPACES)
+        await db.commit()
+
+        for namespace in CAMPAIGN_CACHE_NAMESPACES:
+            await response_cache.invalidate(namespace)
 
         Log.INFO(f"Campaign name updated successfully for campaign ID {campaign_id}.")
         return {"message": "Campaign name updated successfully"}
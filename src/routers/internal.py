@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException
+from src.analytics.columnar import columnar_engine
+from src.cache.response_cache import response_cache
+from src.cache.warmup import warmup_scheduler
+from src.database.database import get_engine, get_async_engine
+from src.database.pool import pool_status
+from src.utils.log import Log  # Import the Log class for logging
+
+router = APIRouter(prefix="/internal", include_in_schema=False)
+
+@router.get("/pool-stats")
+async def get_pool_stats():
+    try:
+        # The API serves requests from the async engine, the sync one is used by scripts and tests
+        return {"async": pool_status(get_async_engine()), "sync": pool_status(get_engine())}
+
+    except Exception as e:
+        Log.ERROR(f"Error retrieving pool statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    try:
+        return response_cache.stats()
+
+    except Exception as e:
+        Log.ERROR(f"Error retrieving cache statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/engine-stats")
+async def get_engine_stats():
+    try:
+        return columnar_engine.stats()
+
+    except Exception as e:
+        Log.ERROR(f"Error retrieving analytics engine statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/warmup-stats")
+async def get_warmup_stats():
+    try:
+        return warmup_scheduler.stats()
+
+    except Exception as e:
+        Log.ERROR(f"Error retrieving warm-up statistics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from src.monitoring.metrics import registry
+from src.utils.log import Log  # Import the Log class for logging
+
+router = APIRouter(include_in_schema=False)
+
+@router.get("/metrics")
+async def get_metrics():
+    try:
+        # Prometheus text exposition format, the counters are per API process
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+    except Exception as e:
+        Log.ERROR(f"Error rendering metrics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -1,73 +1,98 @@
-from fastapi import APIRouter, Query, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session
-from src.analytics.analytics import get_performance_data, calculate_percentage_change
-from src.database.database import get_db
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Query, Depends, Header, HTTPException
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.analytics.analytics import (
+    GROUP_BY_FIELDS, build_time_series_query, get_time_series_data, get_periods_performance_data, comparison_windows,
+    compare_consecutive
+)
+from src.analytics.approximate import get_approximate_time_series_data
+from src.analytics.export import EXPORT_FORMATS, UnsupportedFormatError, dumps, negotiate_format, stream_time_series
+from src.cache.response_cache import response_cache
+from src.database.database import get_async_db
+from datetime import datetime
 from typing import Optional, List
-from src.models.models import AdGroupStats
 from src.utils.log import Log  # Import the Log class for logging
 
 router = APIRouter()
 
+
+async def _log_stream_errors(chunks):
+    # Once streaming has started the status code is sent, errors can only be logged
+    try:
+        async for chunk in chunks:
+            yield chunk
+    except Exception as e:
+        Log.ERROR(f"Error streaming performance time series: {str(e)}")
+        raise
+
+
 @router.get("/performance-time-series")
-def performance_time_series(
+async def performance_time_series(
     aggregate_by: str = Query(..., pattern="^(day|week|month)$"),
     campaigns: Optional[List[int]] = Query(None),
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    db: Session = Depends(get_db)
+    device: Optional[str] = None,
+    group_by: Optional[str] = Query(None, pattern="^(campaign|ad_group|device|campaign_type)$"),
+    ad_groups: Optional[List[int]] = Query(None),
+    top: Optional[int] = Query(None, ge=1),
+    top_by: str = Query("cost", pattern="^(cost|clicks|conversions|impressions)$"),
+    precision: str = Query("exact", pattern="^(exact|approx)$"),
+    response_format: Optional[str] = Query(None, alias="format"),
+    accept: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
+    try:
+        export_format = negotiate_format(response_format, accept)
+    except UnsupportedFormatError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    if precision == "approx" and (export_format != "json" or top):
+        raise HTTPException(status_code=400, detail="precision=approx is only available for JSON responses without top")
+
+    if export_format in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=406, detail=f"{export_format} responses require pyarrow")
+
     try:
         # Parse dates if provided
         start_date_dt = datetime.strptime(start_date, "%Y-%m-%d") if start_date else None
         end_date_dt = datetime.strptime(end_date, "%Y-%m-%d") if end_date else None
 
-        # Build and execute the query for time series data
-        query = db.query(
-            func.date_trunc(aggregate_by, AdGroupStats.date).label('period'),
-            func.sum(AdGroupStats.cost).label('total_cost'),
-            func.sum(AdGroupStats.clicks).label('total_clicks'),
-            func.sum(AdGroupStats.conversions).label('total_conversions'),
-            func.sum(AdGroupStats.impressions).label('total_impressions')
+        # Exports are streamed from a server-side cursor in bounded memory and are not cached
+        if export_format != "json":
+            query = build_time_series_query(aggregate_by, campaigns, start_date_dt, end_date_dt, device,
+                                            group_by=group_by, ad_groups=ad_groups, top=top, top_by=top_by)
+            chunks = stream_time_series(db, query, export_format, GROUP_BY_FIELDS.get(group_by, []))
+            return StreamingResponse(_log_stream_errors(chunks), media_type=EXPORT_FORMATS[export_format])
+
+        # Estimates from the stratified sample, with confidence intervals
+        if precision == "approx":
+            params = {"aggregate_by": aggregate_by, "campaigns": campaigns, "start_date": start_date_dt,
+                      "end_date": end_date_dt, "device": device, "group_by": group_by, "ad_groups": ad_groups}
+            result = await response_cache.get_or_compute(
+                "performance-time-series-approx", params, db,
+                lambda: get_approximate_time_series_data(db, aggregate_by, campaigns, start_date_dt, end_date_dt,
+                                                         device, group_by=group_by, ad_groups=ad_groups)
+            )
+
+            Log.INFO("Approximate performance time series data retrieved successfully.")
+            return Response(content=dumps(result), media_type="application/json")
+
+        # Repeated dashboard queries are served from the response cache
+        params = {"aggregate_by": aggregate_by, "campaigns": campaigns, "start_date": start_date_dt,
+                  "end_date": end_date_dt, "device": device, "group_by": group_by, "ad_groups": ad_groups,
+                  "top": top, "top_by": top_by}
+        time_series_data = await response_cache.get_or_compute(
+            "performance-time-series", params, db,
+            lambda: get_time_series_data(db, aggregate_by, campaigns, start_date_dt, end_date_dt, device,
+                                         group_by=group_by, ad_groups=ad_groups, top=top, top_by=top_by)
         )
 
-        if campaigns:
-            query = query.filter(AdGroupStats.ad_group_id.in_(campaigns))
-
-        if start_date_dt:
-            query = query.filter(AdGroupStats.date >= start_date_dt)
-        if end_date_dt:
-            query = query.filter(AdGroupStats.date <= end_date_dt)
-
-        query = query.group_by('period').order_by(func.date_trunc(aggregate_by, AdGroupStats.date).desc())
-        results = query.all()
-
-        time_series_data = []
-        for result in results:
-            total_clicks = result.total_clicks
-            total_conversions = result.total_conversions
-            total_impressions = result.total_impressions
-            total_cost = result.total_cost
-
-            avg_cost_per_click = round(total_cost / total_clicks if total_clicks else 0, 2)
-            avg_cost_per_conversion = round(total_cost / total_conversions if total_conversions else 0, 2)
-            avg_ctr = round(total_clicks / total_impressions if total_impressions else 0, 2)
-            avg_conversion_rate = round(total_conversions / total_clicks if total_clicks else 0, 2)
-
-            time_series_data.append({
-                "period": result.period,
-                "total_cost": total_cost,
-                "total_clicks": total_clicks,
-                "total_conversions": total_conversions,
-                "avg_cost_per_click": avg_cost_per_click,
-                "avg_cost_per_conversion": avg_cost_per_conversion,
-                "avg_click_through_rate": avg_ctr,
-                "avg_conversion_rate": avg_conversion_rate,
-            })
-
         Log.INFO("Performance time series data retrieved successfully.")
-        return {"data": time_series_data}
+        return Response(content=dumps({"data": time_series_data}), media_type="application/json")
 
     except Exception as e:
         Log.ERROR(f"Error retrieving performance time series: {str(e)}")
@@ -75,39 +100,65 @@ def performance_time_series(
 
 
 @router.get("/compare-performance")
-def compare_performance(
+async def compare_performance(
     start_date: str,
     end_date: str,
     compare_mode: str = Query(..., pattern="^(preceding|previous_month)$"),
-    db: Session = Depends(get_db)
+    device: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
         # Parse dates
         start_date_dt = datetime.strptime(start_date, "%Y-%m-%d")
         end_date_dt = datetime.strptime(end_date, "%Y-%m-%d")
-        current_period_days = (end_date_dt - start_date_dt).days + 1
-
-        before_start_date_dt = None
-        before_end_date_dt = None
 
-        # Determine the 'before' period based on compare_mode
-        if compare_mode == 'preceding':
-            before_start_date_dt = start_date_dt - timedelta(days=current_period_days)
-            before_end_date_dt = start_date_dt - timedelta(days=1)
-        elif compare_mode == 'previous_month':
-            before_start_date_dt = start_date_dt.replace(month=start_date_dt.month - 1)
-            before_end_date_dt = end_date_dt.replace(month=end_date_dt.month - 1)
+        # The 'before' period is determined by compare_mode
+        windows = comparison_windows(start_date_dt, end_date_dt, compare_mode)
 
-        # Fetch data for current and before periods
-        current_data = get_performance_data(db, start_date_dt, end_date_dt)
-        before_data = get_performance_data(db, before_start_date_dt, before_end_date_dt)
+        async def compare():
+            # Both periods are aggregated by the same query
+            period_data = await get_periods_performance_data(db, windows, device=device)
+            return compare_consecutive(period_data)[0]
 
-        # Calculate percentage change
-        comparison_data = calculate_percentage_change(current_data, before_data)
+        params = {"start_date": start_date_dt, "end_date": end_date_dt, "compare_mode": compare_mode, "device": device}
+        result = await response_cache.get_or_compute("compare-performance", params, db, compare)
 
         Log.INFO("Performance comparison data retrieved successfully.")
-        return {"current_period": current_data, "before_period": before_data, "comparison": comparison_data}
+        return result
 
     except Exception as e:
         Log.ERROR(f"Error comparing performance: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@router.get("/compare-performance-periods")
+async def compare_performance_periods(
+    start_date: str,
+    end_date: str,
+    compare_mode: str = Query(..., pattern="^(preceding|previous_month)$"),
+    periods: int = Query(12, ge=1, le=60),
+    device: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        # Parse dates
+        start_date_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        end_date_dt = datetime.strptime(end_date, "%Y-%m-%d")
+
+        # The given range followed by `periods` earlier ranges, each one compared to the next
+        windows = comparison_windows(start_date_dt, end_date_dt, compare_mode, periods)
+
+        async def compare():
+            period_data = await get_periods_performance_data(db, windows, device=device)
+            return {"periods": compare_consecutive(period_data)}
+
+        params = {"start_date": start_date_dt, "end_date": end_date_dt, "compare_mode": compare_mode,
+                  "periods": periods, "device": device}
+        result = await response_cache.get_or_compute("compare-performance-periods", params, db, compare)
+
+        Log.INFO("Multi-period performance comparison retrieved successfully.")
+        return result
+
+    except Exception as e:
+        Log.ERROR(f"Error comparing performance periods: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
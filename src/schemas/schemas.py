@@ -1,11 +1,70 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Union
 
 class UpdateCampaignRequest(BaseModel):
     name: str
 
+class BulkCampaignUpdate(UpdateCampaignRequest):
+    campaign_id: int
+
+class BulkUpdateCampaignsRequest(BaseModel):
+    updates: List[BulkCampaignUpdate] = Field(..., min_length=1, max_length=10_000)
+
+    @field_validator("updates")
+    @classmethod
+    def unique_campaign_ids(cls, updates):
+        ids = [update.campaign_id for update in updates]
+        if len(ids) != len(set(ids)):
+            raise ValueError("campaign ids must be unique")
+        return updates
+
 class TimeSeriesQueryParams(BaseModel):
     aggregate_by: str
     campaigns: Optional[List[int]] = None
     start_date: Optional[str] = None
     end_date: Optional[str] = None
+
+# Query specs of POST /analytics/batch, they take the parameters of the matching GET endpoint
+
+class TimeSeriesSpec(BaseModel):
+    id: str
+    type: Literal["time_series"]
+    aggregate_by: str = Field(..., pattern="^(day|week|month)$")
+    campaigns: Optional[List[int]] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    device: Optional[str] = None
+    group_by: Optional[str] = Field(None, pattern="^(campaign|ad_group|device|campaign_type)$")
+    ad_groups: Optional[List[int]] = None
+    top: Optional[int] = Field(None, ge=1)
+    top_by: str = Field("cost", pattern="^(cost|clicks|conversions|impressions)$")
+
+class CompareSpec(BaseModel):
+    id: str
+    type: Literal["compare"]
+    start_date: str
+    end_date: str
+    compare_mode: str = Field(..., pattern="^(preceding|previous_month)$")
+    device: Optional[str] = None
+
+class ComparePeriodsSpec(BaseModel):
+    id: str
+    type: Literal["compare_periods"]
+    start_date: str
+    end_date: str
+    compare_mode: str = Field(..., pattern="^(preceding|previous_month)$")
+    periods: int = Field(12, ge=1, le=60)
+    device: Optional[str] = None
+
+QuerySpec = Annotated[Union[TimeSeriesSpec, CompareSpec, ComparePeriodsSpec], Field(discriminator="type")]
+
+class BatchRequest(BaseModel):
+    queries: List[QuerySpec] = Field(..., min_length=1, max_length=100)
+
+    @field_validator("queries")
+    @classmethod
+    def unique_ids(cls, queries):
+        ids = [spec.id for spec in queries]
+        if len(ids) != len(set(ids)):
+            raise ValueError("query ids must be unique")
+        return queries
@@ -0,0 +1,126 @@
+"""
+Production entry point running the API in several worker processes:
+
+    python -m src.server --port 8800
+
+One worker per available CPU by default (WEB_CONCURRENCY overrides it). The connection
+pools are sized per worker so that all workers together stay within the connection budget
+of PostgreSQL. Each worker is a separate process with its own engines, response cache
+and in-memory snapshot, created by the app's lifespan hook after the worker has started.
+"""
+import argparse
+import os
+from dotenv import load_dotenv
+from src.utils.log import Log
+
+load_dotenv()
+
+# Connections left to superusers, migrations, scripts and monitoring when the budget is
+# derived from max_connections
+DEFAULT_RESERVED_CONNECTIONS = 10
+
+# Connections per worker outside of the async pool: snapshot loads of the in-memory
+# engine go through the sync engine, whose pool is capped to this size without overflow
+SYNC_CONNECTIONS_PER_WORKER = 1
+
+
+def worker_count() -> int:
+    """WEB_CONCURRENCY if set, otherwise the number of CPUs this process may run on."""
+    configured = os.getenv("WEB_CONCURRENCY")
+    if configured:
+        return max(1, int(configured))
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def server_max_connections():
+    """max_connections of the PostgreSQL server, None if it cannot be read."""
+    from src.database.db_conn import create_connection
+
+    connection = create_connection()
+    if connection is None:
+        return None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SHOW max_connections")
+        return int(cursor.fetchone()[0])
+    finally:
+        connection.close()
+
+
+def connection_budget(max_connections: int = None) -> int:
+    """
+    Connections the workers of this instance may open together: DB_CONNECTION_BUDGET, or
+    max_connections minus DB_RESERVED_CONNECTIONS. With several instances behind a load
+    balancer, set DB_CONNECTION_BUDGET to their share of max_connections.
+    """
+    configured = os.getenv("DB_CONNECTION_BUDGET")
+    if configured:
+        return int(configured)
+    if max_connections is None:
+        max_connections = int(os.getenv("DB_MAX_CONNECTIONS") or server_max_connections() or 100)
+    reserved = int(os.getenv("DB_RESERVED_CONNECTIONS", str(DEFAULT_RESERVED_CONNECTIONS)))
+    return max_connections - reserved
+
+
+def pool_sizes(workers: int, budget: int, pool_size: int = 5, max_overflow: int = 10):
+    """
+    DB_POOL_SIZE and DB_MAX_OVERFLOW for each worker, lowered from the requested values
+    where needed so that `workers` workers stay within `budget` connections.
+    """
+    per_worker = budget // workers - SYNC_CONNECTIONS_PER_WORKER
+    if per_worker < 1:
+        raise ValueError(f"A budget of {budget} connections is too small for {workers} workers, "
+                         f"lower the worker count or raise DB_CONNECTION_BUDGET")
+    pool_size = min(pool_size, per_worker)
+    max_overflow = min(max_overflow, per_worker - pool_size)
+    return pool_size, max_overflow
+
+
+def configure_pools(workers: int):
+    """
+    Set DB_POOL_SIZE and DB_MAX_OVERFLOW for the workers, which inherit the environment,
+    and cap their sync pools with DB_SYNC_POOL_SIZE and DB_SYNC_MAX_OVERFLOW. Nothing to
+    size when PgBouncer does the pooling (DB_POOL_MODE=null).
+    """
+    if os.getenv("DB_POOL_MODE", "queue").lower() == "null":
+        return None
+
+    requested = int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    budget = connection_budget()
+    pool_size, max_overflow = pool_sizes(workers, budget, *requested)
+    if (pool_size, max_overflow) != requested:
+        Log.WARNING(f"Connection pools lowered to {pool_size} + {max_overflow} overflow per worker "
+                    f"to keep {workers} workers within {budget} connections.")
+
+    os.environ["DB_POOL_SIZE"] = str(pool_size)
+    os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+    os.environ["DB_SYNC_POOL_SIZE"] = str(SYNC_CONNECTIONS_PER_WORKER)
+    os.environ["DB_SYNC_MAX_OVERFLOW"] = "0"
+    return pool_size, max_overflow
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the API with one worker process per CPU.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--workers", type=int, default=worker_count(), help="Worker processes, one per CPU by default")
+    parser.add_argument("--graceful-timeout", type=int, default=int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+                        help="Seconds in-flight requests may take to finish on shutdown")
+    args = parser.parse_args()
+
+    pools = configure_pools(args.workers)
+    Log.INFO(f"Serving the FastAPI app with {args.workers} workers, connection pools per worker: "
+             f"{'PgBouncer' if pools is None else f'{pools[0]} + {pools[1]} overflow'}.")
+
+    # On SIGTERM the workers stop accepting connections, finish their in-flight requests
+    # within the graceful timeout and dispose of their pools in the lifespan hook
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers,
+                timeout_graceful_shutdown=args.graceful_timeout)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,63 +1,113 @@
+import atexit
 import logging
 import os
+import queue
+import threading
 from datetime import datetime
-import inspect
+from logging.handlers import QueueHandler, QueueListener
 
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(filename)s: %(funcName)s: %(message)s'
+LOG_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+class DailyFileHandler(logging.FileHandler):
+    """
+    Writes to `<logs_dir>/<YYYY-MM-DD>.log` and switches to the next day's file at
+    midnight, so long-running processes do not keep writing into the day they started.
+    """
+
+    def __init__(self, logs_dir: str):
+        self.logs_dir = logs_dir
+        self.current_date = self._today()
+        os.makedirs(logs_dir, exist_ok=True)
+        super().__init__(self._path(self.current_date), delay=True)
 
-class Log:
     @staticmethod
-    def _get_log_file():
-        # Ensure the logs directory exists
-        logs_dir = os.path.join(os.getcwd(), 'logs')
-        if not os.path.exists(logs_dir):
-            os.makedirs(logs_dir)
+    def _today():
+        return datetime.now().strftime('%Y-%m-%d')
+
+    def _path(self, day: str):
+        return os.path.join(self.logs_dir, f"{day}.log")
+
+    def emit(self, record):
+        today = self._today()
+        if today != self.current_date:
+            self.acquire()
+            try:
+                self.current_date = today
+                self.close()
+                self.baseFilename = os.path.abspath(self._path(today))
+            finally:
+                self.release()
+        super().emit(record)
+
+
+class Log:
+    """
+    Application logging facade.
+
+    Records go through a QueueHandler and are written to the daily log file by a
+    QueueListener thread, so the calling thread never waits on file I/O. The caller's
+    file and function are resolved by the logging module itself through `stacklevel`.
+    """
 
-        # Create log file based on the current date
-        today = datetime.now().strftime('%Y-%m-%d')
-        log_file = os.path.join(logs_dir, f"{today}.log")
-        return log_file
+    _logger = None
+    _listener = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _get_logs_dir():
+        return os.path.join(os.getcwd(), 'logs')
 
     @staticmethod
     def _get_logger():
-        # Get or create a logger
-        logger = logging.getLogger("app_logger")
-        if not logger.hasHandlers():
-            log_file = Log._get_log_file()
-            handler = logging.FileHandler(log_file)
-            formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
-            handler.setFormatter(formatter)
-            logger.addHandler(handler)
-            logger.setLevel(logging.INFO)
-        return logger
-
-    @staticmethod
-    def _get_caller_info():
-        # Get the caller's file and function name using the inspect module
-        frame = inspect.stack()[2]
-        filename = os.path.basename(frame.filename)
-        function_name = frame.function
-        return filename, function_name
+        if Log._logger is not None:
+            return Log._logger
+
+        with Log._lock:
+            if Log._logger is None:
+                file_handler = DailyFileHandler(Log._get_logs_dir())
+                file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATE_FORMAT))
+
+                log_queue = queue.SimpleQueue()
+                Log._listener = QueueListener(log_queue, file_handler)
+                Log._listener.start()
+
+                logger = logging.getLogger("app_logger")
+                logger.handlers.clear()
+                logger.addHandler(QueueHandler(log_queue))
+                logger.setLevel(logging.INFO)
+                logger.propagate = False
+                Log._logger = logger
+        return Log._logger
 
+    @staticmethod
+    def shutdown():
+        """Write out the queued records and stop the listener thread. Logging again restarts it."""
+        with Log._lock:
+            if Log._listener is not None:
+                Log._listener.stop()
+                for handler in Log._listener.handlers:
+                    handler.close()
+            Log._listener = None
+            Log._logger = None
+
+    # stacklevel=2 attributes the record to the function calling Log.<LEVEL>
     @staticmethod
     def INFO(msg):
-        logger = Log._get_logger()
-        filename, function_name = Log._get_caller_info()
-        logger.info(f"{filename}: {function_name}: {msg}")
+        Log._get_logger().info(msg, stacklevel=2)
 
     @staticmethod
     def WARNING(msg):
-        logger = Log._get_logger()
-        filename, function_name = Log._get_caller_info()
-        logger.warning(f"{filename}: {function_name}: {msg}")
+        Log._get_logger().warning(msg, stacklevel=2)
 
     @staticmethod
     def ERROR(msg):
-        logger = Log._get_logger()
-        filename, function_name = Log._get_caller_info()
-        logger.error(f"{filename}: {function_name}: {msg}")
+        Log._get_logger().error(msg, stacklevel=2)
 
     @staticmethod
     def DEBUG(msg):
-        logger = Log._get_logger()
-        filename, function_name = Log._get_caller_info()
-        logger.debug(f"{filename}: {function_name}: {msg}")
+        Log._get_logger().debug(msg, stacklevel=2)
+
+
+atexit.register(Log.shutdown)
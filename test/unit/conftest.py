@@ -1,8 +1,14 @@
+import asyncio
+from contextlib import asynccontextmanager
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from src.database.database import Base, get_db
+from sqlalchemy.pool import NullPool
+from src.cache.response_cache import response_cache
+from src.database.database import Base, get_db, get_async_db
+from src.database.migrations import apply_migrations
 from main import app
 import psycopg2
 import os
@@ -21,11 +27,15 @@ TEST_DB_NAME = "nike_campaign_data_test"
 # Full database URLs
 ORIGINAL_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{ORIGINAL_DB_NAME}"
 TEST_DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{TEST_DB_NAME}"
+ASYNC_TEST_DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{TEST_DB_NAME}"
 
 # SQLAlchemy setup
 engine = create_engine(TEST_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs every request in its own event loop, so async connections are not pooled
+async_engine = create_async_engine(ASYNC_TEST_DATABASE_URL, poolclass=NullPool)
+
 
 def create_test_database():
     """
@@ -136,6 +146,36 @@ def db_session():
     connection.close()
 
 
+@pytest.fixture(scope="function")
+def db_cursor(db_session):
+    """
+    Provides a psycopg2 cursor sharing the db_session transaction, with all migrations applied.
+    """
+    cursor = db_session.connection().connection.cursor()
+    apply_migrations(cursor)
+    yield cursor
+    cursor.close()
+
+
+@asynccontextmanager
+async def rolled_back_async_session():
+    """An AsyncSession on the test database whose transaction is rolled back on exit."""
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+            yield session
+        await transaction.rollback()
+
+
+@pytest.fixture(scope="function")
+def async_db_session():
+    """
+    Provides a factory of rolled-back AsyncSessions, to be entered inside the test's own
+    event loop: `async with async_db_session() as db`.
+    """
+    return rolled_back_async_session
+
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """
@@ -148,6 +188,14 @@ def client(db_session):
         finally:
             db_session.close()
 
+    async def override_get_async_db():
+        # Every request runs in a transaction that is rolled back afterwards
+        async with rolled_back_async_session() as session:
+            yield session
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    # Responses cached by earlier tests must not leak into this one
+    asyncio.run(response_cache.clear())
     yield TestClient(app)
-    app.dependency_overrides[get_db] = get_db
+    app.dependency_overrides.clear()
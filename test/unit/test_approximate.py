@@ -0,0 +1,112 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from src.analytics.analytics import build_time_series_query
+from src.analytics.approximate import build_sampled_time_series_query, estimate_time_series
+from src.analytics.export import columns_to_records, time_series_columns
+
+START_DATE, END_DATE = datetime(2024, 1, 1), datetime(2024, 2, 29)
+
+
+@pytest.fixture
+def synthetic_stats(db_cursor):
+    from benchmarks.synthetic_data import ad_group_frame, campaign_frame, iter_stats_chunks
+    from src.ingestion.loader import load_table
+    from src.ingestion.rollups import refresh_rollups
+
+    load_table(db_cursor, "campaign", [campaign_frame(20)])
+    ad_groups = ad_group_frame(20, 10)
+    load_table(db_cursor, "ad_group", [ad_groups])
+    load_table(db_cursor, "ad_group_stats", iter_stats_chunks(ad_groups["ad_group_id"], START_DATE.date(), 60))
+    refresh_rollups(db_cursor, START_DATE.date(), END_DATE.date())
+    return db_cursor
+
+
+def _exact(db_session, aggregate_by, dimensions, **filters):
+    rows = db_session.execute(build_time_series_query(aggregate_by, start_date=START_DATE, end_date=END_DATE,
+                                                      **filters)).all()
+    return columns_to_records(time_series_columns(rows, dimensions))
+
+
+def _approx(db_session, aggregate_by, dimensions, **filters):
+    query = build_sampled_time_series_query(aggregate_by, start_date=START_DATE, end_date=END_DATE, **filters)
+    return estimate_time_series(db_session.execute(query).all(), dimensions)
+
+
+FIELDS = ("total_cost", "total_clicks", "total_conversions", "avg_cost_per_click", "avg_cost_per_conversion",
+          "avg_click_through_rate", "avg_conversion_rate")
+
+
+def test_estimates_stay_within_their_confidence_intervals(db_session: Session, synthetic_stats):
+    from src.ingestion.rollups import refresh_stats_sample
+
+    # 200 rows per (date, device) stratum, 40 of them sampled
+    refresh_stats_sample(synthetic_stats, START_DATE.date(), END_DATE.date(), rate=0.05, min_rows=40)
+
+    checked, covered = 0, 0
+    for aggregate_by, dimensions, filters in [
+        ("day", [], {}),
+        ("week", ["device"], {"group_by": "device"}),
+        ("month", ["campaign_id", "campaign_name"], {"group_by": "campaign"}),
+        ("week", [], {"device": "MOBILE"}),
+    ]:
+        exact = _exact(db_session, aggregate_by, dimensions, **filters)
+        approx = _approx(db_session, aggregate_by, dimensions, **filters)
+        assert [[row[key] for key in ["period", *dimensions]] for row in approx] == \
+            [[row[key] for key in ["period", *dimensions]] for row in exact]
+
+        for exact_row, approx_row in zip(exact, approx):
+            for field in FIELDS:
+                low, high = approx_row["confidence_intervals"][field]
+                assert low <= approx_row[field] <= high
+                checked += 1
+                covered += low - 0.01 <= float(exact_row[field]) <= high + 0.01
+
+    # 95% intervals from the normal approximation, which undercovers a little on the
+    # skewed synthetic clicks and conversions
+    assert covered / checked >= 0.85, (covered, checked)
+
+
+def test_fully_sampled_strata_are_exact(db_session: Session, synthetic_stats):
+    from src.ingestion.rollups import refresh_stats_sample
+
+    refresh_stats_sample(synthetic_stats, START_DATE.date(), END_DATE.date(), rate=1)
+
+    exact = _exact(db_session, "week", ["device"], group_by="device")
+    approx = _approx(db_session, "week", ["device"], group_by="device")
+    for exact_row, approx_row in zip(exact, approx):
+        assert approx_row["total_cost"] == pytest.approx(float(exact_row["total_cost"]), abs=0.01)
+        low, high = approx_row["confidence_intervals"]["total_cost"]
+        assert low == high == approx_row["total_cost"]
+
+
+def test_estimate_time_series_scales_sums_up():
+    # One stratum of 100 rows with 4 sampled: cost 1, 2, 3, 4 and one click each
+    rows = [(datetime(2024, 1, 1), Decimal(100), 4, 10.0, 4, 0.0, 400.0, 30.0, 4, 0.0, 160000.0, 10.0, 0.0, 4, 0.0)]
+    [record] = estimate_time_series(rows)
+
+    assert record["total_cost"] == 250.0
+    assert record["total_clicks"] == 100.0
+    assert record["avg_cost_per_click"] == 2.5
+    # s² = (30 - 10² / 4) / 3, variance = 100² (1 - 4 / 100) s² / 4
+    low, high = record["confidence_intervals"]["total_cost"]
+    assert high - 250.0 == pytest.approx(1.96 * (100 ** 2 * 0.96 * (5 / 3) / 4) ** 0.5, abs=0.01)
+    # Every sampled row has one click, so the cost per click varies and the clicks do not
+    assert record["confidence_intervals"]["total_clicks"] == [100.0, 100.0]
+    assert record["confidence_intervals"]["avg_cost_per_click"][0] < 2.5
+
+
+def test_approximate_time_series_endpoint(client: TestClient):
+    response = client.get("/performance-time-series?aggregate_by=month&group_by=device&precision=approx")
+    assert response.status_code == 200
+    assert response.json()["precision"] == "approx"
+    assert response.json()["confidence_level"] == 0.95
+
+    # Answered exactly by the daily rollups
+    response = client.get("/performance-time-series?aggregate_by=month&precision=approx")
+    assert response.json()["precision"] == "exact"
+
+    assert client.get("/performance-time-series?aggregate_by=month&precision=rough").status_code == 422
+    assert client.get("/performance-time-series?aggregate_by=month&precision=approx&format=csv").status_code == 400
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from src.analytics.analytics import fetch_time_series_rows, rollup_time_series
+from src.analytics.batch import _run_time_series, spec_cache_key
+from src.analytics.export import columns_to_records, time_series_columns
+from src.analytics.periods import period_start
+from src.schemas.schemas import QuerySpec
+
+
+def day(value):
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+
+def test_rollup_time_series_to_weeks_and_months():
+    rows = [
+        (day("2024-02-05"), "MOBILE", 0.25, 1, 1.0, 10.0),
+        (day("2024-02-04"), "MOBILE", 0.5, 2, None, 10.0),
+        (day("2024-02-04"), "DESKTOP", 1.0, 3, 1.0, 10.0),
+        (day("2024-01-31"), "MOBILE", 4.0, 4, 2.0, 10.0),
+    ]
+
+    assert rollup_time_series(rows, "week", 1) == [
+        (day("2024-02-05"), "MOBILE", 0.25, 1, 1.0, 10.0),
+        (day("2024-01-29"), "DESKTOP", 1.0, 3, 1.0, 10.0),
+        (day("2024-01-29"), "MOBILE", 4.5, 6, 2.0, 20.0),
+    ]
+    assert rollup_time_series(rows, "month", 1) == [
+        (day("2024-02-01"), "DESKTOP", 1.0, 3, 1.0, 10.0),
+        (day("2024-02-01"), "MOBILE", 0.75, 3, 1.0, 20.0),
+        (day("2024-01-01"), "MOBILE", 4.0, 4, 2.0, 10.0),
+    ]
+    assert rollup_time_series(rows, "day", 1) == rows
+
+
+def test_rollup_time_series_in_the_session_time_zone():
+    berlin = ZoneInfo("Europe/Berlin")
+    # date_trunc's periods under Europe/Berlin: the local midnight, read back in UTC
+    rows = [
+        (period_start(date(2024, 2, 1), berlin), 1.0, 1, 1.0, 10.0),
+        (period_start(date(2024, 1, 31), berlin), 2.0, 2, 1.0, 10.0),
+    ]
+    assert rows[0][0] == datetime(2024, 1, 31, 23, tzinfo=timezone.utc)
+
+    assert rollup_time_series(rows, "month", 0, berlin) == [
+        (datetime(2024, 1, 31, 23, tzinfo=timezone.utc), 1.0, 1, 1.0, 10.0),
+        (datetime(2023, 12, 31, 23, tzinfo=timezone.utc), 2.0, 2, 1.0, 10.0),
+    ]
+    assert rollup_time_series(rows, "week", 0, berlin) == [
+        (datetime(2024, 1, 28, 23, tzinfo=timezone.utc), 3.0, 3, 2.0, 20.0),
+    ]
+
+
+def test_merged_time_series_match_date_trunc_in_the_session_time_zone(async_db_session):
+    specs = [
+        TypeAdapter(QuerySpec).validate_python({
+            "id": aggregate_by, "type": "time_series", "aggregate_by": aggregate_by, "device": "MOBILE",
+            "start_date": "2024-01-20", "end_date": "2024-02-10",
+        })
+        for aggregate_by in ("day", "week", "month")
+    ]
+
+    async def run():
+        async with async_db_session() as db:
+            await db.execute(text("SET LOCAL TIME ZONE 'Europe/Berlin'"))
+            await db.execute(text("INSERT INTO campaign VALUES (901, 'Footwear', 'Search')"))
+            await db.execute(text("INSERT INTO ad_group VALUES (9010, 'Socks', 901)"))
+            await db.execute(text('''
+                INSERT INTO ad_group_stats (date, ad_group_id, device, impressions, clicks, conversions, cost)
+                SELECT day::date, 9010, 'MOBILE', 100, 10, 1, 2.5
+                FROM generate_series(DATE '2024-01-25', DATE '2024-02-06', INTERVAL '1 day') AS day
+            '''))
+
+            merged = await _run_time_series(db, [(spec, spec_cache_key(spec)[1]) for spec in specs])
+            direct = {}
+            for spec in specs:
+                params = spec_cache_key(spec)[1]
+                rows = await fetch_time_series_rows(db, spec.aggregate_by, start_date=params["start_date"],
+                                                    end_date=params["end_date"], device="MOBILE")
+                direct[spec.id] = columns_to_records(time_series_columns(rows, []))
+            return merged, direct
+
+    merged, direct = asyncio.run(run())
+    assert merged == direct
+    assert [row["period"] for row in merged["month"]] == [
+        datetime(2024, 1, 31, 23, tzinfo=timezone.utc), datetime(2023, 12, 31, 23, tzinfo=timezone.utc)
+    ]
+
+
+def test_analytics_batch(client: TestClient):
+    queries = [
+        {"id": "monthly", "type": "time_series", "aggregate_by": "month", "start_date": "2024-01-01",
+         "end_date": "2024-03-31"},
+        {"id": "weekly", "type": "time_series", "aggregate_by": "week", "start_date": "2024-01-01",
+         "end_date": "2024-03-31"},
+        {"id": "compare", "type": "compare", "start_date": "2024-03-01", "end_date": "2024-03-31",
+         "compare_mode": "previous_month"},
+        {"id": "trend", "type": "compare_periods", "start_date": "2024-03-01", "end_date": "2024-03-31",
+         "compare_mode": "previous_month", "periods": 2},
+    ]
+    response = client.post("/analytics/batch", json={"queries": queries})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert list(results) == ["monthly", "weekly", "compare", "trend"]
+    assert results["monthly"] == {"data": []}
+    assert results["compare"]["before_period"]["start_date"] == "2024-02-01"
+    assert results["compare"]["before_period"]["end_date"] == "2024-02-29"
+    assert [comparison["before_period"]["start_date"] for comparison in results["trend"]["periods"]] == [
+        "2024-02-01", "2024-01-01"
+    ]
+
+    # The results are cached under the parameters of the single endpoints
+    response = client.get("/compare-performance?start_date=2024-03-01&end_date=2024-03-31&compare_mode=previous_month")
+    assert response.json() == results["compare"]
+    stats = client.get("/internal/cache-stats").json()["namespaces"]
+    assert stats["compare-performance"]["hits"] == 1
+
+
+def test_analytics_batch_validates_queries(client: TestClient):
+    spec = {"id": "a", "type": "time_series", "aggregate_by": "month"}
+    assert client.post("/analytics/batch", json={"queries": [spec, spec]}).status_code == 422
+    assert client.post("/analytics/batch", json={"queries": [dict(spec, type="unknown")]}).status_code == 422
+    assert client.post("/analytics/batch", json={"queries": []}).status_code == 422
@@ -0,0 +1,39 @@
+from datetime import date
+import pandas as pd
+from benchmarks.results import find_regressions
+from benchmarks.synthetic_data import DEVICES, ad_group_frame, iter_stats_chunks
+
+
+def test_iter_stats_chunks_is_reproducible():
+    ad_group_ids = ad_group_frame(campaigns=3, ad_groups_per_campaign=4)["ad_group_id"]
+    chunks = list(iter_stats_chunks(ad_group_ids, date(2024, 1, 30), days=5, chunk_size=50))
+    stats = pd.concat(chunks)
+
+    # 12 ad groups x 3 devices = 36 rows per day, one day per chunk
+    assert [len(chunk) for chunk in chunks] == [36] * 5
+    assert stats["date"].min() == pd.Timestamp("2024-01-30")
+    assert stats["date"].max() == pd.Timestamp("2024-02-03")
+    assert not stats.duplicated(["date", "ad_group_id", "device"]).any()
+    assert set(stats["device"]) == set(DEVICES)
+    assert (stats["clicks"] <= stats["impressions"]).all()
+    assert (stats["conversions"] <= stats["clicks"]).all()
+
+    again = pd.concat(iter_stats_chunks(ad_group_ids, date(2024, 1, 30), days=5, chunk_size=50))
+    pd.testing.assert_frame_equal(stats, again)
+
+
+def test_find_regressions():
+    baseline = {
+        "campaigns": {"requests_per_second": 100.0, "latency_ms": {"p50": 10.0, "p95": 20.0, "p99": 30.0}},
+        "ad_group_stats": {"rows_per_second": 50_000.0},
+    }
+    results = {
+        "campaigns": {"requests_per_second": 90.0, "latency_ms": {"p50": 10.5, "p95": 30.0, "p99": 30.0}},
+        "ad_group_stats": {"rows_per_second": 30_000.0},
+        "new_endpoint": {"requests_per_second": 1.0},
+    }
+
+    regressions = find_regressions(results, baseline, tolerance=0.2)
+    assert [(regression["scenario"], regression["metric"]) for regression in regressions] == [
+        ("campaigns", "latency_ms.p95"), ("ad_group_stats", "rows_per_second")
+    ]
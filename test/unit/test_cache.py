@@ -0,0 +1,130 @@
+import asyncio
+import time
+from datetime import datetime
+from fastapi.testclient import TestClient
+from src.cache.backends import MemoryBackend
+from src.cache.response_cache import ResponseCache, bump_cache_generations, bump_data_version, normalize_params
+
+
+def make_cache(max_entries=10, ttl=300):
+    cache = ResponseCache(MemoryBackend(max_entries=max_entries), ttl=ttl, version_check_seconds=3600)
+    # Skip the database lookup of the data version
+    cache._data_version = 1
+    cache._version_checked_at = time.monotonic()
+    return cache
+
+
+def test_memory_backend_evicts_least_recently_used():
+    async def run():
+        backend = MemoryBackend(max_entries=2)
+        await backend.set("a", 1)
+        await backend.set("b", 2)
+        await backend.get("a")
+        await backend.set("c", 3)
+        return [await backend.get(key) for key in "abc"], backend.evictions
+
+    assert asyncio.run(run()) == ([1, None, 3], 1)
+
+
+def test_memory_backend_expires_entries():
+    async def run():
+        backend = MemoryBackend()
+        await backend.set("a", 1, ttl=0.01)
+        await asyncio.sleep(0.02)
+        return await backend.get("a")
+
+    assert asyncio.run(run()) is None
+
+
+def test_normalize_params():
+    assert normalize_params({"campaigns": [3, 1, 3], "start_date": datetime(2024, 1, 1), "device": None}) == {
+        "campaigns": [1, 3], "start_date": "2024-01-01T00:00:00"
+    }
+
+
+def test_response_cache_hits_and_invalidation():
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    async def run():
+        cache = make_cache()
+        first = await cache.get_or_compute("campaigns", {"campaign_ids": [2, 1]}, None, compute)
+        second = await cache.get_or_compute("campaigns", {"campaign_ids": [1, 2]}, None, compute)
+        await cache.invalidate("campaigns")
+        third = await cache.get_or_compute("campaigns", {"campaign_ids": [1, 2]}, None, compute)
+        # A new data version makes every cached entry unreachable
+        cache._data_version = 2
+        fourth = await cache.get_or_compute("campaigns", {"campaign_ids": [1, 2]}, None, compute)
+        return [first, second, third, fourth], cache.stats()["namespaces"]["campaigns"]
+
+    results, counters = asyncio.run(run())
+    assert [result["value"] for result in results] == [1, 1, 2, 3]
+    assert counters["hits"] == 1
+    assert counters["misses"] == 3
+
+
+def test_result_computed_during_a_bump_is_not_cached():
+    calls = []
+
+    async def run():
+        cache = make_cache()
+
+        async def compute():
+            # A load commits and a rename invalidates the namespace while the result is computed
+            calls.append(1)
+            cache._data_version += 1
+            await cache.invalidate("campaigns")
+            return {"value": len(calls)}
+
+        first = await cache.get_or_compute("campaigns", {}, None, compute)
+        _, cached = await cache.lookup("campaigns", {}, None)
+        return first, cached
+
+    first, cached = asyncio.run(run())
+    assert first == {"value": 1}
+    assert cached is None
+
+
+def test_bump_data_version(db_cursor):
+    db_cursor.execute("SELECT version FROM data_version")
+    before = db_cursor.fetchone()[0]
+    bump_data_version(db_cursor)
+    db_cursor.execute("SELECT version FROM data_version")
+    assert db_cursor.fetchone()[0] == before + 1
+
+
+def test_stored_generations_invalidate_every_worker(async_db_session):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return {"value": len(calls)}
+
+    async def run():
+        # Two workers with their own memory cache, checking the database on every lookup
+        writer, reader = (ResponseCache(MemoryBackend(), version_check_seconds=0) for _ in range(2))
+        async with async_db_session() as db:
+            first = await reader.get_or_compute("campaigns", {}, db, compute)
+            second = await reader.get_or_compute("campaigns", {}, db, compute)
+            # The writer renames a campaign, the reader's own counters are left untouched
+            await bump_cache_generations(db, ["campaigns", "campaigns-summary"])
+            await writer.invalidate("campaigns")
+            third = await reader.get_or_compute("campaigns", {}, db, compute)
+            return [first, second, third], reader.stats()["generations"]
+
+    results, generations = asyncio.run(run())
+    assert [result["value"] for result in results] == [1, 1, 2]
+    assert generations["campaigns"] == generations["campaigns-summary"] >= 1
+
+
+def test_compare_performance_is_cached(client: TestClient):
+    url = "/compare-performance?start_date=2024-01-01&end_date=2024-01-10&compare_mode=preceding"
+    first = client.get(url)
+    second = client.get(url)
+    assert first.json() == second.json()
+
+    counters = client.get("/internal/cache-stats").json()["namespaces"]["compare-performance"]
+    assert counters == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
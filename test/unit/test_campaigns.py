@@ -1,5 +1,8 @@
+import asyncio
 from fastapi.testclient import TestClient
+from sqlalchemy import text
 from sqlalchemy.orm import Session
+from src.database.bulk_updates import rename_campaigns
 
 def test_get_campaigns(client: TestClient):
     response = client.get("/campaigns")
@@ -12,3 +15,172 @@ def test_update_campaign_name(client: TestClient):
     assert response.status_code == 404  # Assuming there is no campaign with id 1 initially
 
     # Add logic to create a campaign and then test the update if needed
+
+def test_update_campaign_name_bigint_id(client: TestClient):
+    # Campaign ids exceed 32 bits, asyncpg rejects them unless the columns are BIGINT
+    response = client.patch("/campaigns/update-name/21294453254", json={"name": "New Campaign Name"})
+    assert response.status_code == 404
+
+def test_get_campaigns_pagination(client: TestClient):
+    response = client.get("/campaigns?limit=1&offset=0&campaign_ids=1&campaign_ids=2")
+    assert response.status_code == 200
+    assert len(response.json()) <= 1
+
+def test_get_campaigns_invalid_limit(client: TestClient):
+    response = client.get("/campaigns?limit=0")
+    assert response.status_code == 422
+
+def test_build_campaign_tree():
+    from types import SimpleNamespace
+    from src.analytics.campaign_rollup import build_campaign_tree
+
+    def row(campaign_id, campaign_name, ad_group_id, ad_group_name, avg_cost, avg_conversions):
+        return SimpleNamespace(campaign_id=campaign_id, campaign_name=campaign_name, ad_group_id=ad_group_id,
+                               ad_group_name=ad_group_name, avg_cost=avg_cost, avg_conversions=avg_conversions)
+
+    rows = [
+        row(1, "Footwear", 10, "Socks", 10.0, 2.0),
+        row(1, "Footwear", 11, "Sandals", 20.0, 3.0),
+        row(2, "Empty", None, None, None, None),
+        row(3, "No Stats", 30, "Tops", None, None),
+    ]
+    result = build_campaign_tree(rows)
+
+    assert [c["campaign_name"] for c in result] == ["Footwear", "Empty", "No Stats"]
+    assert result[0]["number_of_ad_groups"] == 2
+    assert result[0]["average_monthly_cost"] == 15.0
+    assert result[0]["average_cost_per_conversion"] == 6.0
+    assert result[1] == {"campaign_name": "Empty", "number_of_ad_groups": 0, "ad_groups": [],
+                         "average_monthly_cost": 0, "average_cost_per_conversion": 0}
+    assert result[2]["ad_groups"] == [{"ad_group_name": "Tops", "average_cost": 0, "average_conversions": 0}]
+
+def test_campaign_summary_pages(db_session: Session, db_cursor):
+    import pandas as pd
+    from datetime import date
+    from src.analytics.campaign_rollup import build_campaign_rollup_query, build_campaign_tree
+    from src.analytics.campaign_summary import build_campaign_summary_query, build_summary_page, decode_cursor
+    from src.ingestion.loader import load_table
+    from src.ingestion.rollups import refresh_campaign_summary, refresh_rollups
+
+    campaign_ids = [801, 802, 803, 804]
+    load_table(db_cursor, "campaign", [pd.DataFrame({
+        "campaign_id": campaign_ids,
+        "campaign_name": ["Summary Shoes", "Summary Shirts", "Summary 100%", "Summary Empty"],
+        "campaign_type": ["Search", "Display", "Search", "Search"],
+    })])
+    load_table(db_cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [8010, 8011, 8020, 8030], "ad_group_name": ["Socks", "Laces", "Tees", "Caps"],
+        "campaign_id": [801, 801, 802, 803],
+    })])
+    load_table(db_cursor, "ad_group_stats", [pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-01", "2024-01-01"]),
+        "ad_group_id": [8010, 8010, 8020, 8030],
+        "device": ["MOBILE", "MOBILE", "MOBILE", "DESKTOP"],
+        "impressions": [100.0, 100.0, 100.0, 100.0],
+        "clicks": [10, 10, 10, 10],
+        "conversions": [1.0, 3.0, 4.0, 0.0],
+        "cost": [10.0, 30.0, 40.0, 5.0],
+    })])
+    refresh_rollups(db_cursor, date(2024, 1, 1), date(2024, 1, 2))
+    assert refresh_campaign_summary(db_cursor, date(2024, 1, 1), date(2024, 1, 2)) >= 4
+
+    def page(sort="campaign_id", order="asc", limit=10, after=None, **filters):
+        filters.setdefault("name_prefix", "Summary ")
+        query = build_campaign_summary_query(sort, order, limit=limit, after=after, **filters)
+        return build_summary_page(db_session.execute(query).all(), sort, order, limit)
+
+    # The figures match the nested /campaigns response
+    tree = build_campaign_tree(db_session.execute(build_campaign_rollup_query(campaign_ids)).all())
+    items = page()["items"]
+    assert [item["campaign_id"] for item in items] == campaign_ids
+    for item, campaign in zip(items, tree):
+        for field in ("campaign_name", "number_of_ad_groups", "average_monthly_cost", "average_cost_per_conversion"):
+            assert item[field] == campaign[field]
+    assert items[0]["average_monthly_cost"] == 10.0
+    assert items[0]["average_conversions"] == 1.0
+
+    # Walking the pages by cursor visits every campaign once, in order
+    seen, cursor = [], None
+    while True:
+        result = page("cost", "desc", limit=1, after=decode_cursor(cursor, "cost", "desc") if cursor else None)
+        seen += [item["campaign_id"] for item in result["items"]]
+        cursor = result["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [802, 801, 803, 804]
+
+    # Ties on the sort value are broken by campaign_id
+    assert [item["campaign_id"] for item in page("cost_per_conversion")["items"]] == [803, 804, 801, 802]
+
+    assert [item["campaign_id"] for item in page(campaign_type="Display")["items"]] == [802]
+    assert [item["campaign_id"] for item in page(name_prefix="Summary Sh")["items"]] == [801, 802]
+    # LIKE wildcards in the prefix are matched literally
+    assert [item["campaign_id"] for item in page(name_prefix="Summary 100%")["items"]] == [803]
+
+    # Without new stats only the changed campaigns are refreshed
+    db_cursor.execute("UPDATE campaign SET campaign_name = 'Summary Boots' WHERE campaign_id = 801")
+    assert refresh_campaign_summary(db_cursor, stats_changed=False) == 1
+    assert page(name_prefix="Summary Boots")["items"][0]["average_monthly_cost"] == 10.0
+
+
+def test_campaign_summary_cursor():
+    import pytest
+    from src.analytics.campaign_summary import InvalidCursorError, decode_cursor, encode_cursor
+
+    cursor = encode_cursor("cost", "desc", 12.345678, 801)
+    assert decode_cursor(cursor, "cost", "desc") == (12.345678, 801)
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, "cost", "asc")
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not a cursor", "cost", "desc")
+
+
+def test_get_campaign_summary(client: TestClient):
+    response = client.get("/campaigns/summary?sort=cost&order=desc&limit=5")
+    assert response.status_code == 200
+    assert set(response.json()) == {"items", "next_cursor"}
+    assert len(response.json()["items"]) <= 5
+
+    assert client.get("/campaigns/summary?sort=clicks").status_code == 422
+    assert client.get("/campaigns/summary?limit=1000").status_code == 422
+    assert client.get("/campaigns/summary?cursor=bogus").status_code == 400
+
+def test_bulk_update_campaigns_reports_missing_ids(client: TestClient):
+    response = client.patch("/campaigns/bulk", json={"updates": [{"campaign_id": 1, "name": "Renamed"}]})
+    assert response.status_code == 200
+    assert response.json() == {"updated": 0, "missing_ids": [1]}
+
+    duplicated = [{"campaign_id": 1, "name": "A"}, {"campaign_id": 1, "name": "B"}]
+    assert client.patch("/campaigns/bulk", json={"updates": duplicated}).status_code == 422
+    assert client.patch("/campaigns/bulk", json={"updates": []}).status_code == 422
+
+
+def test_rename_campaigns_in_batches(async_db_session):
+    async def run():
+        async with async_db_session() as db:
+            await db.execute(text(
+                "INSERT INTO campaign (campaign_id, campaign_name, campaign_type) VALUES "
+                "(701, 'Old 1', 'Search'), (702, 'Old 2', 'Search'), (703, 'Old 3', 'Display')"
+            ))
+            await db.execute(text(
+                "INSERT INTO campaign_summary (campaign_id, campaign_name, campaign_type, number_of_ad_groups, "
+                "average_monthly_cost, average_conversions, average_cost_per_conversion) "
+                "VALUES (701, 'Old 1', 'Search', 0, 0, 0, 0)"
+            ))
+
+            renames = [(701, "New 1"), (799, "Missing"), (703, "New 3 it's")]
+            missing = await rename_campaigns(db, renames, batch_size=2)
+
+            names = dict((await db.execute(text(
+                "SELECT campaign_id, campaign_name FROM campaign WHERE campaign_id BETWEEN 700 AND 799"
+            ))).all())
+            summary_name = (await db.execute(text(
+                "SELECT campaign_name FROM campaign_summary WHERE campaign_id = 701"
+            ))).scalar()
+        return missing, names, summary_name
+
+    missing, names, summary_name = asyncio.run(run())
+    assert missing == [799]
+    assert names == {701: "New 1", 702: "Old 2", 703: "New 3 it's"}
+    assert summary_name == "New 1"
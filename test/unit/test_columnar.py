@@ -0,0 +1,131 @@
+import asyncio
+import math
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from src.analytics.analytics import build_period_comparison_query, build_time_series_query
+from src.analytics.columnar import ColumnarEngine, create_columnar_engine, load_snapshot
+from src.ingestion.loader import load_table
+from src.ingestion.rollups import refresh_rollups
+
+
+def seed_stats(cursor):
+    load_table(cursor, "campaign", [pd.DataFrame({
+        "campaign_id": [901, 902], "campaign_name": ["Footwear", "Clothing"], "campaign_type": ["Search", "Display"],
+    })])
+    load_table(cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [9010, 9011, 9020], "ad_group_name": ["Socks", "Shoes", "Shirts"],
+        "campaign_id": [901, 901, 902],
+    })])
+    days = pd.date_range("2024-01-01", "2024-03-31")
+    rng = np.random.default_rng(7)
+    frames = []
+    for ad_group_id in (9010, 9011, 9020):
+        for device in ("MOBILE", "DESKTOP"):
+            frames.append(pd.DataFrame({
+                "date": days,
+                "ad_group_id": ad_group_id,
+                "device": device,
+                "impressions": rng.integers(100, 1000, len(days)).astype(float),
+                "clicks": rng.integers(0, 50, len(days)),
+                "conversions": rng.integers(0, 5, len(days)).astype(float),
+                "cost": rng.integers(0, 10_000, len(days)) / 100,
+            }))
+    load_table(cursor, "ad_group_stats", frames)
+    refresh_rollups(cursor, date(2024, 1, 1), date(2024, 3, 31))
+
+
+def assert_rows_match(sql_rows, memory_rows):
+    assert len(sql_rows) == len(memory_rows)
+    for sql_row, memory_row in zip(sql_rows, memory_rows):
+        assert sql_row[0] == memory_row[0]
+        for sql_value, memory_value in zip(sql_row[1:], memory_row[1:]):
+            assert math.isclose(sql_value, memory_value, rel_tol=1e-9), (sql_row, memory_row)
+
+
+@pytest.mark.parametrize("aggregate_by", ["day", "week", "month"])
+def test_columnar_time_series_matches_sql(db_session: Session, db_cursor, aggregate_by):
+    seed_stats(db_cursor)
+    snapshot = load_snapshot(db_session.connection(), batch_size=100)
+    assert snapshot.rows == 3 * 2 * 91
+
+    filters = [
+        {},
+        {"device": "MOBILE"},
+        {"campaigns": [901]},
+        {"ad_groups": [9011, 9020], "device": "DESKTOP"},
+        {"start_date": datetime(2024, 1, 10), "end_date": datetime(2024, 2, 20)},
+        {"campaigns": [902], "start_date": datetime(2024, 3, 1), "device": "TABLET"},
+    ]
+    for kwargs in filters:
+        sql_rows = db_session.execute(build_time_series_query(aggregate_by, **kwargs)).all()
+        assert_rows_match(sql_rows, snapshot.time_series_rows(aggregate_by, **kwargs))
+
+
+@pytest.mark.parametrize("aggregate_by", ["day", "week", "month"])
+def test_columnar_time_series_matches_sql_in_the_session_time_zone(db_session: Session, db_cursor, aggregate_by):
+    seed_stats(db_cursor)
+    snapshot = load_snapshot(db_session.connection())
+    # date_trunc labels the periods with their midnight in the session's zone, across the
+    # switch to summer time on 2024-03-31
+    db_session.execute(text("SET LOCAL TIME ZONE 'Europe/Berlin'"))
+
+    sql_rows = db_session.execute(build_time_series_query(aggregate_by)).all()
+    memory_rows = snapshot.time_series_rows(aggregate_by, zone=ZoneInfo("Europe/Berlin"))
+    assert_rows_match(sql_rows, memory_rows)
+    assert memory_rows[-1][0] == datetime(2023, 12, 31, 23, tzinfo=timezone.utc)
+
+
+def test_columnar_period_totals_match_sql(db_session: Session, db_cursor):
+    seed_stats(db_cursor)
+    snapshot = load_snapshot(db_session.connection())
+
+    periods = [
+        (datetime(2024, 3, 1), datetime(2024, 3, 31)),
+        (datetime(2024, 2, 1), datetime(2024, 2, 29)),
+        (datetime(2024, 1, 15), datetime(2024, 1, 15)),
+        (datetime(2023, 12, 1), datetime(2023, 12, 31)),
+    ]
+    for device in (None, "DESKTOP"):
+        result = db_session.execute(build_period_comparison_query(periods, device)).one()._mapping
+        totals = snapshot.period_totals(periods, device)
+        for index, total in enumerate(("total_cost", "total_clicks", "total_conversions", "total_impressions")):
+            expected = [result[f"p{period}_{total}"] or 0 for period in range(len(periods))]
+            assert totals[index] == pytest.approx(expected, rel=1e-9)
+
+
+def test_columnar_engine_refreshes_on_data_version_change(db_session: Session, db_cursor, monkeypatch):
+    seed_stats(db_cursor)
+    engine = ColumnarEngine(enabled=True, max_age=3600, version_check_seconds=0)
+    monkeypatch.setattr(engine, "_load", lambda version: load_snapshot(db_session.connection(), version))
+
+    versions = iter([1, 1, 2, 2])
+
+    async def current_version(db):
+        return next(versions)
+
+    monkeypatch.setattr(engine, "_current_version", current_version)
+
+    async def run():
+        first = await engine.get_snapshot(None)
+        assert await engine.get_snapshot(None) is first
+        # A new version is loaded in the background, the old snapshot is served meanwhile
+        assert await engine.get_snapshot(None) is first
+        await engine._refresh_task
+        return first, await engine.get_snapshot(None)
+
+    first, second = asyncio.run(run())
+    assert (first.version, second.version) == (1, 2)
+    assert engine.stats()["refreshes"] == 2
+
+
+def test_create_columnar_engine_rejects_unknown_engine(monkeypatch):
+    monkeypatch.setenv("ANALYTICS_ENGINE", "duckdb")
+    with pytest.raises(ValueError):
+        create_columnar_engine()
+    monkeypatch.setenv("ANALYTICS_ENGINE", "memory")
+    assert create_columnar_engine().enabled
@@ -1,4 +1,10 @@
+import asyncio
+from decimal import Decimal
+from sqlalchemy import Numeric, func, literal, select
 from src.database.db_conn import create_connection
+from src.database.pool import PoolMetrics, pool_options, TimedAsyncAdaptedQueuePool, TimedNullPool
+from src.database.rows import as_float, fetch_all, fetch_one, fetch_scalar
+from src.models.models import Campaign
 
 def test_create_connection():
     """
@@ -12,3 +18,57 @@ def test_create_connection():
     # If the connection is successful, close it
     if connection:
         connection.close()
+
+def test_pool_options_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_POOL_RECYCLE", "300")
+    options = pool_options(is_async=True)
+    assert options["poolclass"] is TimedAsyncAdaptedQueuePool
+    assert options["pool_size"] == 20
+    assert options["pool_recycle"] == 300
+    assert options["pool_pre_ping"] is True
+
+    monkeypatch.setenv("DB_POOL_MODE", "null")
+    monkeypatch.setenv("DB_PGBOUNCER_TRANSACTION_MODE", "true")
+    options = pool_options(is_async=True)
+    assert options["poolclass"] is TimedNullPool
+    assert "pool_size" not in options
+    assert options["connect_args"]["statement_cache_size"] == 0
+
+def test_pool_metrics_histogram():
+    metrics = PoolMetrics()
+    metrics.record_checkout(0.0005)
+    metrics.record_checkout(0.2)
+    metrics.record_checkout(10)
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 3
+    assert snapshot["wait_histogram"]["<=1ms"] == 1
+    assert snapshot["wait_histogram"]["<=250ms"] == 1
+    assert snapshot["wait_histogram"][">5000ms"] == 1
+    assert snapshot["max_wait_ms"] == 10000
+
+def test_pool_stats_endpoint(client):
+    response = client.get("/internal/pool-stats")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["sync"]["pool_class"] == "TimedQueuePool"
+    assert "wait_histogram" in stats["async"]
+
+
+def test_core_row_path(async_db_session):
+    async def run():
+        async with async_db_session() as db:
+            rows = await fetch_all(db, select(Campaign.campaign_id, Campaign.campaign_name).limit(5))
+            # A DECIMAL sum comes back as a float
+            decimal_sum = func.sum(literal(Decimal("0.10"), Numeric(10, 2)))
+            total = await fetch_one(db, select(as_float(decimal_sum).label("total")))
+            count = await fetch_scalar(db, select(func.count()).select_from(Campaign))
+            # Rows are plain tuples, no entities end up in the identity map
+            return rows, total, count, len(db.identity_map)
+
+    rows, total, count, identities = asyncio.run(run())
+    assert all(isinstance(row, tuple) and len(row) == 2 for row in rows)
+    assert total.total == 0.1 and type(total.total) is float
+    assert count >= len(rows)
+    assert identities == 0
+
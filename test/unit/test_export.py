@@ -0,0 +1,71 @@
+import asyncio
+import io
+import json
+from datetime import datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from src.analytics import export
+from src.analytics.export import UnsupportedFormatError, negotiate_format, stream_time_series
+
+BATCHES = [
+    [(datetime(2024, 1, 2, tzinfo=timezone.utc), 20.0, 10, 2.0, 100.0),
+     (datetime(2024, 1, 1, tzinfo=timezone.utc), 10.0, 0, 0.0, 0.0)],
+    [(datetime(2023, 12, 31, tzinfo=timezone.utc), 5.0, 5, 1.0, 50.0)],
+]
+
+
+def encode(monkeypatch, export_format):
+    async def fake_stream_rows(db, query, batch_size):
+        for batch in BATCHES:
+            yield batch
+
+    async def collect():
+        return [chunk async for chunk in stream_time_series(None, None, export_format)]
+
+    monkeypatch.setattr(export, "stream_rows", fake_stream_rows)
+    return asyncio.run(collect())
+
+
+def test_negotiate_format():
+    assert negotiate_format(None, None) == "json"
+    assert negotiate_format(None, "text/html, text/csv;q=0.9") == "csv"
+    assert negotiate_format("parquet", "text/csv") == "parquet"
+    with pytest.raises(UnsupportedFormatError):
+        negotiate_format("xml", None)
+
+
+def test_stream_ndjson(monkeypatch):
+    chunks = encode(monkeypatch, "ndjson")
+    records = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert len(chunks) == 2
+    assert records[0]["period"] == "2024-01-02T00:00:00+00:00"
+    assert records[0]["avg_click_through_rate"] == 10.0
+    assert records[1]["avg_cost_per_click"] == 0
+
+
+def test_stream_csv(monkeypatch):
+    lines = b"".join(encode(monkeypatch, "csv")).decode().splitlines()
+    assert lines[0].startswith("period,total_cost,total_clicks")
+    assert len(lines) == 4
+
+
+def test_stream_arrow_and_parquet(monkeypatch):
+    ipc = pytest.importorskip("pyarrow.ipc")
+    pq = pytest.importorskip("pyarrow.parquet")
+    table = ipc.open_stream(b"".join(encode(monkeypatch, "arrow"))).read_all()
+    assert table.num_rows == 3
+    assert table.column("avg_conversion_rate").to_pylist() == [20.0, 0.0, 20.0]
+
+    parquet_file = pq.ParquetFile(io.BytesIO(b"".join(encode(monkeypatch, "parquet"))))
+    # One row group per streamed batch
+    assert parquet_file.num_row_groups == 2
+    assert parquet_file.read().equals(table)
+
+
+def test_time_series_formats(client: TestClient):
+    url = "/performance-time-series?aggregate_by=day&start_date=2024-01-01&end_date=2024-01-31"
+    assert client.get(url + "&format=ndjson").headers["content-type"] == "application/x-ndjson"
+    response = client.get(url, headers={"Accept": "text/csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.startswith("period,")
+    assert client.get(url + "&format=xml").status_code == 406
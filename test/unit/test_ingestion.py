@@ -0,0 +1,197 @@
+import pandas as pd
+import pytest
+from datetime import date
+from src.ingestion.incremental import get_watermark, incremental_start_date
+from src.ingestion.loader import TableLoader, iter_frame_chunks, load_table
+from src.ingestion.rollups import refresh_rollups
+from src.ingestion.readers import SourceError, iter_csv_chunks, iter_xlsx_chunks, resolve_sources
+
+
+def stats_frame(dates, costs):
+    return pd.DataFrame({
+        "date": pd.to_datetime(dates),
+        "ad_group_id": [9010] * len(dates),
+        "device": ["MOBILE"] * len(dates),
+        "impressions": [100.0] * len(dates),
+        "clicks": [10] * len(dates),
+        "conversions": [1.0] * len(dates),
+        "cost": costs,
+    })
+
+
+def seed_ad_group(cursor):
+    load_table(cursor, "campaign", [pd.DataFrame({
+        "campaign_id": [901], "campaign_name": ["Footwear"], "campaign_type": ["Search"],
+    })])
+    load_table(cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [9010], "ad_group_name": ["Socks"], "campaign_id": [901],
+    })])
+
+
+def test_iter_frame_chunks():
+    df = pd.DataFrame({"value": range(10)})
+    chunks = list(iter_frame_chunks(df, 4))
+    assert [len(chunk) for chunk in chunks] == [4, 4, 2]
+
+
+def test_table_loader_skips_conflicting_rows(db_cursor):
+    campaigns = pd.DataFrame({
+        "campaign_id": [901, 902, 902],
+        "campaign_name": ["Footwear", "Clothing", "Clothing duplicate"],
+        "campaign_type": ["Search", "Search", "Search"],
+    })
+
+    progress = []
+    summary = load_table(db_cursor, "campaign", iter_frame_chunks(campaigns, 2),
+                         on_progress=lambda table, rows_read, _: progress.append((table, rows_read)))
+
+    assert progress == [("campaign", 2), ("campaign", 3)]
+    assert summary["rows_read"] == 3
+    assert summary["rows_written"] == 2
+    db_cursor.execute("SELECT campaign_name FROM campaign WHERE campaign_id = 902")
+    assert db_cursor.fetchone()[0] == "Clothing"
+
+
+def test_table_loader_copies_stats(db_cursor):
+    seed_ad_group(db_cursor)
+
+    loader = TableLoader(db_cursor, "ad_group_stats")
+    loader.load_chunk(pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-02"]),
+        "ad_group_id": [9010, 9010],
+        "device": ["MOBILE", "DESKTOP"],
+        "impressions": [100.0, 50.0],
+        "clicks": [10, 5],
+        "conversions": [1.0, 0.5],
+        "cost": [12.5, 6.25],
+    }))
+    loader.finish()
+
+    assert loader.rows_written == 2
+    db_cursor.execute("SELECT SUM(cost), SUM(clicks) FROM ad_group_stats WHERE ad_group_id = 9010")
+    total_cost, total_clicks = db_cursor.fetchone()
+    assert float(total_cost) == 18.75
+    assert total_clicks == 15
+
+
+def test_iter_xlsx_chunks(tmp_path):
+    from openpyxl import Workbook
+
+    path = tmp_path / "data.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "campaign"
+    sheet.append(["campaign_id", "campaign_name", "campaign_type"])
+    for campaign_id in range(5):
+        sheet.append([campaign_id, f"Campaign {campaign_id}", "SEARCH_STANDARD"])
+    workbook.save(path)
+
+    chunks = list(iter_xlsx_chunks(str(path), "campaign", 2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert list(chunks[0].columns) == ["campaign_id", "campaign_name", "campaign_type"]
+    assert chunks[2]["campaign_name"].iloc[0] == "Campaign 4"
+
+
+def test_iter_csv_chunks(tmp_path):
+    path = tmp_path / "campaign.csv"
+    pd.DataFrame({"campaign_id": range(7)}).to_csv(path, index=False)
+
+    assert [len(chunk) for chunk in iter_csv_chunks(str(path), 3)] == [3, 3, 1]
+
+
+def test_resolve_sources_directory(tmp_path):
+    for table in ["campaign", "ad_group"]:
+        (tmp_path / f"{table}.csv").write_text("id\n")
+
+    sources = resolve_sources(str(tmp_path), ["campaign", "ad_group"])
+    assert sources["campaign"] == ("csv", str(tmp_path / "campaign.csv"))
+
+    with pytest.raises(SourceError):
+        resolve_sources(str(tmp_path), ["ad_group_stats"])
+
+
+def test_resolve_sources_unsupported_file(tmp_path):
+    with pytest.raises(SourceError):
+        resolve_sources(str(tmp_path / "campaign.json"), ["campaign"])
+
+
+def test_stats_reload_is_idempotent(db_cursor):
+    seed_ad_group(db_cursor)
+    frame = stats_frame(["2024-01-01", "2024-01-02"], [10.0, 20.0])
+
+    first = load_table(db_cursor, "ad_group_stats", [frame])
+    second = load_table(db_cursor, "ad_group_stats", [frame])
+    changed = load_table(db_cursor, "ad_group_stats", [stats_frame(["2024-01-02"], [25.0])])
+
+    assert first["rows_written"] == 2
+    assert second["rows_written"] == 0
+    assert changed["rows_written"] == 1
+    db_cursor.execute("SELECT COUNT(*), SUM(cost) FROM ad_group_stats WHERE ad_group_id = 9010")
+    count, total_cost = db_cursor.fetchone()
+    assert count == 2
+    assert float(total_cost) == 35.0
+
+
+def test_stats_duplicate_keys_are_summed(db_cursor):
+    seed_ad_group(db_cursor)
+
+    load_table(db_cursor, "ad_group_stats", iter_frame_chunks(stats_frame(["2024-01-01"] * 3, [1.0, 2.0, 3.0]), 2))
+
+    db_cursor.execute("SELECT COUNT(*), SUM(cost) FROM ad_group_stats WHERE ad_group_id = 9010")
+    count, total_cost = db_cursor.fetchone()
+    assert count == 1
+    assert float(total_cost) == 6.0
+
+
+def test_incremental_load_skips_rows_before_watermark(db_cursor):
+    seed_ad_group(db_cursor)
+    load_table(db_cursor, "ad_group_stats", [stats_frame(["2024-01-01", "2024-01-02"], [10.0, 20.0])])
+    watermark = get_watermark(db_cursor, "ad_group_stats")
+    assert watermark == date(2024, 1, 2)
+
+    min_date = incremental_start_date(watermark, lookback_days=0)
+    summary = load_table(
+        db_cursor, "ad_group_stats",
+        [stats_frame(["2024-01-01", "2024-01-02", "2024-01-03"], [99.0, 99.0, 30.0])],
+        min_date=min_date,
+    )
+
+    assert summary["rows_skipped"] == 2
+    assert summary["rows_written"] == 1
+    assert summary["date_range"] == ["2024-01-03", "2024-01-03"]
+    assert get_watermark(db_cursor, "ad_group_stats") == date(2024, 1, 3)
+
+
+def test_incremental_start_date():
+    assert incremental_start_date(None, 3) is None
+    assert incremental_start_date(date(2024, 3, 10), 0) == date(2024, 3, 11)
+    assert incremental_start_date(date(2024, 3, 10), 3) == date(2024, 3, 8)
+
+
+def test_refresh_rollups(db_cursor):
+    seed_ad_group(db_cursor)
+    load_table(db_cursor, "ad_group_stats", [stats_frame(["2024-01-01", "2024-01-02"], [10.0, 20.0])])
+    refresh_rollups(db_cursor, date(2024, 1, 1), date(2024, 1, 2))
+
+    # A correction for one day only refreshes that day
+    load_table(db_cursor, "ad_group_stats", [stats_frame(["2024-01-02"], [25.0])])
+    refresh_rollups(db_cursor, date(2024, 1, 2), date(2024, 1, 2))
+
+    db_cursor.execute("SELECT date, cost FROM ad_group_daily_stats WHERE ad_group_id = 9010 ORDER BY date")
+    assert [(day.isoformat(), float(cost)) for day, cost in db_cursor.fetchall()] == [
+        ("2024-01-01", 10.0), ("2024-01-02", 25.0)
+    ]
+    db_cursor.execute("SELECT SUM(cost), SUM(clicks) FROM campaign_daily_stats WHERE campaign_id = 901")
+    total_cost, total_clicks = db_cursor.fetchone()
+    assert float(total_cost) == 35.0
+    assert total_clicks == 20
+
+
+def test_stats_source_falls_back_to_raw_rows():
+    from src.models.models import AdGroupStats, AdGroupDailyStats, CampaignDailyStats
+    from src.analytics.sources import stats_source
+
+    assert stats_source() is CampaignDailyStats
+    assert stats_source("ad_group_id") is AdGroupDailyStats
+    assert stats_source("ad_group_id", "device") is AdGroupStats
@@ -0,0 +1,32 @@
+import logging
+from src.utils.log import DailyFileHandler, Log
+
+
+def test_log_records_caller(tmp_path, monkeypatch):
+    Log.shutdown()
+    monkeypatch.chdir(tmp_path)
+
+    def get_campaigns():
+        Log.INFO("Campaigns retrieved successfully.")
+        Log.DEBUG("Not written at INFO level.")
+
+    get_campaigns()
+    Log.shutdown()
+
+    (log_file,) = (tmp_path / "logs").iterdir()
+    lines = log_file.read_text().splitlines()
+    assert len(lines) == 1
+    assert lines[0].endswith("INFO: test_log.py: get_campaigns: Campaigns retrieved successfully.")
+
+
+def test_daily_file_handler_switches_files(tmp_path, monkeypatch):
+    handler = DailyFileHandler(str(tmp_path))
+    record = logging.LogRecord("app_logger", logging.INFO, __file__, 1, "message", None, None)
+
+    monkeypatch.setattr(DailyFileHandler, "_today", staticmethod(lambda: "2024-01-01"))
+    handler.emit(record)
+    monkeypatch.setattr(DailyFileHandler, "_today", staticmethod(lambda: "2024-01-02"))
+    handler.emit(record)
+    handler.close()
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["2024-01-01.log", "2024-01-02.log"]
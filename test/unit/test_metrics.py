@@ -0,0 +1,57 @@
+import numpy as np
+from datetime import datetime
+from src.analytics.analytics import performance_metrics
+from src.analytics.metrics import derive_metrics, safe_divide
+
+
+def reference_metrics(cost, clicks, conversions, impressions):
+    """Scalar versions of the formulas, as documented in how_to_use_api.md."""
+    return {
+        "cost_per_click": round(cost / clicks, 2) if clicks else 0,
+        "cost_per_conversion": round(cost / conversions, 2) if conversions else 0,
+        "cost_per_mille_impression": round(cost * 1000 / impressions, 2) if impressions else 0,
+        "click_through_rate": round(clicks * 100 / impressions, 2) if impressions else 0,
+        "conversion_rate": round(conversions * 100 / clicks, 2) if clicks else 0,
+    }
+
+
+def test_safe_divide_returns_zero_for_zero_denominators():
+    assert safe_divide([1, 2, 3], [2, 0, 3]).tolist() == [0.5, 0, 1]
+
+
+def test_derive_metrics_pinned_values():
+    metrics = derive_metrics([1411.56, 0, 10], [481, 0, 0], [108.36, 0, 0], [6704, 0, 50])
+    assert metrics["cost_per_click"].tolist() == [2.93, 0, 0]
+    assert metrics["cost_per_conversion"].tolist() == [13.03, 0, 0]
+    assert metrics["cost_per_mille_impression"].tolist() == [210.55, 0, 200]
+    assert metrics["click_through_rate"].tolist() == [7.17, 0, 0]
+    assert metrics["conversion_rate"].tolist() == [22.53, 0, 0]
+
+
+def test_derive_metrics_matches_scalar_formulas():
+    rng = np.random.default_rng(7)
+    cost = rng.uniform(0, 5000, 500).round(2)
+    clicks = rng.integers(0, 2000, 500)
+    conversions = rng.uniform(0, 300, 500).round(2)
+    impressions = rng.integers(0, 50000, 500)
+    clicks[::10] = 0
+    impressions[::7] = 0
+
+    metrics = derive_metrics(cost, clicks, conversions, impressions)
+    for i in range(500):
+        expected = reference_metrics(cost[i], clicks[i], conversions[i], impressions[i])
+        for name, value in expected.items():
+            assert abs(metrics[name][i] - value) <= 0.01 + 1e-9, (name, i)
+
+
+def test_performance_metrics_uses_percentages():
+    metrics = performance_metrics(datetime(2024, 5, 15), datetime(2024, 5, 21), 1411.56, 481, 108.36, 6704)
+    assert metrics["click_through_rate"] == 7.17
+    assert metrics["conversion_rate"] == 22.53
+    assert metrics["total_clicks"] == 481
+
+
+def test_performance_metrics_handles_empty_periods():
+    metrics = performance_metrics(datetime(2024, 5, 15), datetime(2024, 5, 21), None, None, None, None)
+    assert metrics["cost_per_click"] == 0
+    assert metrics["total_cost"] == 0
@@ -0,0 +1,129 @@
+from datetime import datetime
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from src.analytics.analytics import build_performance_query, build_time_series_query
+from src.database.migrations import apply_migrations, is_partitioned, partition_ad_group_stats_monthly
+from src.ingestion.loader import load_table
+
+
+def explain(db_session, query):
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    # The test tables are tiny, so sequential scans are disabled to check that an index is usable at all
+    db_session.execute(text("SET LOCAL enable_seqscan = off"))
+    return "\n".join(row[0] for row in db_session.execute(text(f"EXPLAIN {compiled}")))
+
+
+def test_apply_migrations_is_idempotent(db_cursor):
+    # db_cursor has already applied every migration
+    assert apply_migrations(db_cursor) == []
+
+
+def seed_stats(cursor):
+    load_table(cursor, "campaign", [pd.DataFrame({
+        "campaign_id": [901], "campaign_name": ["Footwear"], "campaign_type": ["Search"],
+    })])
+    load_table(cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [9010, 9011], "ad_group_name": ["Socks", "Shoes"], "campaign_id": [901, 901],
+    })])
+    load_table(cursor, "ad_group_stats", [pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-15", "2024-01-15", "2024-01-16"]),
+        "ad_group_id": [9010, 9011, 9010],
+        "device": ["MOBILE", "MOBILE", "DESKTOP"],
+        "impressions": [100.0, 100.0, 100.0],
+        "clicks": [10, 10, 10],
+        "conversions": [1.0, 1.0, 1.0],
+        "cost": [10.0, 20.0, 30.0],
+    })])
+
+
+def reapply_migration(cursor, version):
+    cursor.execute("DELETE FROM schema_migrations WHERE version = %s", (version,))
+    assert apply_migrations(cursor) == [version]
+
+
+def test_rollup_migration_backfills_loaded_stats(db_cursor):
+    # Stats loaded before the rollup tables existed
+    seed_stats(db_cursor)
+    db_cursor.execute("DELETE FROM ad_group_daily_stats")
+    db_cursor.execute("DELETE FROM campaign_daily_stats")
+
+    reapply_migration(db_cursor, "0004_daily_rollups")
+    db_cursor.execute("SELECT COUNT(*), SUM(cost) FROM ad_group_daily_stats")
+    assert db_cursor.fetchone() == (3, 60.0)
+    db_cursor.execute("SELECT date, cost FROM campaign_daily_stats ORDER BY date")
+    assert [(day.isoformat(), cost) for day, cost in db_cursor.fetchall()] == [("2024-01-15", 30.0), ("2024-01-16", 30.0)]
+
+
+def test_campaign_summary_migration_backfills_existing_campaigns(db_cursor):
+    seed_stats(db_cursor)
+    db_cursor.execute("DELETE FROM campaign_summary")
+
+    reapply_migration(db_cursor, "0007_campaign_summary")
+    db_cursor.execute("SELECT campaign_id, campaign_name, number_of_ad_groups FROM campaign_summary")
+    assert db_cursor.fetchall() == [(901, "Footwear", 2)]
+
+
+def test_stats_sample_migration_samples_loaded_stats(db_cursor):
+    seed_stats(db_cursor)
+    db_cursor.execute("DELETE FROM ad_group_stats_sample")
+    db_cursor.execute("DELETE FROM ad_group_stats_strata")
+
+    reapply_migration(db_cursor, "0008_stats_sample")
+    db_cursor.execute("SELECT date, device, population_rows, sample_rows FROM ad_group_stats_strata ORDER BY date")
+    assert [(day.isoformat(), device, population, sample) for day, device, population, sample in db_cursor.fetchall()] == [
+        ("2024-01-15", "MOBILE", 2, 2), ("2024-01-16", "DESKTOP", 1, 1),
+    ]
+    db_cursor.execute("SELECT COUNT(*) FROM ad_group_stats_sample")
+    assert db_cursor.fetchone()[0] == 3
+
+
+def test_performance_queries_use_indexes(db_session, db_cursor):
+    start_date, end_date = datetime(2024, 1, 1), datetime(2024, 1, 31)
+
+    queries = [
+        build_performance_query(start_date, end_date),
+        build_performance_query(start_date, end_date, device="MOBILE"),
+        build_time_series_query("day", None, start_date, end_date),
+        build_time_series_query("week", [1, 2], start_date, end_date),
+        build_time_series_query("month", [1, 2], start_date, end_date, device="MOBILE"),
+    ]
+    for query in queries:
+        plan = explain(db_session, query)
+        assert "Index" in plan, plan
+
+
+def test_monthly_partitioning_prunes_date_ranges(db_session, db_cursor):
+    load_table(db_cursor, "campaign", [pd.DataFrame({
+        "campaign_id": [901], "campaign_name": ["Footwear"], "campaign_type": ["Search"],
+    })])
+    load_table(db_cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [9010], "ad_group_name": ["Socks"], "campaign_id": [901],
+    })])
+    load_table(db_cursor, "ad_group_stats", [pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-15", "2024-02-15"]),
+        "ad_group_id": [9010, 9010],
+        "device": ["MOBILE", "MOBILE"],
+        "impressions": [100.0, 100.0],
+        "clicks": [10, 10],
+        "conversions": [1.0, 1.0],
+        "cost": [10.0, 20.0],
+    })])
+
+    assert partition_ad_group_stats_monthly(db_cursor)
+    assert is_partitioned(db_cursor)
+
+    # A new month gets its own partition during the load
+    load_table(db_cursor, "ad_group_stats", [pd.DataFrame({
+        "date": pd.to_datetime(["2024-03-15"]), "ad_group_id": [9010], "device": ["MOBILE"],
+        "impressions": [100.0], "clicks": [10], "conversions": [1.0], "cost": [30.0],
+    })])
+    db_cursor.execute("SELECT to_regclass('ad_group_stats_y2024m03'), SUM(cost) FROM ad_group_stats")
+    partition, total_cost = db_cursor.fetchone()
+    assert partition is not None
+    assert float(total_cost) == 60.0
+
+    plan = explain(db_session, build_performance_query(datetime(2024, 2, 1), datetime(2024, 2, 29), device="MOBILE"))
+    assert "ad_group_stats_y2024m02" in plan
+    assert "ad_group_stats_y2024m01" not in plan
+    assert "ad_group_stats_y2024m03" not in plan
@@ -0,0 +1,60 @@
+import pytest
+from fastapi.testclient import TestClient
+from src.monitoring import instrumentation
+from src.monitoring.instrumentation import RequestStats, instrument_engine
+from src.monitoring.metrics import Histogram
+from test.unit.conftest import async_engine
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("request_seconds", "Request time.", [0.1, 1], ["route"])
+    for value in (0.05, 0.5, 0.7, 3):
+        histogram.observe(value, route="/campaigns")
+
+    assert histogram.render() == [
+        "# HELP request_seconds Request time.",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{route="/campaigns",le="0.1"} 1',
+        'request_seconds_bucket{route="/campaigns",le="1"} 3',
+        'request_seconds_bucket{route="/campaigns",le="+Inf"} 4',
+        'request_seconds_sum{route="/campaigns"} 4.25',
+        'request_seconds_count{route="/campaigns"} 4',
+    ]
+
+
+def test_request_stats_flags_repeated_statements():
+    stats = RequestStats()
+    for _ in range(3):
+        stats.record("SELECT * FROM ad_group WHERE campaign_id = %(campaign_id)s", 0.001)
+    stats.record("SELECT * FROM campaign", 0.002)
+
+    assert stats.sql_count == 4
+    assert stats.repeated_statements(threshold=3) == [("SELECT * FROM ad_group WHERE campaign_id = %(campaign_id)s", 3)]
+    assert 'desc="4 queries"' in stats.server_timing()
+
+
+def test_server_timing_and_metrics(client: TestClient):
+    # The test client's sessions use their own engine
+    instrument_engine(async_engine)
+
+    response = client.get("/campaigns")
+    assert response.status_code == 200
+    server_timing = response.headers["server-timing"]
+    assert server_timing.startswith("app;dur=")
+    assert 'db;dur=' in server_timing and 'queries"' in server_timing
+    assert 'desc="0 queries"' not in server_timing
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/campaigns",status="200"}' in metrics.text
+    assert 'http_request_sql_statements_bucket{method="GET",route="/campaigns",le="+Inf"}' in metrics.text
+
+
+def test_profile_header_returns_pyinstrument_report(client: TestClient, monkeypatch):
+    pytest.importorskip("pyinstrument")
+    monkeypatch.setattr(instrumentation, "PROFILING_ENABLED", True)
+
+    response = client.get("/campaigns", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/html")
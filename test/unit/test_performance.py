@@ -1,5 +1,7 @@
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from datetime import datetime
+from src.analytics.analytics import comparison_period
 
 def test_performance_time_series(client: TestClient):
     response = client.get("/performance-time-series?aggregate_by=day&start_date=2024-01-01&end_date=2024-01-31")
@@ -24,3 +26,93 @@ def test_compare_performance_invalid_mode(client: TestClient):
         "/compare-performance?start_date=2024-01-01&end_date=2024-01-10&compare_mode=invalid_mode"
     )
     assert response.status_code == 422  # Unprocessable Entity
+
+def test_compare_performance_previous_month_in_january(client: TestClient):
+    response = client.get(
+        "/compare-performance?start_date=2024-01-01&end_date=2024-01-31&compare_mode=previous_month"
+    )
+    assert response.status_code == 200
+    before_period = response.json()["before_period"]
+    assert before_period["start_date"] == "2023-12-01"
+    assert before_period["end_date"] == "2023-12-31"
+
+def test_comparison_period_clamps_month_end():
+    assert comparison_period(datetime(2024, 3, 1), datetime(2024, 3, 31), "previous_month") == (
+        datetime(2024, 2, 1), datetime(2024, 2, 29)
+    )
+    assert comparison_period(datetime(2024, 3, 5), datetime(2024, 3, 30), "previous_month") == (
+        datetime(2024, 2, 5), datetime(2024, 2, 29)
+    )
+    assert comparison_period(datetime(2024, 1, 11), datetime(2024, 1, 20), "preceding", 2) == (
+        datetime(2023, 12, 22), datetime(2023, 12, 31)
+    )
+
+def test_compare_performance_periods(client: TestClient):
+    response = client.get(
+        "/compare-performance-periods?start_date=2024-12-01&end_date=2024-12-31&compare_mode=previous_month&periods=12"
+    )
+    assert response.status_code == 200
+    periods = response.json()["periods"]
+    assert len(periods) == 12
+    assert periods[0]["before_period"]["start_date"] == "2024-11-01"
+    assert periods[-1]["before_period"]["start_date"] == "2023-12-01"
+    # Each window is compared to the one right before it
+    for current, previous in zip(periods, periods[1:]):
+        assert current["before_period"] == previous["current_period"]
+
+
+def test_performance_time_series_rejects_unknown_group_by(client: TestClient):
+    response = client.get("/performance-time-series?aggregate_by=day&start_date=2024-01-01&end_date=2024-01-31&group_by=keyword")
+    assert response.status_code == 422
+
+
+def test_performance_time_series_group_by_device(client: TestClient):
+    response = client.get("/performance-time-series?aggregate_by=month&start_date=2024-01-01&end_date=2024-01-31&group_by=device&top=2")
+    assert response.status_code == 200
+    assert "data" in response.json()
+
+
+def test_time_series_breakdown_by_campaign(db_session: Session, db_cursor):
+    import pandas as pd
+    from datetime import date
+    from src.analytics.analytics import build_time_series_query
+    from src.analytics.export import columns_to_records, time_series_columns
+    from src.ingestion.loader import load_table
+    from src.ingestion.rollups import refresh_rollups
+
+    load_table(db_cursor, "campaign", [pd.DataFrame({
+        "campaign_id": [901, 902], "campaign_name": ["Footwear", "Clothing"], "campaign_type": ["Search", "Display"],
+    })])
+    load_table(db_cursor, "ad_group", [pd.DataFrame({
+        "ad_group_id": [9010, 9020], "ad_group_name": ["Socks", "Shirts"], "campaign_id": [901, 902],
+    })])
+    load_table(db_cursor, "ad_group_stats", [pd.DataFrame({
+        "date": pd.to_datetime(["2024-01-01", "2024-01-01", "2024-01-02"]),
+        "ad_group_id": [9010, 9020, 9020],
+        "device": ["MOBILE", "MOBILE", "DESKTOP"],
+        "impressions": [100.0, 100.0, 100.0],
+        "clicks": [10, 10, 10],
+        "conversions": [1.0, 1.0, 1.0],
+        "cost": [10.0, 20.0, 30.0],
+    })])
+    refresh_rollups(db_cursor, date(2024, 1, 1), date(2024, 1, 2))
+
+    def breakdown(*args, **kwargs):
+        query = build_time_series_query("month", *args, **kwargs)
+        rows = db_session.execute(query).all()
+        dimensions = [name for name in ("campaign_id", "device") if name in query.selected_columns]
+        return columns_to_records(time_series_columns(rows, dimensions))
+
+    start_date, end_date = datetime(2024, 1, 1), datetime(2024, 1, 31)
+    by_campaign = breakdown(None, start_date, end_date, group_by="campaign")
+    assert [(row["campaign_id"], float(row["total_cost"])) for row in by_campaign] == [(901, 10.0), (902, 50.0)]
+
+    # The campaigns filter matches campaign ids, also on the raw rows used for a device filter
+    filtered = breakdown([902], start_date, end_date, device="MOBILE")
+    assert [float(row["total_cost"]) for row in filtered] == [20.0]
+
+    top = breakdown(None, start_date, end_date, group_by="campaign", top=1, top_by="cost")
+    assert [row["campaign_id"] for row in top] == [902]
+
+    by_device = breakdown(None, start_date, end_date, group_by="device")
+    assert {row["device"]: float(row["total_cost"]) for row in by_device} == {"DESKTOP": 30.0, "MOBILE": 30.0}
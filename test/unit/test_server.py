@@ -0,0 +1,64 @@
+import os
+import pytest
+from src.database.pool import pool_options
+from src.server import configure_pools, connection_budget, pool_sizes, worker_count
+
+
+def test_worker_count_defaults_to_the_available_cpus(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert worker_count() >= 1
+    if hasattr(os, "sched_getaffinity"):
+        assert worker_count() == len(os.sched_getaffinity(0))
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "6")
+    assert worker_count() == 6
+
+
+def test_connection_budget(monkeypatch):
+    monkeypatch.delenv("DB_CONNECTION_BUDGET", raising=False)
+    monkeypatch.delenv("DB_RESERVED_CONNECTIONS", raising=False)
+    assert connection_budget(100) == 90
+
+    monkeypatch.setenv("DB_RESERVED_CONNECTIONS", "3")
+    assert connection_budget(100) == 97
+
+    monkeypatch.setenv("DB_CONNECTION_BUDGET", "40")
+    assert connection_budget(100) == 40
+
+
+def test_pool_sizes_keep_all_workers_within_the_budget():
+    # Enough room: the requested sizes are kept
+    assert pool_sizes(4, 90, 5, 10) == (5, 10)
+
+    # 16 workers share 90 connections: 5 each, one of them for the sync engine
+    pool_size, max_overflow = pool_sizes(16, 90, 5, 10)
+    assert (pool_size, max_overflow) == (4, 0)
+    assert 16 * (pool_size + max_overflow + 1) <= 90
+
+    # The overflow is lowered before the pool size
+    assert pool_sizes(8, 90, 5, 10) == (5, 5)
+
+    with pytest.raises(ValueError, match="too small"):
+        pool_sizes(64, 90)
+
+
+def test_configure_pools_sets_the_worker_environment(monkeypatch):
+    monkeypatch.setenv("DB_CONNECTION_BUDGET", "50")
+    monkeypatch.setenv("DB_POOL_MODE", "queue")
+    monkeypatch.setenv("DB_POOL_SIZE", "5")
+    monkeypatch.setenv("DB_MAX_OVERFLOW", "10")
+    # Restored after the test, configure_pools sets them
+    monkeypatch.delenv("DB_SYNC_POOL_SIZE", raising=False)
+    monkeypatch.delenv("DB_SYNC_MAX_OVERFLOW", raising=False)
+
+    assert configure_pools(5) == (5, 4)
+    assert os.environ["DB_POOL_SIZE"] == "5"
+    assert os.environ["DB_MAX_OVERFLOW"] == "4"
+    # The sync engine of every worker is held to the one connection the budget counts
+    sync_options = pool_options(is_async=False)
+    assert (sync_options["pool_size"], sync_options["max_overflow"]) == (1, 0)
+    assert pool_options(is_async=True)["pool_size"] == 5
+
+    # PgBouncer does the pooling, nothing to size
+    monkeypatch.setenv("DB_POOL_MODE", "null")
+    assert configure_pools(5) is None
@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import pytest
+from fastapi.testclient import TestClient
+from src.database.database import database_url
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Seconds `import main` may take, the fastest of a few runs counts
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
+IMPORT_MAIN = "import time; started_at = time.perf_counter(); import main; print(time.perf_counter() - started_at)"
+
+
+def test_import_main_is_fast_and_does_not_touch_the_database(tmp_path):
+    # An unreachable database makes any connection attempt during the import fail or hang
+    env = dict(os.environ, DB_HOST="203.0.113.1", DB_PORT="1", PYTHONPATH=ROOT, DB_MIGRATE_ON_STARTUP="false")
+    timings = []
+    for _ in range(3):
+        result = subprocess.run([sys.executable, "-c", IMPORT_MAIN], cwd=tmp_path, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+
+    assert min(timings) < STARTUP_BUDGET_SECONDS, timings
+    # Nothing is logged either, the log listener starts with the app
+    assert not (tmp_path / "logs").exists()
+
+
+def test_lifespan_starts_and_stops_the_app():
+    from main import app
+
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 200
+
+
+def test_database_url_reports_missing_settings(monkeypatch):
+    monkeypatch.delenv("DB_HOST", raising=False)
+    with pytest.raises(RuntimeError, match="DB_HOST"):
+        database_url()
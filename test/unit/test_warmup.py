@@ -0,0 +1,83 @@
+import asyncio
+from datetime import date, datetime
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.cache.response_cache import response_cache
+from src.cache.warmup import DEFAULT_WARMUP_SPECS, WarmupScheduler, resolve_specs
+from test.unit.conftest import async_engine
+
+
+def test_resolve_specs_end_on_the_latest_date():
+    specs = resolve_specs(DEFAULT_WARMUP_SPECS, date(2024, 3, 31))
+
+    assert [(spec.type, spec.start_date, spec.end_date) for spec in specs[:2]] == [
+        ("compare", "2024-03-25", "2024-03-31"),
+        ("compare", "2024-03-02", "2024-03-31"),
+    ]
+    assert [(spec.aggregate_by, spec.start_date) for spec in specs[2:]] == [("day", None), ("week", None),
+                                                                            ("month", None)]
+
+    # Without data there are no dates to compare
+    assert [spec.type for spec in resolve_specs(DEFAULT_WARMUP_SPECS, None)] == ["time_series"] * 3
+
+    with pytest.raises(ValidationError):
+        resolve_specs([{"type": "time_series", "aggregate_by": "year"}], None)
+
+
+def test_warmup_fills_the_response_cache():
+    scheduler = WarmupScheduler(DEFAULT_WARMUP_SPECS, session_factory=lambda: AsyncSession(bind=async_engine))
+
+    async def run():
+        await response_cache.clear()
+        await scheduler.warm(7, date(2024, 3, 31))
+
+        # Requests for the same parameters are cache hits
+        async with AsyncSession(bind=async_engine) as db:
+            _, compare = await response_cache.lookup("compare-performance", {
+                "start_date": datetime(2024, 3, 25), "end_date": datetime(2024, 3, 31), "compare_mode": "preceding",
+                "device": None,
+            }, db)
+            _, monthly = await response_cache.lookup("performance-time-series", {
+                "aggregate_by": "month", "campaigns": None, "start_date": None, "end_date": None, "device": None,
+                "group_by": None, "ad_groups": None, "top": None, "top_by": "cost",
+            }, db)
+        return compare, monthly
+
+    compare, monthly = asyncio.run(run())
+    assert compare["before_period"]["start_date"] == "2024-03-18"
+    assert monthly is not None
+    assert scheduler.stats()["status"] == "done"
+    assert (scheduler.stats()["queries"], scheduler.stats()["failed"], scheduler.stats()["runs"]) == (5, 0, 1)
+
+
+def test_warmup_runs_once_per_data_version_with_bounded_concurrency():
+    active, peak = 0, 0
+
+    class CountingSession(AsyncSession):
+        async def __aenter__(self):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            return await super().__aenter__()
+
+        async def __aexit__(self, *exc_info):
+            nonlocal active
+            active -= 1
+            return await super().__aexit__(*exc_info)
+
+    # One run_batch group per device
+    specs = [{"type": "time_series", "aggregate_by": "day", "device": device}
+             for device in ("MOBILE", "DESKTOP", "TABLET", None)]
+    scheduler = WarmupScheduler(specs, concurrency=2, session_factory=lambda: CountingSession(bind=async_engine))
+
+    async def run():
+        await response_cache.clear()
+        await scheduler.check()
+        await scheduler.check()
+
+    asyncio.run(run())
+    assert scheduler.stats()["runs"] == 1
+    assert scheduler.stats()["queries"] == 4
+    # The version check session is closed before the warm-up starts
+    assert peak == 2